@@ -14,6 +14,111 @@ PAUSE_AFTER_EACH_TRADE = 20        # After full trade
 PAUSE_AFTER_ENTRY = 5              # When waiting for entry
 PAUSE_AFTER_EXIT = 8               # After exiting but still in the loop
 
+# --- Adaptive Polling ---
+USE_SCHEDULER = False              # Deadline-based adaptive polling instead of the fixed pauses above
+SCHEDULER_MIN_INTERVAL = 0.5       # Fastest poll interval (seconds)
+SCHEDULER_POSITION_INTERVAL = 3    # Poll interval in a position, far from every exit level
+SCHEDULER_IDLE_INTERVAL = 5        # Poll interval when flat and calm
+SCHEDULER_NEAR_BAND = 0.002        # Relative distance to an exit level where polling speeds up
+SCHEDULER_VOL_Z = 3                # Sigmas of recent volatility that must fit between polls
+SCHEDULER_SPIKE_RATIO = 2          # Short/long volatility ratio that counts as a spike when flat
+SCHEDULER_MAX_RATE = 60            # Request budget (polls per minute)
+SCHEDULER_BURST = 10               # Polls that may exceed the budget rate in a burst
+
+# --- Market Data Client ---
+CONNECT_TIMEOUT = 3.05             # Seconds to establish a connection
+READ_TIMEOUT = 5                   # Seconds to wait for a response
+MAX_RETRIES = 3                    # Retries per fetch on transient errors
+BACKOFF_BASE = 0.25                # First retry waits up to this many seconds
+BACKOFF_MAX = 4                    # Cap on a single retry wait
+FETCH_LATENCY_BUDGET = 8           # Max seconds one fetch may take, retries included
+CIRCUIT_BREAKER_THRESHOLD = 5      # Consecutive failed fetches before failing fast
+CIRCUIT_BREAKER_COOLDOWN = 30      # Seconds to fail fast before trying again
+HTTP_POOL_SIZE = 32                # Keep-alive connections per host
+BATCH_CONTRACT_TYPES = "perpetual_futures"  # Filter for the batch tickers endpoint
+
+# --- Streaming Feed ---
+USE_STREAM = False                 # Push ticks over WebSocket instead of polling
+STREAM_URL = "wss://socket.india.delta.exchange"
+STREAM_STALE_TIMEOUT = 10          # Seconds without a pushed tick before polling instead
+STREAM_RECONNECT_BASE = 1          # First reconnect waits up to this many seconds
+STREAM_RECONNECT_MAX = 30          # Cap on a single reconnect wait
+
+# --- Logging ---
+LOG_QUEUE_SIZE = 10000             # Records buffered before DEBUG is dropped / INFO blocks
+LOG_RING_SIZE = 200                # Recent INFO+ lines kept in memory for the dashboard
+LOG_FLUSH_INTERVAL = 0.5           # Max seconds a record waits before hitting the file
+LOG_BLOCK_TIMEOUT = 1              # Max seconds INFO+ waits on a full queue before dropping
+LOG_ROTATE_BYTES = 32 * 2**20      # Log size (32 MB) that starts a new segment
+LOG_ROTATE_SECONDS = 86400         # Max age of a segment's first record before rotating
+LOG_ARCHIVE_DIR = "archive"        # Compressed segments, next to the log file
+LOG_BLOCK_BYTES = 256 * 1024       # Uncompressed bytes per independently readable gzip block
+STATE_LOG_LINES = 20               # Recent log lines published in the state snapshot
+
+# --- Price History ---
+HISTORY_DIR = "logs/history"      # Per-symbol tick history segments
+HISTORY_SEGMENT_SIZE = 4096        # Ticks per segment file
+HISTORY_MAX_SEGMENTS = 2000        # Segments kept on disk (older ones are deleted)
+HISTORY_MAX_POINTS = 1500          # Points per chart after downsampling
+
+# --- Tick Recorder ---
+USE_RECORDER = False               # Append every ticker response to binary daily files
+RECORD_DIR = "logs/ticks"          # Per-symbol .ticks files (one per UTC day)
+RECORD_FLUSH_EVERY = 1             # Ticks buffered before each write
+
+# --- Candles ---
+USE_CANDLES = False                # Aggregate ticks into multi-timeframe OHLCV bars
+CANDLE_INTERVALS = {"1s": 1, "1m": 60, "5m": 300, "15m": 900}  # Timeframe -> seconds
+CANDLE_MAX_BARS = 500              # Closed bars kept per timeframe
+CANDLE_GRACE = 2                   # Seconds a bar stays open for late ticks
+CANDLE_FILL_GAPS = True            # Fill intervals without ticks with flat bars
+CONFIRM_TIMEFRAME = None           # e.g. "5m": entries also need that timeframe's EMA trend
+
+# --- Warm Start ---
+USE_SNAPSHOTS = True               # Save engine state and restore it on restart
+SNAPSHOT_DIR = "logs/snapshots"    # One snapshot file per symbol
+SNAPSHOT_INTERVAL = 30             # Seconds between periodic snapshots (trades save immediately)
+BACKFILL_TICKS = 500               # Recorded ticks replayed into the indicators on a cold start
+
+# --- Replay ---
+REPLAY_DIR = "logs/replay"         # Ledger, state, history and log of each replay run
+
+# --- Latency ---
+LATENCY_ENABLED = True             # Per-stage timing of each tick (published in the state)
+LATENCY_WINDOW = 300               # Seconds per histogram window (stats cover 1-2 windows)
+LATENCY_PUBLISH_INTERVAL = 1       # Min seconds between percentile recomputations
+PROFILE_INTERVAL = 0.005           # Sampling profiler: seconds between stack samples
+PROFILE_DURATION = 10              # Sampling profiler: seconds per profile
+PROFILE_DIR = "logs/profiles"      # Collapsed-stack profile dumps
+PROFILE_STATE_MAX_AGE = 60         # Dashboard only signals a bot whose state is at most this old
+
+# --- Benchmarks ---
+BENCH_SAMPLES = 2000               # Timed calls per benchmark
+BENCH_ALLOC_SAMPLES = 200          # Calls measured under tracemalloc
+BENCH_BASELINE = "benchmarks/baseline.json"  # Default baseline file
+BENCH_THRESHOLD = 0.25             # Slowdown flagged as a regression (0.25 = +25%)
+
+# --- Strategy Variants ---
+STRATEGIES_PATH = None             # JSON list of {"name": ..., <default_params() overrides>}
+STRATEGY_DIR = "logs/strategies"   # Ledger, state and history of each variant
+
+# --- Pipeline ---
+USE_PIPELINE = False               # Run ingest, strategy and persistence as separate processes
+PIPELINE_TICK_QUEUE = 1000         # Ticks buffered between ingest and strategy (oldest dropped)
+PIPELINE_OUTBOX_SIZE = 10000       # Writes buffered between strategy and persistence
+
+# --- Analytics ---
+ANALYTICS_CURVE_POINTS = 500       # Equity curve points kept (between 1x and 2x this many)
+
+# --- Synthetic Ticks & Load Test ---
+SYNTH_START_PRICE = 60000.0        # First price of generated ticks
+SYNTH_VOLATILITY = 0.0002          # GBM volatility per sqrt(second)
+SYNTH_JUMP_RATE = 0.001            # Price jumps per second (Poisson)
+SYNTH_JUMP_STD = 0.005             # Std dev of a jump's log return
+SYNTH_VOLUME_MEAN = 50.0           # Typical volume per tick
+LOADTEST_DIR = "logs/loadtest"     # Ledger, state, history and log of each load test
+LOADTEST_SAMPLE_INTERVAL = 1.0     # Seconds between throughput / memory / fd samples
+
 # --- Fees ---
 TRADE_COST_PERCENT = 0.0005        # 0.05% fee rate
 GST_RATE = 0.18                    # 18% GST on trade fee
@@ -29,10 +134,21 @@ USE_MACD = True
 USE_RSI = True
 USE_VWAP = True
 
+# --- Indicator Periods ---
+EMA_PERIOD = 20                    # Ticks (or bars) in the EMA
+RSI_PERIOD = 14                    # Ticks (or bars) in the RSI
+VWAP_PERIOD = 20                   # Ticks (or bars) in the rolling VWAP
+
 # --- RSI Custom Thresholds ---
 RSI_HIGH_LEVEL = 0.6
 RSI_LOW_LEVEL = 0.4
 
+# --- Entry Rules ---
+RULES_PATH = None                  # JSON rule file (functions/rules.py); None = rules from the USE_* flags
+
 # --- Others ---
 SYMBOL = "BTCUSD"
-EXCEL_PATH = "logs/trades.xlsx"
+SYMBOLS = [SYMBOL]                 # Symbols traded by functions/runner.py
+EXCEL_PATH = "logs/trades.xlsx"           # Excel export (python -m functions.ledger)
+LEDGER_PATH = "logs/trades.db"            # Append-only SQLite trade ledger
+TRADE_BOOK_MAX_RECORDS = 10000     # Recent trades kept in memory by the engine
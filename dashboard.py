@@ -1,25 +1,60 @@
 # dashboard.py
 
 import streamlit as st
-import json
+import altair as alt
+import pandas as pd
 from pathlib import Path
-from streamlit_autorefresh import st_autorefresh
+from constants import SYMBOL, HISTORY_DIR, STRATEGY_DIR, PROFILE_DIR, PROFILE_DURATION, PROFILE_STATE_MAX_AGE
+from functions.history import HistoryStore, EVENT_EXIT
+from functions.latency import request_profile
+from functions.state_cache import SharedStateCache
 
 STATE_FILE = Path("state.json")
 
 st.set_page_config(page_title="Trading Bot Dashboard", layout="wide")
 st.title("📊 Real-Time Trade Monitor")
 
-# ✅ Native Streamlit auto-refresh every 3 seconds without flicker
-st_autorefresh(interval=3000, limit=None, key="refresh")
+def state_files():
+    """
+    Label -> (state file, history folder) of every bot writing state here:
+    state.json (j1.py), state_<SYMBOL>.json (functions/runner.py) and
+    STRATEGY_DIR/<name>/state.json (strategy variants, history alongside).
+    """
+    files = {}
+    if STATE_FILE.exists():
+        files[STATE_FILE.name] = (STATE_FILE, HISTORY_DIR)
+    for path in sorted(Path(".").glob("state_*.json")):
+        files[path.stem.removeprefix("state_")] = (path, HISTORY_DIR)
+    for path in sorted(Path(STRATEGY_DIR).glob("*/state.json")):
+        files[f"{path.parent.name} (strategy)"] = (path, str(path.parent / "history"))
+    return files or {STATE_FILE.name: (STATE_FILE, HISTORY_DIR)}
+
+@st.cache_resource
+def get_state_cache(path):
+    # One watchdog-driven reader per state file for the whole process, shared by all sessions
+    return SharedStateCache(path)
+
+files = state_files()
+label = next(iter(files)) if len(files) == 1 else st.selectbox("Bot", list(files))
+state_file, history_dir = files[label]
+state_cache = get_state_cache(str(state_file))
 
 def load_state():
-    if STATE_FILE.exists():
-        with open(STATE_FILE) as f:
-            return json.load(f)
-    return {}
+    state, seq = state_cache.get()
+    st.session_state.rendered_seq = seq
+    return state
+
+# ✅ Cheap check every second; the full page only reruns when the bot published a new snapshot
+@st.fragment(run_every=1)
+def watch_for_updates():
+    _, seq = state_cache.get()
+    if seq != st.session_state.get("rendered_seq"):
+        st.rerun()
+    staleness = state_cache.staleness()
+    st.caption(f"⏱️ Snapshot age: {staleness:.1f}s" if staleness is not None else "⏱️ No snapshot yet")
 
 state = load_state()
+watch_for_updates()
 
 # === TOP PANEL ===
 col1, col2, col3 = st.columns(3)
@@ -68,5 +103,101 @@ if position.get("active"):
 else:
     st.subheader("💤 No Active Trade")
 
+# === PERFORMANCE PANEL ===
+# Metrics are kept incrementally by the bot; the curve is capped in size
+analytics = state.get("analytics", {})
+if analytics.get("trades"):
+    st.subheader("📊 Performance")
+    perf1, perf2, perf3, perf4, perf5 = st.columns(5)
+    perf1.metric("Net P&L", f"${analytics['net_profit']:.2f}")
+    perf2.metric("Max Drawdown", f"${analytics['max_drawdown']:.2f}")
+    perf3.metric("Win Rate", f"{analytics['win_rate'] * 100:.1f}%", f"{analytics['trades']} trades", delta_color="off")
+    profit_factor = analytics["profit_factor"]
+    perf4.metric("Profit Factor", f"{profit_factor:.2f}" if profit_factor is not None else "∞")
+    perf5.metric("Fees Paid", f"${analytics['fees']:.2f}", f"avg {analytics['avg_duration']:.0f}s held", delta_color="off")
+
+    curve_df = pd.DataFrame(analytics["curve"], columns=["trade", "equity"]).set_index("trade")
+    st.line_chart(curve_df, height=200)
+    direction_df = pd.DataFrame.from_dict(analytics["by_direction"], orient="index")
+    direction_df.index.name = "direction"
+    st.dataframe(direction_df, use_container_width=True)
+
+# === PRICE HISTORY PANEL ===
+HISTORY_RANGES = {"1h": 3600, "6h": 6 * 3600, "1d": 86400, "1w": 7 * 86400}
+
+@st.cache_resource
+def get_history(symbol, folder):
+    # Read-only view of the bot's history; segment memory maps are reused across reruns
+    return HistoryStore(symbol, folder, readonly=True)
+
+st.subheader("📈 Price History")
+history = get_history(state.get("symbol", SYMBOL), history_dir)
+last_ts = history.last_ts()
+if last_ts is None:
+    st.caption("No history recorded yet")
+else:
+    window = st.radio("Range", list(HISTORY_RANGES), horizontal=True, key="history_range")
+    points, markers = history.query(last_ts - HISTORY_RANGES[window], last_ts)
+
+    def to_frame(rows):
+        df = pd.DataFrame({name: rows[name] for name in rows.dtype.names})
+        df["time"] = pd.to_datetime(df["ts"], unit="s") + pd.Timedelta(hours=5, minutes=30)
+        return df
+
+    df = to_frame(points)
+    lines = df.melt("time", ["price", "ema", "vwap"], var_name="series", value_name="value").dropna()
+    chart = alt.Chart(lines).mark_line().encode(
+        x=alt.X("time:T", title=None),
+        y=alt.Y("value:Q", scale=alt.Scale(zero=False), title="Price"),
+        color=alt.Color("series:N", title=None),
+    )
+    if len(markers):
+        marks = to_frame(markers)
+        marks["trade"] = marks["event"].map(lambda e: "Exit" if e == EVENT_EXIT else "Long" if e > 0 else "Short")
+        chart += alt.Chart(marks).mark_point(size=80, filled=True).encode(
+            x="time:T", y="price:Q",
+            shape=alt.Shape("trade:N", title=None),
+            color=alt.value("black"),
+        )
+    st.altair_chart(chart, use_container_width=True)
+
+    hist1, hist2 = st.columns(2)
+    hist1.caption("MACD / Signal")
+    hist1.line_chart(df.set_index("time")[["macd", "signal"]], height=200)
+    hist2.caption("RSI")
+    hist2.line_chart(df.set_index("time")[["rsi"]], height=200)
+
+# === LATENCY PANEL ===
+latency = state.get("latency", {})
+if latency.get("stages"):
+    st.subheader("⏱️ Stage Latency")
+    latency_df = pd.DataFrame.from_dict(latency["stages"], orient="index")
+    latency_df.index.name = "stage"
+    st.dataframe(latency_df[["p50_ms", "p99_ms", "max_ms", "count"]], use_container_width=True)
+    # Only signal a bot that is still publishing; an old pid may belong to another process by now
+    staleness = state_cache.staleness()
+    live = staleness is not None and staleness <= PROFILE_STATE_MAX_AGE
+    if st.button("🔬 Capture profile", disabled=not live,
+                 help=None if live else f"No state from the bot in the last {PROFILE_STATE_MAX_AGE}s"):
+        try:
+            request_profile(latency["pid"], latency.get("started"))
+            st.caption(f"Profile requested; it will be written to {PROFILE_DIR} in about {PROFILE_DURATION}s")
+        except (OSError, KeyError, AttributeError) as e:
+            st.caption(f"Could not signal the bot: {e}")
+
+# === PIPELINE PANEL ===
+pipeline = state.get("pipeline")
+if pipeline:
+    st.subheader("🧵 Pipeline")
+    stages = {name: pipeline[name] for name in ("strategy", "persistence") if name in pipeline}
+    pipeline_df = pd.DataFrame.from_dict(stages, orient="index")
+    pipeline_df.index.name = "stage"
+    st.dataframe(pipeline_df, use_container_width=True)
+    ingest = pipeline.get("ingest", {})
+    st.caption(
+        f"Ingest: {ingest.get('polls', 0)} polls, {ingest.get('empty', 0)} empty, "
+        f"{ingest.get('dropped', 0)} ticks dropped | States dropped: {pipeline.get('state_dropped', 0)}"
+    )
+
 # st.markdown("---")
 # st.caption("Bot Dashboard | Updates every 3 seconds without flicker ✨")
@@ -0,0 +1,174 @@
+
+
+# functions/analytics.py
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from constants import LEDGER_PATH, LOT_SIZE, LOTS_PER_CRYPTO, TRADE_COST_PERCENT, ANALYTICS_CURVE_POINTS
+from functions.utils import calculate_total_fees
+
+DIRECTIONS = ("Long", "Short")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class Totals:
+    """Sums behind win rate, profit factor, fees and average duration for one group of trades."""
+    __slots__ = ("trades", "wins", "gross_profit", "gross_loss", "fees", "duration")
+
+    def __init__(self, trades=0, wins=0, gross_profit=0.0, gross_loss=0.0, fees=0.0, duration=0.0):
+        self.trades = trades
+        self.wins = wins
+        self.gross_profit = gross_profit  # sum of winning net profits
+        self.gross_loss = gross_loss      # sum of losing net profits, as a positive number
+        self.fees = fees
+        self.duration = duration          # seconds
+
+    def add(self, profit, fee, duration):
+        self.trades += 1
+        if profit > 0:
+            self.wins += 1
+            self.gross_profit += profit
+        else:
+            self.gross_loss -= profit
+        self.fees += fee
+        self.duration += duration
+
+    @classmethod
+    def from_arrays(cls, profit, fee, duration):
+        wins = profit > 0
+        return cls(
+            int(len(profit)), int(wins.sum()), float(profit[wins].sum()), float(-profit[~wins].sum()),
+            float(fee.sum()), float(duration.sum()),
+        )
+
+    def to_dict(self):
+        return {
+            "trades": self.trades,
+            "wins": self.wins,
+            "win_rate": round(self.wins / self.trades, 4) if self.trades else 0.0,
+            "net_profit": round(self.gross_profit - self.gross_loss, 2),
+            "profit_factor": round(self.gross_profit / self.gross_loss, 3) if self.gross_loss else None,
+            "fees": round(self.fees, 2),
+            "avg_duration": round(self.duration / self.trades, 1) if self.trades else 0.0,
+        }
+
+
+class PerformanceStats:
+    """
+    Performance metrics kept up to date one closed trade at a time.
+
+    add() is O(1): it updates the equity, its running peak and the max
+    drawdown, and the win/loss, fee and duration sums overall and per
+    direction. Profits are net of fees, as finalize_exit records them.
+
+    The equity curve keeps at most 2 * `curve_points` points: when full,
+    every other point is dropped and only every 2nd trade is kept from then
+    on, so the curve published to the dashboard stays the same size with
+    100 or 100k trades. from_ledger() builds the same state in one
+    vectorized pass.
+    """
+    def __init__(self, curve_points=ANALYTICS_CURVE_POINTS):
+        self.curve_points = curve_points
+        self.totals = Totals()
+        self.by_direction = {direction: Totals() for direction in DIRECTIONS}
+        self.equity = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.curve = []  # (trade count, equity), every `stride`-th trade
+        self.stride = 1
+        self.cached = None
+
+    def add(self, trade_type, profit, fee=0.0, duration=0.0):
+        """Adds one closed trade (net profit, fee paid, seconds held)."""
+        self.totals.add(profit, fee, duration)
+        if trade_type in self.by_direction:
+            self.by_direction[trade_type].add(profit, fee, duration)
+
+        self.equity += profit
+        if self.equity > self.peak:
+            self.peak = self.equity
+        elif self.peak - self.equity > self.max_drawdown:
+            self.max_drawdown = self.peak - self.equity
+
+        count = self.totals.trades
+        if count % self.stride == 0:
+            self.curve.append((count, self.equity))
+            if len(self.curve) >= 2 * self.curve_points:
+                self.curve = self.curve[1::2]
+                self.stride *= 2
+        self.cached = None
+
+    def add_record(self, record):
+        """Adds a closed TradeRecord."""
+        self.add(record.trade_type, record.profit, record.trade_fee or 0.0, record.exit_ts - record.entry_ts)
+
+    @classmethod
+    def from_ledger(cls, df, curve_points=ANALYTICS_CURVE_POINTS):
+        """Stats of the closed trades in a ledger DataFrame (TradeLedger.to_dataframe()), vectorized."""
+        stats = cls(curve_points)
+        closed = df[df["Exit Price"].notna() & df["Profit"].notna()]
+        if closed.empty:
+            return stats
+
+        profit = closed["Profit"].to_numpy(dtype=float)
+        fee_rate = closed["Trade Cost Percentage"].fillna(TRADE_COST_PERCENT).to_numpy(dtype=float)
+        fee = calculate_total_fees(
+            closed["Entry Price"].to_numpy(dtype=float), closed["Exit Price"].to_numpy(dtype=float),
+            LOT_SIZE, LOTS_PER_CRYPTO, fee_rate,
+        )
+        entry = pd.to_datetime(closed["Entry Date"] + " " + closed["Entry Time"], format=TIME_FORMAT)
+        exit_ = pd.to_datetime(closed["Exit Date"] + " " + closed["Exit Time"], format=TIME_FORMAT)
+        duration = (exit_ - entry).dt.total_seconds().to_numpy()
+
+        stats.totals = Totals.from_arrays(profit, fee, duration)
+        trade_type = closed["Trade Type"].to_numpy()
+        for direction in DIRECTIONS:
+            mask = trade_type == direction
+            stats.by_direction[direction] = Totals.from_arrays(profit[mask], fee[mask], duration[mask])
+
+        equity = np.cumsum(profit)
+        peak = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:]
+        stats.equity = float(equity[-1])
+        stats.peak = float(peak[-1])
+        stats.max_drawdown = float((peak - equity).max())
+
+        # Same points add() would have kept after len(profit) trades
+        n = len(profit)
+        while n // stats.stride >= 2 * curve_points:
+            stats.stride *= 2
+        counts = np.arange(stats.stride, n + 1, stats.stride)
+        stats.curve = list(zip(counts.tolist(), equity[counts - 1].tolist()))
+        return stats
+
+    def to_dict(self):
+        """JSON-ready metrics and equity curve; cached until the next trade."""
+        if self.cached is None:
+            curve = [(0, 0.0)] + self.curve
+            if curve[-1][0] != self.totals.trades:
+                curve.append((self.totals.trades, self.equity))
+            self.cached = dict(
+                self.totals.to_dict(),
+                max_drawdown=round(self.max_drawdown, 2),
+                by_direction={direction: totals.to_dict() for direction, totals in self.by_direction.items()},
+                curve=[[count, round(equity, 2)] for count, equity in curve],
+            )
+        return self.cached
+
+
+if __name__ == "__main__":
+    from functions.ledger import TradeLedger
+
+    parser = argparse.ArgumentParser(description="Performance metrics of a trade ledger.")
+    parser.add_argument("ledger", nargs="?", default=LEDGER_PATH)
+    parser.add_argument("--symbol", default="", help="Symbol to report (default: every symbol)")
+    args = parser.parse_args()
+
+    ledger = TradeLedger(args.ledger, args.symbol)
+    stats = PerformanceStats.from_ledger(ledger.to_dataframe(all_symbols=not args.symbol))
+    report = stats.to_dict()
+    report.pop("curve")
+    print(json.dumps(report, indent=2))
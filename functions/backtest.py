@@ -0,0 +1,275 @@
+
+
+# functions/backtest.py
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    TAKE_PROFIT_PERCENT, STOP_LOSS_PERCENT, TRAILING_TRIGGER_PERCENT, TRAILING_MARGIN_PERCENT,
+    TRADE_COST_PERCENT, LOT_SIZE, LOTS_PER_CRYPTO, TRADE_SIZE,
+    USE_EMA, USE_MACD, USE_RSI, USE_VWAP, RSI_HIGH_LEVEL, RSI_LOW_LEVEL, EMA_PERIOD, RSI_PERIOD, VWAP_PERIOD,
+)
+from functions.indicators import ema_series, macd_series, rsi_series, vwap_series
+from functions.recorder import TICK_SUFFIX, open_tick_file
+from functions.rules import default_rule_set
+from functions.trade_book import TRADE_COLUMNS
+from functions.utils import calculate_total_fees, format_timestamp
+
+# Exit reasons, in the order exit_trade checks them
+EXIT_TAKE_PROFIT = 1
+EXIT_TRAILING = 2
+EXIT_STOP_LOSS = 3
+
+# ========== Loading ==========
+
+def load_ticks(path):
+    """
+    Loads tick data from a CSV or .npy file.
+
+    CSV files need a 'close' (or 'price') column and may have 'timestamp'
+    and 'volume'. .npy files can be a structured array with the same field
+    names or a 2D array with columns (timestamp, close, volume) or
+    (close, volume). .ticks files come from functions/recorder.py.
+
+    Returns:
+        (timestamps, prices, volumes) as NumPy arrays
+    """
+    if str(path).endswith(TICK_SUFFIX):
+        data = open_tick_file(path)
+        columns = {name: data[name] for name in data.dtype.names}
+    elif str(path).endswith(".npy"):
+        data = np.load(path)
+        if data.dtype.names:
+            columns = {name: data[name] for name in data.dtype.names}
+        elif data.ndim == 2 and data.shape[1] == 3:
+            columns = {"timestamp": data[:, 0], "close": data[:, 1], "volume": data[:, 2]}
+        elif data.ndim == 2 and data.shape[1] == 2:
+            columns = {"close": data[:, 0], "volume": data[:, 1]}
+        else:
+            columns = {"close": data}
+    else:
+        df = pd.read_csv(path)
+        columns = {name: df[name].to_numpy() for name in df.columns}
+
+    prices = np.asarray(columns.get("close", columns.get("price")), dtype=np.float64)
+    volumes = np.asarray(columns.get("volume", np.zeros(len(prices))), dtype=np.float64)
+    timestamps = np.asarray(columns.get("timestamp", np.arange(len(prices))), dtype=np.int64)
+    return timestamps, prices, volumes
+
+# ========== Indicators & Signals ==========
+
+def compute_indicators(prices, volumes):
+    """Computes every indicator over the whole price array at once."""
+    macd, signal = macd_series(prices)
+    return {
+        "ema": ema_series(prices, EMA_PERIOD),
+        "macd": macd,
+        "signal": signal,
+        "rsi": rsi_series(prices, RSI_PERIOD),
+        "vwap": vwap_series(prices, volumes, VWAP_PERIOD),
+    }
+
+
+def entry_signals(prices, indicators, use_ema=USE_EMA, use_macd=USE_MACD, use_rsi=USE_RSI,
+                  use_vwap=USE_VWAP, rsi_high=RSI_HIGH_LEVEL, rsi_low=RSI_LOW_LEVEL):
+    """
+    Bulk version of check_entry_criteria, evaluated with the compiled
+    default rule set (see functions/rules.py).
+
+    Returns:
+        int8 array: 1 for BUY, -1 for SELL, 0 for HOLD
+    """
+    if use_rsi:
+        rsi_high, rsi_low = float(rsi_high), float(rsi_low)
+    else:
+        rsi_high = rsi_low = None  # no RSI rule to compare against
+    rules = default_rule_set(bool(use_ema), bool(use_macd), bool(use_rsi), bool(use_vwap), rsi_high, rsi_low)
+    return rules.signals({"price": prices, **indicators})
+
+# ========== Exit Simulation ==========
+
+def find_exit(prices, entry_index, is_long, take_profit, stop_loss, trailing_trigger, trailing_margin):
+    """
+    Finds where a trade entered at `entry_index` leaves, applying the same
+    take-profit, trailing-stop and stop-loss rules (and float expressions)
+    as exit_trade.
+
+    The trailing stop depends on the path, so this is a plain scalar walk
+    over a list or memoryview of prices; that is cheaper per tick than
+    re-masking NumPy windows after every trailing update.
+
+    Returns:
+        (exit_index, reason), or (None, None) if the data ends first
+    """
+    entry_price = prices[entry_index]
+    extreme = entry_price
+    if is_long:
+        tp_level = entry_price * (1 + take_profit)
+        sl_level = entry_price * (1 - stop_loss)
+        trailing_level = extreme * (1 - trailing_margin)
+        for i in range(entry_index + 1, len(prices)):
+            price = prices[i]
+            if (price > extreme and (price - extreme) / extreme >= trailing_trigger
+                    and price * (1 - trailing_margin) > sl_level):
+                extreme = price
+                trailing_level = extreme * (1 - trailing_margin)
+            if price >= tp_level:
+                return i, EXIT_TAKE_PROFIT
+            if price <= trailing_level:
+                return i, EXIT_TRAILING
+            if price <= sl_level:
+                return i, EXIT_STOP_LOSS
+    else:
+        tp_level = entry_price * (1 - take_profit)
+        sl_level = entry_price * (1 + stop_loss)
+        trailing_level = extreme * (1 + trailing_margin)
+        for i in range(entry_index + 1, len(prices)):
+            price = prices[i]
+            if (price < extreme and (extreme - price) / extreme >= trailing_trigger
+                    and price * (1 + trailing_margin) < sl_level):
+                extreme = price
+                trailing_level = extreme * (1 + trailing_margin)
+            if price <= tp_level:
+                return i, EXIT_TAKE_PROFIT
+            if price >= trailing_level:
+                return i, EXIT_TRAILING
+            if price >= sl_level:
+                return i, EXIT_STOP_LOSS
+    return None, None
+
+
+def simulate_trades(prices, signals, take_profit=TAKE_PROFIT_PERCENT, stop_loss=STOP_LOSS_PERCENT,
+                    trailing_trigger=TRAILING_TRIGGER_PERCENT, trailing_margin=TRAILING_MARGIN_PERCENT):
+    """
+    Walks the signal array like the j1.py loop: enter on the first signal
+    while flat, manage the position from the next tick, and look for a new
+    entry from the tick after the exit.
+
+    Exits are walked over a memoryview of `prices`, which reads Python
+    floats straight from the array (shared memory included) without
+    copying it.
+
+    Returns:
+        dict of arrays: entry_index, exit_index (-1 if still open),
+        direction (1 long, -1 short) and reason (0 if still open)
+    """
+    candidates = np.flatnonzero(signals)
+    price_view = memoryview(np.ascontiguousarray(prices, dtype=np.float64))
+    entries, exits, directions, reasons = [], [], [], []
+    position = 0
+    while True:
+        k = np.searchsorted(candidates, position)
+        if k >= len(candidates):
+            break
+        entry_index = candidates[k]
+        is_long = signals[entry_index] > 0
+        exit_index, reason = find_exit(price_view, entry_index, is_long, take_profit, stop_loss,
+                                       trailing_trigger, trailing_margin)
+        entries.append(entry_index)
+        directions.append(1 if is_long else -1)
+        if exit_index is None:
+            exits.append(-1)
+            reasons.append(0)
+            break
+        exits.append(exit_index)
+        reasons.append(reason)
+        position = exit_index + 1
+
+    return {
+        "entry_index": np.array(entries, dtype=np.int64),
+        "exit_index": np.array(exits, dtype=np.int64),
+        "direction": np.array(directions, dtype=np.int8),
+        "reason": np.array(reasons, dtype=np.int8),
+    }
+
+
+def trade_profits(prices, trades):
+    """
+    Vectorized P&L for closed trades, as exit_trade + finalize_exit compute it.
+
+    Returns:
+        (trade_fee, net_profit, total_profit) arrays for the closed trades
+    """
+    closed = trades["exit_index"] >= 0
+    entry_price = prices[trades["entry_index"][closed]]
+    exit_price = prices[trades["exit_index"][closed]]
+    gross = (exit_price - entry_price) * trades["direction"][closed] * TRADE_SIZE
+    trade_fee = calculate_total_fees(entry_price, exit_price, LOT_SIZE, LOTS_PER_CRYPTO, TRADE_COST_PERCENT)
+    net_profit = gross - trade_fee
+    return trade_fee, net_profit, np.cumsum(net_profit)
+
+# ========== Ledger ==========
+
+def build_trade_df(timestamps, prices, trades, take_profit=TAKE_PROFIT_PERCENT, stop_loss=STOP_LOSS_PERCENT,
+                   trailing_trigger=TRAILING_TRIGGER_PERCENT, trailing_margin=TRAILING_MARGIN_PERCENT):
+    """Builds a ledger with the same columns j1.py writes to trades.xlsx."""
+    trade_fee, net_profit, total_profit = trade_profits(prices, trades)
+    rows = []
+    for i, (entry_index, exit_index) in enumerate(zip(trades["entry_index"], trades["exit_index"])):
+        entry_date, entry_time = format_timestamp(timestamps[entry_index]).split(" ")
+        row = {
+            'Trade No': i + 1,
+            'Trade Type': "Long" if trades["direction"][i] > 0 else "Short",
+            'Entry Date': entry_date,
+            'Entry Time': entry_time,
+            'Entry Price': prices[entry_index],
+            'Exit Date': None,
+            'Exit Time': None,
+            'Exit Price': None,
+            'Trade Fee': None,
+            'Profit': None,
+            'Total Profit': 0,
+            'Take Profit Percentage': take_profit,
+            'Stop Loss Percentage': stop_loss,
+            'Trailing Trigger Percentage': trailing_trigger,
+            'Trailing Margin Percentage': trailing_margin,
+            'Trade Cost Percentage': TRADE_COST_PERCENT
+        }
+        if exit_index >= 0:
+            exit_date, exit_time = format_timestamp(timestamps[exit_index]).split(" ")
+            row.update({
+                'Exit Date': exit_date,
+                'Exit Time': exit_time,
+                'Exit Price': prices[exit_index],
+                'Trade Fee': trade_fee[i],
+                'Profit': net_profit[i],
+                'Total Profit': total_profit[i],
+            })
+        rows.append(row)
+    return pd.DataFrame(rows, columns=TRADE_COLUMNS)
+
+
+def run_backtest(timestamps, prices, volumes, take_profit=TAKE_PROFIT_PERCENT, stop_loss=STOP_LOSS_PERCENT,
+                 trailing_trigger=TRAILING_TRIGGER_PERCENT, trailing_margin=TRAILING_MARGIN_PERCENT,
+                 **signal_options):
+    """
+    Runs the full strategy over historical ticks.
+
+    `signal_options` are passed to entry_signals (use_* toggles, RSI levels).
+
+    Returns:
+        trade_df with the same columns as the live ledger
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    indicators = compute_indicators(prices, volumes)
+    signals = entry_signals(prices, indicators, **signal_options)
+    trades = simulate_trades(prices, signals, take_profit, stop_loss, trailing_trigger, trailing_margin)
+    return build_trade_df(timestamps, prices, trades, take_profit, stop_loss, trailing_trigger, trailing_margin)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the strategy on recorded ticks.")
+    parser.add_argument("path", help="CSV or .npy file with close/volume (and optional timestamp)")
+    parser.add_argument("--excel", help="Optional path to write the trade ledger to")
+    args = parser.parse_args()
+
+    timestamps, prices, volumes = load_ticks(args.path)
+    trade_df = run_backtest(timestamps, prices, volumes)
+    closed = trade_df["Exit Price"].notna()
+    print(f"Ticks: {len(prices)} | Trades: {closed.sum()} | "
+          f"Net Profit: ${trade_df.loc[closed, 'Profit'].sum():.2f}")
+    if args.excel:
+        trade_df.to_excel(args.excel, index=False)
@@ -0,0 +1,284 @@
+
+
+# functions/benchmark.py
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from constants import (
+    TAKE_PROFIT_PERCENT, STOP_LOSS_PERCENT, TRAILING_TRIGGER_PERCENT, TRAILING_MARGIN_PERCENT,
+    BENCH_SAMPLES, BENCH_ALLOC_SAMPLES, BENCH_BASELINE, BENCH_THRESHOLD,
+)
+from functions.data import set_log_file
+from functions.data_utils import write_state_file
+from functions.engine import TradingEngine
+from functions.indicators import calculate_ema, calculate_macd, calculate_rsi, calculate_vwap
+from functions.logic import check_entry_criteria
+from functions.trade_book import TradeBook, TradeRecord
+from functions.trade_logic import exit_trade, finalize_exit
+
+WINDOW_SIZES = [26, 100, 1000]
+LEDGER_SIZES = [10, 1000, 100000]
+
+
+def synthetic_prices(n, seed=0, start=60000.0, volatility=0.001):
+    """Seeded random-walk prices for the benchmarks."""
+    rng = np.random.default_rng(seed)
+    return (start * np.exp(np.cumsum(rng.normal(0, volatility, n)))).tolist()
+
+# ========== Benchmarks ==========
+# Each factory does its setup and returns the zero-argument call to time.
+
+def bench_ema(window):
+    prices = synthetic_prices(window)
+    return lambda: calculate_ema(prices, 20)
+
+
+def bench_macd(window):
+    prices = synthetic_prices(window)
+    return lambda: calculate_macd(prices)
+
+
+def bench_rsi(window):
+    prices = synthetic_prices(window)
+    return lambda: calculate_rsi(prices, 14)
+
+
+def bench_vwap(window):
+    prices = synthetic_prices(1000)
+    state = {"i": 0}
+
+    def call():
+        i = state["i"] = (state["i"] + 1) % len(prices)
+        return calculate_vwap(prices[i], 1.5, window)
+    return call
+
+
+def bench_entry_criteria():
+    return lambda: check_entry_criteria(60100.0, 60000.0, 1.2, 1.0, 0.7, 60050.0)
+
+
+def bench_exit_trade():
+    # Open long with no exit triggered: the common per-tick path
+    return lambda: exit_trade(
+        60010.0, 60000.0, "LONG", 60020.0, 0,
+        TAKE_PROFIT_PERCENT, STOP_LOSS_PERCENT, TRAILING_TRIGGER_PERCENT, TRAILING_MARGIN_PERCENT,
+    )
+
+
+def bench_finalize_exit(rows):
+    book = TradeBook(max_records=rows)
+    for trade_no in range(1, rows + 1):
+        book.open(TradeRecord(
+            trade_no, "Long", 1735700000 + trade_no, 60000.0, TAKE_PROFIT_PERCENT, STOP_LOSS_PERCENT,
+            TRAILING_TRIGGER_PERCENT, TRAILING_MARGIN_PERCENT, 0.0005,
+        ))
+    return lambda: finalize_exit(book, rows, 60100.0, 1735800000, 60000.0, 10.0)
+
+
+def bench_state_file(folder):
+    path = os.path.join(folder, "state_bench.json")
+    state = {"i": 0}
+
+    def call():
+        state["i"] += 1
+        write_state_file({
+            "bot_status": "RUNNING",
+            "current_price": 60000.0 + state["i"],
+            "position": {"active": True, "trade_no": 7, "type": "LONG", "entry_price": 59950.0},
+            "indicators": {name: {"value": 1.0, "used": True, "signal": "BUY"} for name in ("EMA", "MACD", "RSI", "VWAP")},
+            "logs": ["12:00:00 line"] * 20,
+        }, path)
+    return call
+
+
+def bench_iteration(folder):
+    """One j1.py iteration (fetch + on_tick) with fetch_data replaced by synthetic ticks."""
+    engine = TradingEngine(
+        "BENCH", ledger_path=os.path.join(folder, "bench.db"),
+        state_path=os.path.join(folder, "state_iteration.json"),
+        history_dir=os.path.join(folder, "history"), record=False,
+        snapshots=False,
+    )
+    prices = synthetic_prices(100000, seed=1)
+    state = {"i": 0}
+
+    def fetch_data(symbol):
+        i = state["i"] = state["i"] + 1
+        return {"symbol": symbol, "close": str(prices[i % len(prices)]), "volume": "12.5",
+                "timestamp": (1735700000 + 5 * i) * 1_000_000}
+
+    return lambda: engine.on_tick(fetch_data("BENCH"))
+
+
+def suite(folder):
+    """Benchmark name -> factory, in report order."""
+    benchmarks = {}
+    for window in WINDOW_SIZES:
+        benchmarks[f"calculate_ema[{window}]"] = lambda w=window: bench_ema(w)
+        benchmarks[f"calculate_macd[{window}]"] = lambda w=window: bench_macd(w)
+        benchmarks[f"calculate_rsi[{window}]"] = lambda w=window: bench_rsi(w)
+    for window in [20, 200]:
+        benchmarks[f"calculate_vwap[{window}]"] = lambda w=window: bench_vwap(w)
+    benchmarks["check_entry_criteria"] = bench_entry_criteria
+    benchmarks["exit_trade"] = bench_exit_trade
+    for rows in LEDGER_SIZES:
+        benchmarks[f"finalize_exit[{rows}]"] = lambda r=rows: bench_finalize_exit(r)
+    benchmarks["write_state_file"] = lambda: bench_state_file(folder)
+    benchmarks["j1_iteration"] = lambda: bench_iteration(folder)
+    return benchmarks
+
+# ========== Measurement ==========
+
+def measure(call, samples=BENCH_SAMPLES, alloc_samples=BENCH_ALLOC_SAMPLES):
+    """
+    Times `samples` single calls with perf_counter_ns (GC paused, as timeit
+    does), then runs `alloc_samples` more under tracemalloc.
+
+    Returns:
+        dict with latency percentiles in microseconds, the mean peak
+        memory a call allocates and the bytes retained per call
+    """
+    for _ in range(min(100, samples)):
+        call()
+
+    times = np.empty(samples, dtype=np.int64)
+    clock = time.perf_counter_ns
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(samples):
+            start = clock()
+            call()
+            times[i] = clock() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        peaks = 0
+        for _ in range(alloc_samples):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call()
+            peaks += tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+
+    p50, p90, p99 = np.percentile(times, [50, 90, 99]) / 1000
+    return {
+        "samples": samples,
+        "mean_us": round(float(times.mean()) / 1000, 3),
+        "p50_us": round(float(p50), 3),
+        "p90_us": round(float(p90), 3),
+        "p99_us": round(float(p99), 3),
+        "max_us": round(float(times.max()) / 1000, 3),
+        "alloc_peak_bytes": int(peaks / max(1, alloc_samples)),
+        "alloc_retained_bytes": int(retained / max(1, alloc_samples)),
+    }
+
+
+def run_suite(pattern=None, samples=BENCH_SAMPLES, alloc_samples=BENCH_ALLOC_SAMPLES):
+    """
+    Runs every benchmark whose name contains `pattern`. Logs, state files
+    and ledgers go to a temporary folder, and console output is silenced.
+
+    Returns:
+        {"meta": {...}, "results": {name: stats}}
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        set_log_file(os.path.join(folder, "trade.log"))
+        for name, factory in suite(folder).items():
+            if pattern and pattern not in name:
+                continue
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results[name] = measure(factory(), samples, alloc_samples)
+            print(f"{name:<28} p50 {results[name]['p50_us']:>10.2f}us  p99 {results[name]['p99_us']:>10.2f}us  "
+                  f"alloc {results[name]['alloc_peak_bytes']:>8}B")
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=BENCH_THRESHOLD, metric="p50_us"):
+    """
+    Benchmarks whose `metric` grew by more than `threshold` (0.25 = +25%)
+    against the baseline.
+
+    Returns:
+        list of (name, baseline value, current value, ratio)
+    """
+    regressions = []
+    for name, stats in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old or not old.get(metric):
+            continue
+        ratio = stats[metric] / old[metric]
+        if ratio > 1 + threshold:
+            regressions.append((name, old[metric], stats[metric], ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hot-path benchmarks with JSON baselines.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the suite and optionally save the results")
+    run_parser.add_argument("--filter", help="Only benchmarks whose name contains this")
+    run_parser.add_argument("--samples", type=int, default=BENCH_SAMPLES)
+    run_parser.add_argument("--save", nargs="?", const=BENCH_BASELINE, help=f"Write results as JSON (default {BENCH_BASELINE})")
+
+    compare_parser = sub.add_parser("compare", help="Flag regressions against a baseline")
+    compare_parser.add_argument("baseline", nargs="?", default=BENCH_BASELINE)
+    compare_parser.add_argument("current", nargs="?", help="Results JSON to check (default: run the suite now)")
+    compare_parser.add_argument("--filter")
+    compare_parser.add_argument("--samples", type=int, default=BENCH_SAMPLES)
+    compare_parser.add_argument("--threshold", type=float, default=BENCH_THRESHOLD)
+    compare_parser.add_argument("--metric", default="p50_us", choices=["mean_us", "p50_us", "p90_us", "p99_us"])
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_suite(args.filter, args.samples)
+        if args.save:
+            folder = os.path.dirname(args.save)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(args.save, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Saved to {args.save}")
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if args.current:
+            with open(args.current, encoding="utf-8") as f:
+                current = json.load(f)
+        else:
+            current = run_suite(args.filter, args.samples)
+
+        regressions = compare(baseline, current, args.threshold, args.metric)
+        for name, old, new, ratio in regressions:
+            print(f"REGRESSION {name}: {args.metric} {old:.2f} -> {new:.2f} ({(ratio - 1) * 100:+.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold:.0%} on {args.metric}")
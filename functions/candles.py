@@ -0,0 +1,215 @@
+
+
+# functions/candles.py
+
+from collections import deque
+
+from constants import CANDLE_INTERVALS, CANDLE_MAX_BARS, CANDLE_GRACE, CANDLE_FILL_GAPS
+from functions.indicators import EMA, MACD, RSI, VWAP
+
+
+class Candle:
+    """One OHLCV bar covering [start, start + interval) in epoch seconds."""
+    __slots__ = ("start", "open", "high", "low", "close", "volume", "ticks", "first_ts", "last_ts")
+
+    def __init__(self, start, ts, price, volume):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = volume
+        self.ticks = 1
+        self.first_ts = self.last_ts = ts
+
+    def add(self, ts, price, volume):
+        """Adds a tick; ticks out of time order only move open/close if they are the earliest/latest."""
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        if ts >= self.last_ts:
+            self.close = price
+            self.last_ts = ts
+        elif ts < self.first_ts:
+            self.open = price
+            self.first_ts = ts
+        self.volume += volume
+        self.ticks += 1
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in ("start", "open", "high", "low", "close", "volume", "ticks")}
+
+    @classmethod
+    def flat(cls, start, price):
+        """An empty bar for a gap: OHLC at the previous close, no volume or ticks."""
+        candle = cls(start, start, price, 0.0)
+        candle.ticks = 0
+        return candle
+
+
+class CandleSeries:
+    """
+    Streams ticks into bars of `interval` seconds.
+
+    A bar stays open until a tick at or after its end + `grace` seconds
+    arrives, so ticks that show up slightly out of order still land in the
+    right bar. Ticks for a bar that has already closed are counted in
+    `late_ticks` and dropped (closed bars never change, so nothing computed
+    from them has to be redone). With fill_gaps, intervals without ticks
+    become flat bars at the previous close, so an N-bar indicator always
+    spans N intervals of time. Only the last `max_bars` closed bars are kept.
+    """
+    def __init__(self, interval, max_bars=CANDLE_MAX_BARS, grace=CANDLE_GRACE, fill_gaps=CANDLE_FILL_GAPS):
+        self.interval = interval
+        self.grace = grace
+        self.fill_gaps = fill_gaps
+        self.max_bars = max_bars
+        self.bars = deque(maxlen=max_bars)
+        self.open_bars = {}  # start -> Candle; at most a couple while within the grace period
+        self.latest_ts = None
+        self.late_ticks = 0
+
+    @property
+    def current(self):
+        """The newest open bar, or None."""
+        return self.open_bars[max(self.open_bars)] if self.open_bars else None
+
+    def update(self, ts, price, volume=0.0):
+        """
+        Adds one tick (epoch seconds).
+
+        Returns:
+            list of the bars closed by this tick, oldest first (usually empty)
+        """
+        start = ts - ts % self.interval
+        if self.bars and start <= self.bars[-1].start:
+            self.late_ticks += 1
+            return []
+
+        candle = self.open_bars.get(start)
+        if candle is None:
+            self.open_bars[start] = Candle(start, ts, price, volume)
+        else:
+            candle.add(ts, price, volume)
+
+        if self.latest_ts is None or ts > self.latest_ts:
+            self.latest_ts = ts
+        return self._close_due()
+
+    def _close_due(self):
+        closed = []
+        while self.open_bars:
+            start = min(self.open_bars)
+            if self.latest_ts < start + self.interval + self.grace:
+                break
+            if self.fill_gaps and self.bars:
+                closed += self._fill(start - self.interval)
+            candle = self.open_bars.pop(start)
+            self.bars.append(candle)
+            closed.append(candle)
+
+        if self.fill_gaps and self.bars:
+            # Empty intervals that are past their grace period close right away
+            limit = self.latest_ts - self.grace - self.interval
+            limit -= limit % self.interval
+            if self.open_bars:
+                limit = min(limit, min(self.open_bars) - self.interval)
+            closed += self._fill(limit)
+        return closed
+
+    def _fill(self, until):
+        """Flat bars for the empty intervals after the last bar, up to the one starting at `until`."""
+        first = self.bars[-1].start + self.interval
+        if until < first:
+            return []
+        # A long outage only produces up to max_bars bars
+        first = max(first, until - (self.max_bars - 1) * self.interval)
+        filled = []
+        for i in range(int((until - first) // self.interval) + 1):
+            filler = Candle.flat(first + i * self.interval, self.bars[-1].close)
+            self.bars.append(filler)
+            filled.append(filler)
+        return filled
+
+
+class TimeframeIndicators:
+    """
+    Streaming EMA/MACD/RSI/VWAP fed with bar closes and bar volumes, so
+    each update is O(1) and only happens when a bar closes.
+    """
+    def __init__(self):
+        self.ema = EMA(20)
+        self.macd = MACD()
+        self.rsi = RSI(14)
+        self.vwap = VWAP(20)
+        self.values = {"ema": None, "macd": None, "signal": None, "rsi": None, "vwap": None}
+
+    def update(self, candle):
+        macd, signal = self.macd.update(candle.close)
+        self.values = {
+            "ema": self.ema.update(candle.close),
+            "macd": macd,
+            "signal": signal,
+            "rsi": self.rsi.update(candle.close),
+            "vwap": self.vwap.update(candle.close, candle.volume),
+        }
+        return self.values
+
+
+class CandleAggregator:
+    """
+    Builds bars for several timeframes at once from the same ticks, e.g.
+    {"1s": 1, "1m": 60, "5m": 300, "15m": 900}, each with its own
+    indicators. Per tick this is one bar update per timeframe; indicators
+    only move when a bar of their timeframe closes.
+    """
+    def __init__(self, intervals=CANDLE_INTERVALS, max_bars=CANDLE_MAX_BARS, grace=CANDLE_GRACE,
+                 fill_gaps=CANDLE_FILL_GAPS):
+        self.series = {name: CandleSeries(seconds, max_bars, grace, fill_gaps) for name, seconds in intervals.items()}
+        self.indicators = {name: TimeframeIndicators() for name in intervals}
+
+    def update(self, ts, price, volume=0.0):
+        """
+        Adds one tick to every timeframe.
+
+        Returns:
+            {timeframe: [closed bars]} for the timeframes that closed bars
+        """
+        closed = {}
+        for name, series in self.series.items():
+            bars = series.update(ts, price, volume)
+            if bars:
+                indicators = self.indicators[name]
+                for candle in bars:
+                    indicators.update(candle)
+                closed[name] = bars
+        return closed
+
+    def values(self, timeframe):
+        """Latest indicator values of `timeframe` (None until warmed up)."""
+        return self.indicators[timeframe].values
+
+    def snapshot(self):
+        """Per-timeframe last closed bar and indicator values, for the state file."""
+        snapshot = {}
+        for name, series in self.series.items():
+            last = series.bars[-1] if series.bars else None
+            snapshot[name] = {
+                "bar": last.to_dict() if last else None,
+                "bars": len(series.bars),
+                "late_ticks": series.late_ticks,
+                "indicators": {
+                    key: round(value, 4) if value is not None else None
+                    for key, value in self.indicators[name].values.items()
+                },
+            }
+        return snapshot
+
+
+def confirms(values, price, direction):
+    """
+    Higher-timeframe trend filter: a LONG needs price above that
+    timeframe's EMA, a SHORT below it. Not confirmed until the EMA exists.
+    """
+    ema = values.get("ema")
+    if ema is None:
+        return False
+    return price > ema if direction == "LONG" else price < ema
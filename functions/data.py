@@ -3,42 +3,71 @@
 # functions/data.py
 
 import os
-import requests
+import threading
 from datetime import datetime
 
+from functions.latency import tracker as latency
+from functions.logger import BufferedLogger
+from functions.market_client import BASE_URL, MarketDataClient, MarketDataError
+
 # --- Logging ---
 LOG_FOLDER = "logs"
 LOG_FILE = os.path.join(LOG_FOLDER, "trade.log")
 
 if not os.path.exists(LOG_FOLDER):
     os.makedirs(LOG_FOLDER)
-if not os.path.exists(LOG_FILE):
-    with open(LOG_FILE, "w") as f:
-        f.write("")
 
-def log_and_print(message):
+# One background writer per process; records are JSON lines
+logger = BufferedLogger(LOG_FILE)
+
+def set_logger(new_logger):
+    """Replaces the process-wide logger (the old one is flushed and closed)."""
+    global logger
+    logger.close()
+    logger = new_logger
+
+def set_log_file(path):
+    """Sends log records to `path` from now on (e.g. for a replay run)."""
+    set_logger(BufferedLogger(path))
+
+def log_and_print(message, **fields):
     """Logs message to file and prints it to the console."""
+    start = latency.now()
     print(message)
-    with open(LOG_FILE, "a") as f:
-        f.write(f"{message}\n")
-        f.flush()
+    logger.log("INFO", message, **fields)
+    latency.since("log", start)
 
-def log_debug(message):
+def log_debug(message, **fields):
     """Use this for quieter debug logs, if needed."""
-    with open(LOG_FILE, "a") as f:
-        f.write(f"[DEBUG] {message}\n")
-        f.flush()
+    logger.log("DEBUG", message, **fields)
+
+def recent_logs(limit=None):
+    """Latest printed log lines, for the state snapshot."""
+    return logger.recent(limit)
 
 # --- API Fetching ---
-BASE_URL = "https://cdn.india.deltaex.org/v2/tickers"
+_clients = {}
+_clients_lock = threading.Lock()
 
-def fetch_data(symbol):
+def get_client(base_url=BASE_URL):
+    """Returns the shared, connection-pooled client for `base_url`."""
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = MarketDataClient(base_url)
+        return _clients[base_url]
+
+def fetch_data(symbol, base_url=BASE_URL):
     """Fetch data from the Delta Exchange API for a given symbol."""
     try:
-        response = requests.get(f"{BASE_URL}/{symbol}")
-        if response.status_code == 200:
-            return response.json().get("result", {})
-        return {}
-    except Exception as e:
+        return get_client(base_url).get_ticker(symbol)
+    except MarketDataError as e:
         log_debug(f"Fetch Error: {e}")
         return {}
+
+def fetch_many(symbols, base_url=BASE_URL):
+    """Fetch tickers for several symbols in one request. Returns {symbol: ticker}."""
+    try:
+        return get_client(base_url).get_tickers(symbols)
+    except MarketDataError as e:
+        log_debug(f"Batch Fetch Error: {e}")
+        return {}
@@ -1,8 +1,94 @@
 
 
 import json
+import os
 from datetime import datetime
 
+
+class StatePublisher:
+    """
+    Publishes the bot's state to a JSON file atomically.
+
+    Each snapshot goes to a temp file that is renamed over `path`, so a
+    reader sees either the previous snapshot or the new one, never half of
+    one. Every snapshot carries an increasing "seq". Top-level fields are
+    serialized only when their value changed; unchanged ones reuse the JSON
+    from the last publish, and a snapshot with no changes is not written.
+    """
+    def __init__(self, path="state.json"):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.seq = 0
+        self.fragments = {}  # key -> (value, serialized value)
+
+    def publish(self, state_dict):
+        """Writes `state_dict` if anything changed. Returns True if it was written."""
+        changed = state_dict.keys() != self.fragments.keys()
+        parts = []
+        for key, value in state_dict.items():
+            cached = self.fragments.get(key)
+            if cached is None or cached[0] != value:
+                cached = (value, json.dumps(value, separators=(",", ":"), default=str))
+                self.fragments[key] = cached
+                changed = True
+            parts.append(f"{json.dumps(key)}:{cached[1]}")
+        if not changed:
+            return False
+
+        self.seq += 1
+        body = "{" + f'"seq":{self.seq},' + ",".join(parts) + "}"
+        with open(self.tmp_path, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(self.tmp_path, self.path)
+        return True
+
+
+class StateReader:
+    """
+    Reads snapshots written by StatePublisher.
+
+    read() only stats the file when nothing was published since the last
+    call, so polling it is cheap. A snapshot that fails to parse (e.g. a
+    torn write from an older, non-atomic writer) is counted and skipped,
+    and the last good snapshot is returned instead.
+    """
+    def __init__(self, path="state.json"):
+        self.path = path
+        self.signature = None
+        self.state = {}
+        self.seq = None
+        self.torn_reads = 0
+
+    def read(self):
+        """
+        Returns:
+            (state: dict, changed: bool) - changed is True for a new snapshot
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return self.state, False
+        signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if signature == self.signature:
+            return self.state, False
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except ValueError:
+            self.torn_reads += 1
+            return self.state, False
+
+        self.signature = signature
+        if state.get("seq") is not None and state.get("seq") == self.seq:
+            return self.state, False
+        self.state = state
+        self.seq = state.get("seq")
+        return state, True
+
+
+_publishers = {}
+
 def write_state_file(state_dict, path="state.json"):
     """
     Safely writes the bot's state to a JSON file.
@@ -10,8 +96,8 @@ def write_state_file(state_dict, path="state.json"):
     state_dict["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     try:
-        with open(path, "w") as f:
-            json.dump(state_dict, f, indent=2)
+        if path not in _publishers:
+            _publishers[path] = StatePublisher(path)
+        _publishers[path].publish(state_dict)
     except Exception as e:
         print(f"[ERROR] Could not write to state file: {e}")
-
@@ -0,0 +1,427 @@
+
+
+# functions/engine.py
+
+import os
+import time
+
+from constants import (
+    TAKE_PROFIT_PERCENT, STOP_LOSS_PERCENT, TRAILING_TRIGGER_PERCENT, TRAILING_MARGIN_PERCENT,
+    PAUSE_AFTER_EACH_TRADE, PAUSE_AFTER_ENTRY, PAUSE_AFTER_EXIT, TRADE_SIZE,
+    USE_EMA, USE_MACD, USE_RSI, USE_VWAP, RSI_HIGH_LEVEL, RSI_LOW_LEVEL, LEDGER_PATH,
+    STATE_LOG_LINES, USE_RECORDER, HISTORY_DIR, USE_CANDLES, CONFIRM_TIMEFRAME,
+    RULES_PATH, USE_SCHEDULER, USE_SNAPSHOTS, SNAPSHOT_DIR, SNAPSHOT_INTERVAL,
+)
+from functions.analytics import PerformanceStats
+from functions.candles import confirms
+from functions.data import log_and_print, log_debug, recent_logs
+from functions.data_utils import write_state_file
+from functions.history import HistoryStore, EVENT_NONE, EVENT_ENTER_LONG, EVENT_ENTER_SHORT, EVENT_EXIT
+from functions.indicator_cache import IndicatorCache
+from functions.latency import tracker as latency, process_start_time
+from functions.ledger import TradeLedger
+from functions.params import default_params, RULE_PARAMS
+from functions.recorder import TickRecorder
+from functions.rules import RuleSet, default_rule_set, load_rules
+from functions.scheduler import PollScheduler
+from functions.snapshot import (
+    engine_snapshot, save_snapshot, load_snapshot, apply_snapshot, recorded_ticks, history_ticks, backfill,
+)
+from functions.trade_book import TradeBook
+from functions.trade_logic import enter_trade, exit_trade, finalize_exit
+from functions.utils import get_delay, normalize_indicators, format_timestamp, to_epoch_seconds
+
+
+class TradingEngine:
+    """
+    Position, indicator and ledger state for one symbol.
+
+    Feed it ticker snapshots with on_tick(); it runs the entry/exit logic,
+    records trades in the ledger, writes the state file and returns how
+    long to wait before the next poll. It never sleeps itself, so the same
+    engine can be driven by the blocking j1.py loop or by the asyncio runner.
+
+    With `record` on, every ticker response is also appended to the binary
+    tick recorder. With state_path=None no state file is written.
+
+    With `snapshots` on, the engine saves its state to SNAPSHOT_DIR on
+    every trade event and every SNAPSHOT_INTERVAL seconds, and a new engine
+    with the same name picks up from there (see restore()).
+
+    `params` overrides default_params() (exit levels, indicator toggles,
+    RSI levels). With RULES_PATH set the entry rules come from that file,
+    so params that set indicator toggles or RSI levels are rejected.
+    Engines given the same `indicators` cache share their
+    indicator series; the owner of the cache (see StrategyHost) then
+    updates it once per tick instead of each engine.
+    """
+    def __init__(self, symbol, ledger_path=LEDGER_PATH, state_path="state.json", record=USE_RECORDER,
+                 history_dir=HISTORY_DIR, snapshots=USE_SNAPSHOTS, name=None, params=None, indicators=None):
+        self.symbol = symbol
+        self.name = name or symbol
+        overridden = sorted(set(params or {}) & set(RULE_PARAMS))
+        if RULES_PATH and overridden:
+            raise ValueError(f"{self.name}: {overridden} have no effect when RULES_PATH sets the entry rules")
+        self.params = dict(default_params(), **(params or {}))
+        p = self.params
+        self.take_profit, self.stop_loss = p["take_profit"], p["stop_loss"]
+        self.trailing_trigger, self.trailing_margin = p["trailing_trigger"], p["trailing_margin"]
+        self.use_ema, self.use_macd, self.use_rsi, self.use_vwap = p["use_ema"], p["use_macd"], p["use_rsi"], p["use_vwap"]
+        self.rsi_high, self.rsi_low = p["rsi_high"], p["rsi_low"]
+        self.ledger = TradeLedger(ledger_path, symbol)
+        self.history = HistoryStore(symbol, history_dir)
+        self.recorder = TickRecorder(symbol) if record else None
+        self.state_path = state_path
+
+        self.position = None
+        self.entry_price = None
+        self.entry_time = None
+        self.total_profit = 0
+        self.extreme_price = None  # highest for long, lowest for short
+        self.trade_no = 1
+        self.just_exited = False  # True if the last tick closed a trade
+        self.trade_book = TradeBook()
+        self.last_values = None  # (price, ema, macd, signal, rsi, vwap) of the last tick
+        self.last_tick = None    # raw exchange timestamp of the last tick
+        self.process_started = process_start_time()  # published with the pid for the dashboard's profile button
+
+        # Streaming indicators, updated once per tick (by whoever owns the cache)
+        self.owns_indicators = indicators is None
+        self.indicators = IndicatorCache() if indicators is None else indicators
+        timeframe = p["timeframe"]
+        self.ema_key = self.indicators.subscribe("ema", (p["ema_period"],), timeframe) if self.use_ema else None
+        self.macd_key = self.indicators.subscribe("macd", (), timeframe) if self.use_macd else None
+        self.rsi_key = self.indicators.subscribe("rsi", (p["rsi_period"],), timeframe) if self.use_rsi else None
+        self.vwap_key = self.indicators.subscribe("vwap", (p["vwap_period"],), timeframe) if self.use_vwap else None
+        series = self.indicators.series
+        self.ema_indicator = series.get(self.ema_key)
+        self.macd_indicator = series.get(self.macd_key)
+        self.rsi_indicator = series.get(self.rsi_key)
+        self.vwap_indicator = series.get(self.vwap_key)
+
+        # Entry rules, compiled once
+        self.rules = RuleSet(load_rules(RULES_PATH)) if RULES_PATH else default_rule_set(
+            self.use_ema, self.use_macd, self.use_rsi, self.use_vwap, self.rsi_high, self.rsi_low
+        )
+
+        # Adaptive polling; None keeps the fixed pauses
+        self.scheduler = PollScheduler() if USE_SCHEDULER else None
+
+        # Multi-timeframe bars; their indicators only update on bar close
+        self.candles = self.indicators.aggregator() if USE_CANDLES or CONFIRM_TIMEFRAME else None
+
+        # Carry on numbering and the running totals after the trades already in the ledger
+        self.seed_from_ledger()
+        self.analytics = PerformanceStats.from_ledger(self.ledger.to_dataframe())
+
+        # ---- Warm Start ----
+        self.snapshot_path = os.path.join(SNAPSHOT_DIR, f"{self.name}.json") if snapshots else None
+        self.snapshot_ts = 0
+        self.saved_key = None
+        if self.snapshot_path:
+            self.restore()
+
+    @property
+    def trade_df(self):
+        """DataFrame view of the recent trades, for reporting."""
+        return self.trade_book.to_dataframe()
+
+    def idle_delay(self):
+        """Delay to use when a poll returned no data."""
+        return get_delay(self.position, PAUSE_AFTER_ENTRY, PAUSE_AFTER_EXIT)
+
+    def seed_from_ledger(self):
+        """Continues trade numbering, total profit and closed-trade count from the ledger."""
+        self.trade_no = self.ledger.last_trade_no() + 1
+        self.trade_book.cumulative_profit = self.ledger.last_total_profit()
+        self.trade_book.closed_trades = self.ledger.closed_trade_count()
+
+    def restore(self):
+        """
+        Restores the last snapshot (position, trade numbering, indicator,
+        candle and bar-indicator state) and replays ticks seen since then
+        into the indicators; with no snapshot, warms the indicators up from
+        the last recorded ticks. Recorded ticks are preferred (they have
+        volume for VWAP); the price history is the fallback.
+
+        Returns:
+            number of ticks backfilled
+        """
+        start = time.perf_counter()
+        # A shared cache already warmed up by another engine is left alone
+        warm_indicators = not self.indicators.ticks
+        snapshot = load_snapshot(self.snapshot_path)
+        if snapshot:
+            ledger_trade_no = self.trade_no
+            apply_snapshot(self, snapshot, indicators=warm_indicators)
+            if ledger_trade_no > self.trade_no + (1 if self.position else 0):
+                log_and_print(f"⚠️ Ledger has trades after the snapshot; numbering continues at {ledger_trade_no}",
+                              symbol=self.symbol)
+                self.seed_from_ledger()
+
+        backfilled = 0
+        if warm_indicators:
+            last_raw = snapshot["last_tick"] if snapshot else None
+            ticks = recorded_ticks(self.symbol, last_raw)
+            if ticks is None:
+                ticks = history_ticks(self.history, to_epoch_seconds(last_raw) if last_raw else None)
+            backfilled = backfill(self, ticks) if ticks is not None else 0
+
+        restored = f"{self.position} trade {self.trade_no}" if self.position else "flat"
+        log_and_print(
+            f"♻️ Warm start {self.name}: {'snapshot ' + restored if snapshot else 'no snapshot'} | "
+            f"{backfilled} ticks backfilled | {(time.perf_counter() - start) * 1000:.1f} ms",
+            symbol=self.symbol,
+        )
+        return backfilled
+
+    def save_snapshot(self, timestamp):
+        self.write_snapshot(engine_snapshot(self))
+        self.snapshot_ts = timestamp
+        self.saved_key = (self.position, self.extreme_price, self.trade_no)
+
+    def write_snapshot(self, snapshot):
+        save_snapshot(snapshot, self.snapshot_path)
+
+    def publish_state(self, state):
+        write_state_file(state, self.state_path)
+
+    def exit_levels(self):
+        """(take-profit, stop-loss, trailing stop) of the open position, as exit_trade computes them."""
+        if self.position is None:
+            return ()
+        if self.position == "LONG":
+            return (self.entry_price * (1 + self.take_profit), self.entry_price * (1 - self.stop_loss),
+                    self.extreme_price * (1 - self.trailing_margin))
+        return (self.entry_price * (1 - self.take_profit), self.entry_price * (1 + self.stop_loss),
+                self.extreme_price * (1 + self.trailing_margin))
+
+    def scheduled_delay(self, now):
+        """Delay until the next poll according to the adaptive scheduler."""
+        return self.scheduler.next_sleep(
+            now, self.last_values[0], self.exit_levels(),
+            PAUSE_AFTER_EACH_TRADE if self.just_exited else 0,
+        )
+
+    def on_tick(self, data):
+        """
+        Processes one ticker snapshot.
+
+        Returns:
+            seconds to wait before the next poll
+        """
+        t = tick_start = latency.now()
+        if self.recorder:
+            self.recorder.record(data)
+
+        timestamp = to_epoch_seconds(data["timestamp"])
+        formatted_time = format_timestamp(timestamp)
+
+        # Extract price and volume
+        price = float(data.get("close", 0))
+        volume = float(data.get("volume", 0))
+        log_debug(f"🕒 {formatted_time} | Watching price: ${price:.2f}", symbol=self.symbol)
+
+        # ---- Indicators ----
+        if self.owns_indicators:
+            self.indicators.update(timestamp, price, volume)
+        values = self.indicators.values
+        ema = values[self.ema_key] if self.use_ema else None
+        macd, signal_line = values[self.macd_key] if self.use_macd else (None, None)
+        rsi = values[self.rsi_key] if self.use_rsi else None
+        vwap = values[self.vwap_key] if self.use_vwap else None
+
+        # ---- Normalize all indicator values ----
+        ema, macd, signal_line, rsi, vwap = normalize_indicators(
+            ema=ema, macd=macd, signal=signal_line, rsi=rsi, vwap=vwap
+        ).values()
+        t = latency.since("indicators", t)
+
+        self.just_exited = False
+        event = EVENT_NONE
+        if self.position is None:
+            self._check_entry(price, timestamp, formatted_time, ema, macd, signal_line, rsi, vwap)
+            if self.position:
+                event = EVENT_ENTER_LONG if self.position == "LONG" else EVENT_ENTER_SHORT
+        elif self.position in ["LONG", "SHORT"]:
+            self.just_exited = self._check_exit(price, timestamp, formatted_time)
+            if self.just_exited:
+                event = EVENT_EXIT
+        pause = PAUSE_AFTER_EACH_TRADE if self.just_exited else 0
+        t = latency.since("decision", t)
+        # From the start of the fetch when the loop timed it, else from on_tick
+        latency.since("tick_to_decision", latency.tick_start or tick_start)
+        latency.tick_start = 0
+
+        self.history.append(timestamp, price, ema, vwap, macd, signal_line, rsi, event)
+        t = latency.since("history", t)
+
+        self.last_tick = data["timestamp"]
+        if self.snapshot_path and (
+            (self.position, self.extreme_price, self.trade_no) != self.saved_key
+            or timestamp - self.snapshot_ts >= SNAPSHOT_INTERVAL
+        ):
+            self.save_snapshot(timestamp)
+            t = latency.since("snapshot", t)
+
+        self.last_values = (price, ema, macd, signal_line, rsi, vwap)
+        if self.state_path:
+            self.publish_state(self.build_state(*self.last_values))
+            latency.since("state", t)
+        latency.since("on_tick", tick_start)
+
+        return pause + get_delay(self.position, PAUSE_AFTER_ENTRY, PAUSE_AFTER_EXIT)
+
+    # ---- Entry Logic ----
+    def _check_entry(self, price, timestamp, formatted_time, ema, macd, signal_line, rsi, vwap):
+        signal = self.rules.decide(price, ema, macd, signal_line, rsi, vwap)
+        if signal not in ("BUY", "SELL"):
+            return
+        criteria = self.rules.criteria(signal, price, ema, macd, signal_line, rsi, vwap)
+        direction = "LONG" if signal == "BUY" else "SHORT"
+        if CONFIRM_TIMEFRAME and not confirms(self.candles.values(CONFIRM_TIMEFRAME), price, direction):
+            log_debug(f"{signal} not confirmed on {CONFIRM_TIMEFRAME} | {formatted_time}", symbol=self.symbol)
+            return
+
+        if signal == "BUY":
+            log_and_print(f"📈 BUY SIGNAL | {formatted_time} | {criteria}", symbol=self.symbol, trade=self.trade_no)
+        else:
+            log_and_print(f"📉 SELL SIGNAL | {formatted_time} | {criteria}", symbol=self.symbol, trade=self.trade_no)
+
+        self.position, self.entry_price, self.entry_time, self.extreme_price, record = enter_trade(
+            price, formatted_time, self.trade_no, direction,
+            self.take_profit, self.stop_loss,
+            self.trailing_trigger, self.trailing_margin, timestamp, self.symbol
+        )
+        self.trade_book.open(record)
+        t = latency.now()
+        self.ledger.record_entry(record.to_row())
+        latency.since("ledger", t)
+        self.total_profit = 0
+
+    # ---- Exit Logic ----
+    def _check_exit(self, price, timestamp, formatted_time):
+        """Returns True if the position was closed on this tick."""
+        price_diff = (price - self.entry_price) if self.position == "LONG" else (self.entry_price - price)
+        current_pnl = price_diff * TRADE_SIZE
+        pnl_percent = (price_diff / self.entry_price) * 100
+
+        log_and_print(f"📢 {formatted_time} | Price: ${price:.2f} | P&L: ${current_pnl:.2f} ({pnl_percent:+.2f}%)",
+                      symbol=self.symbol, trade=self.trade_no)
+        log_debug(f"[LIVE P&L] {formatted_time} | {self.position} | Price=${price:.2f} | P&L=${current_pnl:.2f} ({pnl_percent:+.2f}%)",
+                  symbol=self.symbol, trade=self.trade_no)
+
+        self.position, self.total_profit, self.extreme_price, exit_msg = exit_trade(
+            price, self.entry_price, self.position, self.extreme_price, self.total_profit,
+            self.take_profit, self.stop_loss,
+            self.trailing_trigger, self.trailing_margin, self.symbol, self.trade_no
+        )
+        if not exit_msg:
+            return False
+
+        log_and_print(exit_msg, symbol=self.symbol, trade=self.trade_no)
+        log_and_print(f"📊 Total Profit: ${self.total_profit:.2f}", symbol=self.symbol, trade=self.trade_no)
+
+        record = finalize_exit(
+            self.trade_book, self.trade_no, price, timestamp, self.entry_price, self.total_profit
+        )
+        self.analytics.add_record(record)
+        t = latency.now()
+        self.ledger.record_exit(self.trade_no, record.to_row())
+        latency.since("ledger", t)
+
+        self.position = None
+        self.trade_no += 1
+        return True
+
+    # ---- State Snapshot ----
+    def build_state(self, price, ema, macd, signal_line, rsi, vwap):
+        """Builds the state dict the dashboard reads."""
+        position = self.position
+        entry_price = self.entry_price
+        extreme_price = self.extreme_price
+
+        # Compute current P&L if a trade is active
+        current_pnl = (
+            (price - entry_price) * TRADE_SIZE if position == "LONG"
+            else (entry_price - price) * TRADE_SIZE if position == "SHORT"
+            else 0
+        )
+        current_pnl_pct = (
+            ((price - entry_price) / entry_price * 100) if position == "LONG"
+            else ((entry_price - price) / entry_price * 100) if position == "SHORT"
+            else 0
+        )
+
+        return {
+            "bot_status": "RUNNING" if position else "IDLE",
+            "symbol": self.symbol,
+            "strategy": self.name,
+            "current_price": price,
+            "position": {
+                "active": bool(position),
+                "trade_no": self.trade_no,
+                "type": position,
+                "entry_price": entry_price,
+                "stop_loss": entry_price * (1 - self.stop_loss) if position == "LONG"
+                            else entry_price * (1 + self.stop_loss) if position == "SHORT"
+                            else None,
+                "take_profit": entry_price * (1 + self.take_profit) if position == "LONG"
+                            else entry_price * (1 - self.take_profit) if position == "SHORT"
+                            else None,
+                "trailing_stop": extreme_price * (1 - self.trailing_margin) if position == "LONG"
+                                else extreme_price * (1 + self.trailing_margin) if position == "SHORT"
+                                else None,
+                "entry_time": self.entry_time,
+                "duration": "",  # You can later add this
+                "pnl": round(current_pnl, 2),
+                "pnl_percent": round(current_pnl_pct, 2)
+            } if position else {},
+            "indicators": {
+                "EMA": {
+                    "value": round(ema, 2) if isinstance(ema, (int, float)) else None,
+                    "used": self.use_ema,
+                    "signal": (
+                        "BUY" if isinstance(ema, (int, float)) and price > ema
+                        else "SELL" if isinstance(ema, (int, float)) and price < ema
+                        else "HOLD"
+                    )
+                },
+                "MACD": {
+                    "value": round(macd, 4) if isinstance(macd, (int, float)) else None,
+                    "used": self.use_macd,
+                    "signal": (
+                        "BUY" if isinstance(macd, (int, float)) and isinstance(signal_line, (int, float)) and macd > signal_line
+                        else "SELL" if isinstance(macd, (int, float)) and isinstance(signal_line, (int, float)) and macd < signal_line
+                        else "HOLD"
+                    )
+                },
+                "RSI": {
+                    "value": round(rsi, 2) if isinstance(rsi, (int, float)) else None,
+                    "used": self.use_rsi,
+                    "signal": (
+                        "BUY" if isinstance(rsi, (int, float)) and rsi > self.rsi_high
+                        else "SELL" if isinstance(rsi, (int, float)) and rsi < self.rsi_low
+                        else "HOLD"
+                    )
+                },
+                "VWAP": {
+                    "value": round(vwap, 2) if isinstance(vwap, (int, float)) else None,
+                    "used": self.use_vwap,
+                    "signal": (
+                        "BUY" if isinstance(vwap, (int, float)) and price > vwap
+                        else "SELL" if isinstance(vwap, (int, float)) and price < vwap
+                        else "HOLD"
+                    )
+                },
+            },
+
+            "analytics": self.analytics.to_dict(),
+            "timeframes": self.candles.snapshot() if self.candles else {},
+            "scheduler": self.scheduler.stats() if self.scheduler else {},
+            "logs": recent_logs(STATE_LOG_LINES),
+            "latency": (
+                {"pid": os.getpid(), "started": self.process_started, "stages": latency.snapshot()}
+                if latency.enabled else {}
+            ),
+        }
@@ -0,0 +1,254 @@
+
+
+# functions/history.py
+
+import glob
+import os
+
+import numpy as np
+
+from constants import HISTORY_DIR, HISTORY_SEGMENT_SIZE, HISTORY_MAX_SEGMENTS, HISTORY_MAX_POINTS
+
+HISTORY_DTYPE = np.dtype([
+    ("ts", "f8"), ("price", "f8"), ("ema", "f8"), ("vwap", "f8"),
+    ("macd", "f8"), ("signal", "f8"), ("rsi", "f8"), ("event", "i1"),
+])
+
+# Trade markers stored in the "event" field
+EVENT_NONE = 0
+EVENT_ENTER_LONG = 1
+EVENT_ENTER_SHORT = -1
+EVENT_EXIT = 2
+
+
+class HistoryStore:
+    """
+    Per-tick price and indicator history for one symbol.
+
+    The newest rows live in a fixed-size, memory-mapped segment file
+    ("open.dat") whose header holds the row count and a generation number,
+    so the dashboard process can read the live tail without copying the
+    bot's memory. When the open segment fills up it is saved as a
+    read-only .npy segment named after its first and last timestamp and
+    the open segment starts over; only the newest `max_segments` are kept.
+
+    Open with readonly=True from readers (e.g. the dashboard).
+    """
+    def __init__(self, symbol, folder=HISTORY_DIR, segment_size=HISTORY_SEGMENT_SIZE,
+                 max_segments=HISTORY_MAX_SEGMENTS, readonly=False):
+        self.folder = os.path.join(folder, symbol)
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.readonly = readonly
+        self.header = None
+        self.rows = None
+        self.loaded = {}
+        if not readonly:
+            os.makedirs(self.folder, exist_ok=True)
+            self._open()
+
+    # ---- Open Segment ----
+    def _open(self):
+        path = os.path.join(self.folder, "open.dat")
+        header_bytes = 16  # int64 row count, int64 generation
+        size = header_bytes + self.segment_size * HISTORY_DTYPE.itemsize
+        if not os.path.exists(path) or os.path.getsize(path) != size:
+            if self.readonly:
+                return False
+            with open(path, "wb") as f:
+                f.truncate(size)
+        mode = "r" if self.readonly else "r+"
+        self.header = np.memmap(path, dtype=np.int64, mode=mode, shape=(2,))
+        self.rows = np.memmap(path, dtype=HISTORY_DTYPE, mode=mode, offset=header_bytes,
+                              shape=(self.segment_size,))
+        return True
+
+    def append(self, ts, price, ema=None, vwap=None, macd=None, signal=None, rsi=None, event=EVENT_NONE):
+        """Adds one tick. None indicator values are stored as NaN."""
+        count = int(self.header[0])
+        if count == self.segment_size:
+            self._rotate()
+            count = 0
+        nan = np.nan
+        self.rows[count] = (
+            ts, price,
+            nan if ema is None else ema, nan if vwap is None else vwap,
+            nan if macd is None else macd, nan if signal is None else signal,
+            nan if rsi is None else rsi, event,
+        )
+        # Publish the row only once it is fully written
+        self.header[0] = count + 1
+
+    def _rotate(self):
+        """Saves the full open segment as a .npy file and empties it."""
+        first, last = self.rows["ts"][0], self.rows["ts"][-1]
+        path = os.path.join(self.folder, f"{first:.3f}_{last:.3f}.npy")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(self.rows))
+        os.replace(tmp_path, path)
+
+        # Readers compare generations to detect a rotation mid-read
+        self.header[1] += 1
+        self.header[0] = 0
+
+        segments = self._segments()
+        for _, _, old in segments[:max(0, len(segments) - self.max_segments)]:
+            os.remove(old)
+
+    def _tail(self):
+        """Consistent copy of the open segment's rows."""
+        if self.header is None and not self._open():
+            return np.empty(0, dtype=HISTORY_DTYPE)
+        for _ in range(3):
+            generation = int(self.header[1])
+            count = int(self.header[0])
+            rows = np.array(self.rows[:count])
+            if int(self.header[1]) == generation:
+                return rows
+        return np.empty(0, dtype=HISTORY_DTYPE)
+
+    # ---- Queries ----
+    def last_ts(self):
+        """Timestamp of the newest stored tick, or None if there is none."""
+        tail = self._tail()
+        if len(tail):
+            return float(tail["ts"][-1])
+        segments = self._segments()
+        return segments[-1][1] if segments else None
+
+    def _segments(self):
+        """Saved segments as (first_ts, last_ts, path), oldest first."""
+        segments = []
+        for path in glob.glob(os.path.join(self.folder, "*.npy")):
+            first, last = os.path.basename(path)[:-4].split("_")
+            segments.append((float(first), float(last), path))
+        return sorted(segments)
+
+    def _load(self, path):
+        # Saved segments never change, so their memory maps can be reused
+        if path not in self.loaded:
+            self.loaded[path] = np.load(path, mmap_mode="r")
+        return self.loaded[path]
+
+    def _parts(self, start_ts=None, end_ts=None):
+        """Slices of the saved segments and the open segment inside the range."""
+        start_ts = -np.inf if start_ts is None else start_ts
+        end_ts = np.inf if end_ts is None else end_ts
+        segments = self._segments()
+        live = {path for _, _, path in segments}
+        for path in list(self.loaded):
+            if path not in live:
+                del self.loaded[path]
+
+        parts = []
+        for first, last, path in segments:
+            if last >= start_ts and first <= end_ts:
+                parts.append(self._load(path))
+        parts.append(self._tail())
+
+        selected = []
+        for rows in parts:
+            lo = np.searchsorted(rows["ts"], start_ts, side="left")
+            hi = np.searchsorted(rows["ts"], end_ts, side="right")
+            if hi > lo:
+                selected.append(rows[lo:hi])
+        return selected
+
+    def range(self, start_ts=None, end_ts=None):
+        """All stored rows with start_ts <= ts <= end_ts, oldest first."""
+        parts = self._parts(start_ts, end_ts)
+        if not parts:
+            return np.empty(0, dtype=HISTORY_DTYPE)
+        return np.concatenate(parts)
+
+    def query(self, start_ts=None, end_ts=None, max_points=HISTORY_MAX_POINTS, method="minmax"):
+        """
+        Rows in a time range, downsampled for display.
+
+        Points are picked on price with min/max decimation (vectorized) or
+        LTTB, using only the ts and price columns; full rows are gathered
+        for the picked points only.
+
+        Returns:
+            (points, markers) - `points` has at most about `max_points` rows;
+            `markers` has every entry/exit row in the range, never downsampled.
+        """
+        parts = self._parts(start_ts, end_ts)
+        if not parts:
+            empty = np.empty(0, dtype=HISTORY_DTYPE)
+            return empty, empty
+        markers = np.concatenate([rows[rows["event"] != EVENT_NONE] for rows in parts])
+        price = np.concatenate([rows["price"] for rows in parts])
+        if method == "lttb":
+            index = lttb_indices(np.concatenate([rows["ts"] for rows in parts]), price, max_points)
+        else:
+            index = minmax_indices(price, max_points)
+
+        points = np.empty(len(index), dtype=HISTORY_DTYPE)
+        offset = 0
+        for rows in parts:
+            lo, hi = np.searchsorted(index, [offset, offset + len(rows)])
+            points[lo:hi] = rows[index[lo:hi] - offset]
+            offset += len(rows)
+        return points, markers
+
+
+# ========== Downsampling ==========
+
+def lttb_indices(x, y, n):
+    """
+    Largest-Triangle-Three-Buckets: indices of `n` points that keep the
+    visual shape of the series (first and last points always included).
+    """
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+
+    # Mean of every bucket (plus the last point) up front; the loop only
+    # has to score the candidates of one bucket per step
+    bounds = np.append(edges, size)
+    counts = np.diff(bounds)
+    mean_x = np.add.reduceat(x, bounds[:-1]) / counts
+    mean_y = np.add.reduceat(y, bounds[:-1]) / counts
+
+    indices = np.empty(n, dtype=np.int64)
+    indices[0] = 0
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        avg_x, avg_y = mean_x[i + 1], mean_y[i + 1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    indices[-1] = size - 1
+    return indices
+
+
+def minmax_indices(y, n):
+    """
+    Min/max decimation: the lowest and highest point of each of n/2
+    buckets, in time order. Fully vectorized.
+    """
+    size = len(y)
+    buckets = max(1, n // 2)
+    if size <= n:
+        return np.arange(size)
+    y = np.asarray(y, dtype=np.float64)
+    width = -(-size // buckets)
+    padded = np.full(buckets * width, np.nan)
+    padded[:size] = y
+    padded = padded.reshape(buckets, width)
+
+    with np.errstate(invalid="ignore"):
+        filled_low = np.where(np.isnan(padded), np.inf, padded)
+        filled_high = np.where(np.isnan(padded), -np.inf, padded)
+    offsets = np.arange(buckets) * width
+    lows = offsets + filled_low.argmin(axis=1)
+    highs = offsets + filled_high.argmax(axis=1)
+    indices = np.unique(np.concatenate([lows, highs]))
+    return indices[indices < size]
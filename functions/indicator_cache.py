@@ -0,0 +1,85 @@
+
+
+# functions/indicator_cache.py
+
+from functions.candles import CandleAggregator
+from functions.indicators import EMA, MACD, RSI, VWAP
+from functions.params import TICK
+
+
+FACTORIES = {"ema": EMA, "macd": MACD, "rsi": RSI, "vwap": VWAP}
+EMPTY = {"ema": None, "macd": (None, None), "rsi": None, "vwap": None}
+
+
+class IndicatorCache:
+    """
+    Streaming indicators shared by every engine on one feed.
+
+    Engines subscribe() to (indicator, params, timeframe) and read the
+    latest value with value(key). Each distinct key is created once and
+    updated once per tick in update(), however many engines read it.
+    Tick-timeframe indicators update on every price; the others (e.g. "5m")
+    update on each closed bar of that timeframe, using one shared
+    CandleAggregator.
+    """
+    def __init__(self):
+        self.series = {}       # key -> streaming indicator
+        self.values = {}       # key -> latest value
+        self.tick_keys = []
+        self.bar_keys = {}     # timeframe -> keys updated on its bar closes
+        self.subscribers = {}  # key -> number of subscribe() calls
+        self.candles = None
+        self.ticks = 0
+
+    def subscribe(self, name, params=(), timeframe=TICK):
+        """Registers a series (once per distinct key) and returns its key."""
+        key = (name, tuple(params), timeframe)
+        if key not in self.series:
+            if timeframe != TICK and timeframe not in self.aggregator().series:
+                raise KeyError(f"Unknown timeframe: {timeframe}")
+            self.series[key] = FACTORIES[name](*params)
+            self.values[key] = EMPTY[name]
+            if timeframe == TICK:
+                self.tick_keys.append(key)
+            else:
+                self.bar_keys.setdefault(timeframe, []).append(key)
+        self.subscribers[key] = self.subscribers.get(key, 0) + 1
+        return key
+
+    def aggregator(self):
+        """The shared multi-timeframe bar builder (created on first use)."""
+        if self.candles is None:
+            self.candles = CandleAggregator()
+        return self.candles
+
+    def _step(self, keys, price, volume):
+        series, values = self.series, self.values
+        for key in keys:
+            indicator = series[key]
+            values[key] = indicator.update(price, volume) if key[0] == "vwap" else indicator.update(price)
+
+    def update(self, ts, price, volume=0.0):
+        """Advances every subscribed series by one tick."""
+        self.ticks += 1
+        self._step(self.tick_keys, price, volume)
+        if self.candles:
+            for timeframe, bars in self.candles.update(ts, price, volume).items():
+                for bar in bars:
+                    self._step(self.bar_keys.get(timeframe, ()), bar.close, bar.volume)
+
+    def warm(self, price, volume=0.0):
+        """Like update() for the tick-timeframe series only (backfill without timestamps)."""
+        self.ticks += 1
+        self._step(self.tick_keys, price, volume)
+
+    def reload_values(self):
+        """Re-reads every latest value from its series (after their state was restored)."""
+        for key, indicator in self.series.items():
+            self.values[key] = (indicator.macd, indicator.signal) if key[0] == "macd" else indicator.value
+
+    def value(self, key):
+        return self.values[key]
+
+    def stats(self):
+        """Distinct series computed per tick vs. subscriptions reading them."""
+        return {"series": len(self.series), "subscriptions": sum(self.subscribers.values()), "ticks": self.ticks}
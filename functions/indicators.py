@@ -2,6 +2,8 @@
 
 # functions/indicators.py
 
+from collections import deque
+
 import pandas as pd
 import numpy as np
 
@@ -59,3 +61,247 @@ def calculate_vwap(price, volume, N=20):
         vwap_prices.pop(0)
         vwap_volumes.pop(0)
     return sum(vwap_prices) / sum(vwap_volumes) if sum(vwap_volumes) > 0 else None
+
+
+# ========== Streaming Indicators ==========
+# Stateful versions of the functions above. Create one of each per
+# symbol/timeframe and call update() once per tick; every update is O(1)
+# in time and memory regardless of how much history has been seen.
+
+class EMA:
+    """
+    Incremental EMA, seeded with the SMA of the first N prices exactly like
+    calculate_ema.
+    """
+    def __init__(self, N=20):
+        self.N = N
+        self.K = 2 / (N + 1)
+        self.count = 0
+        self.seed_sum = 0
+        self.value = None
+
+    def update(self, price):
+        self.count += 1
+        if self.value is None:
+            self.seed_sum += price
+            if self.count == self.N:
+                self.value = self.seed_sum / self.N
+            return self.value
+        self.value = (price * self.K) + (self.value * (1 - self.K))
+        return self.value
+
+
+class MACD:
+    """
+    Incremental MACD (EMA 12 - EMA 26) with an EMA 9 signal line.
+    Returns (macd, signal); both are None until enough ticks have been seen.
+    """
+    def __init__(self, short=12, long=26, signal=9):
+        self.short_ema = EMA(short)
+        self.long_ema = EMA(long)
+        self.signal_ema = EMA(signal)
+        self.macd = None
+        self.signal = None
+
+    def update(self, price):
+        short_ema = self.short_ema.update(price)
+        long_ema = self.long_ema.update(price)
+        if short_ema is None or long_ema is None:
+            return None, None
+        self.macd = short_ema - long_ema
+        self.signal = self.signal_ema.update(self.macd)
+        return self.macd, self.signal
+
+
+class RSI:
+    """
+    Incremental RSI with Wilder smoothing.
+
+    The warm-up matches calculate_rsi: a value is produced once `period`
+    prices have been seen, and the first averages are plain means of the
+    price changes. After that the averages are smoothed as
+    avg = (avg * (period - 1) + change) / period. Returns None while the
+    value is undefined (no gains and no losses).
+    """
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_price = None
+        self.changes = 0
+        self.avg_gain = 0
+        self.avg_loss = 0
+        self.value = None
+
+    def update(self, price):
+        if self.prev_price is None:
+            self.prev_price = price
+            return None
+        change = price - self.prev_price
+        self.prev_price = price
+        gain = change if change > 0 else 0
+        loss = -change if change < 0 else 0
+        self.changes += 1
+
+        if self.changes < self.period:
+            # Still seeding: accumulate sums, averages are taken over `period`
+            self.avg_gain += gain
+            self.avg_loss += loss
+            if self.changes < self.period - 1:
+                return None
+            avg_gain = self.avg_gain / self.period
+            avg_loss = self.avg_loss / self.period
+        elif self.changes == self.period:
+            self.avg_gain = (self.avg_gain + gain) / self.period
+            self.avg_loss = (self.avg_loss + loss) / self.period
+            avg_gain, avg_loss = self.avg_gain, self.avg_loss
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            avg_gain, avg_loss = self.avg_gain, self.avg_loss
+
+        if avg_loss == 0:
+            self.value = 100.0 if avg_gain > 0 else None
+        else:
+            self.value = 100 - (100 / (1 + avg_gain / avg_loss))
+        return self.value
+
+
+class VWAP:
+    """
+    Rolling VWAP over the last N ticks with positive volume, like
+    calculate_vwap but without module-level lists or per-tick sum().
+    """
+    def __init__(self, N=20):
+        self.N = N
+        self.pv = deque(maxlen=N)
+        self.volumes = deque(maxlen=N)
+        self.pv_sum = 0
+        self.volume_sum = 0
+        self.updates = 0
+        self.value = None
+
+    def update(self, price, volume):
+        if volume > 0:
+            if len(self.pv) == self.N:
+                self.pv_sum -= self.pv[0]
+                self.volume_sum -= self.volumes[0]
+            self.pv.append(price * volume)
+            self.volumes.append(volume)
+            self.pv_sum += price * volume
+            self.volume_sum += volume
+
+            # Re-sum every N updates so floating point drift can't build up
+            self.updates += 1
+            if self.updates % self.N == 0:
+                self.pv_sum = sum(self.pv)
+                self.volume_sum = sum(self.volumes)
+
+        self.value = self.pv_sum / self.volume_sum if self.volume_sum > 0 else None
+        return self.value
+
+
+# ========== Vectorized Indicators ==========
+# Whole-array versions of the streaming indicators, for backtests and
+# research. Each returns a float array aligned with `prices` holding NaN
+# where the streaming indicator would return None.
+
+def _ema_filter(x, alpha, seed):
+    """
+    Solves y[t] = alpha * x[t] + (1 - alpha) * y[t - 1] with y[-1] = seed
+    using cumulative sums. Works block by block so the decay powers stay
+    inside float64 range.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty_like(x)
+    decay = 1 - alpha
+    if decay <= 0:
+        out[:] = x
+        return out
+    block = min(len(x), max(1, int(600 / -np.log(decay))))
+    powers = decay ** np.arange(1, block + 1)
+    inverse = alpha / powers
+    y = seed
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        k = len(chunk)
+        out[start:start + k] = powers[:k] * (y + np.cumsum(chunk * inverse[:k]))
+        y = out[start + k - 1]
+    return out
+
+
+def ema_series(prices, N=20):
+    """EMA seeded with the SMA of the first N prices (see EMA)."""
+    prices = np.asarray(prices, dtype=np.float64)
+    out = np.full(len(prices), np.nan)
+    if len(prices) < N:
+        return out
+    seed = prices[:N].mean()
+    out[N - 1] = seed
+    out[N:] = _ema_filter(prices[N:], 2 / (N + 1), seed)
+    return out
+
+
+def macd_series(prices, short=12, long=26, signal=9):
+    """MACD line and EMA signal line (see MACD). Returns (macd, signal)."""
+    macd = ema_series(prices, short) - ema_series(prices, long)
+    signal_line = np.full(len(macd), np.nan)
+    if len(macd) >= long:
+        signal_line[long - 1:] = ema_series(macd[long - 1:], signal)
+    return macd, signal_line
+
+
+def rsi_series(prices, period=14):
+    """Wilder RSI with the same warm-up as RSI."""
+    prices = np.asarray(prices, dtype=np.float64)
+    out = np.full(len(prices), np.nan)
+    if len(prices) < period:
+        return out
+    change = np.diff(prices)
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+
+    avg_gain = np.empty(len(change) - period + 2)
+    avg_loss = np.empty_like(avg_gain)
+    avg_gain[0] = gain[:period - 1].sum() / period
+    avg_loss[0] = loss[:period - 1].sum() / period
+    if len(change) >= period:
+        seed_gain = gain[:period].sum() / period
+        seed_loss = loss[:period].sum() / period
+        avg_gain[1] = seed_gain
+        avg_loss[1] = seed_loss
+        avg_gain[2:] = _ema_filter(gain[period:], 1 / period, seed_gain)
+        avg_loss[2:] = _ema_filter(loss[period:], 1 / period, seed_loss)
+    else:
+        avg_gain, avg_loss = avg_gain[:1], avg_loss[:1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    rsi[(avg_loss == 0) & (avg_gain > 0)] = 100.0
+    out[period - 1:] = rsi
+    return out
+
+
+def vwap_series(prices, volumes, N=20):
+    """Rolling VWAP over the last N ticks with positive volume (see VWAP)."""
+    prices = np.asarray(prices, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    out = np.full(len(prices), np.nan)
+    traded = volumes > 0
+    if not traded.any():
+        return out
+    pv = prices[traded] * volumes[traded]
+    vol = volumes[traded]
+
+    # Rolling sums over the traded ticks; the first N - 1 are partial windows
+    pv_sum = np.cumsum(pv[:N - 1])
+    vol_sum = np.cumsum(vol[:N - 1])
+    if len(pv) >= N:
+        window = np.ones(N)
+        pv_sum = np.concatenate([pv_sum, np.convolve(pv, window, "valid")])
+        vol_sum = np.concatenate([vol_sum, np.convolve(vol, window, "valid")])
+    vwap = pv_sum / vol_sum
+
+    # Every tick carries the VWAP of the latest traded tick at or before it
+    seen = np.cumsum(traded)
+    has_vwap = seen > 0
+    out[has_vwap] = vwap[seen[has_vwap] - 1]
+    return out
@@ -0,0 +1,268 @@
+
+
+# functions/latency.py
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from constants import (
+    LATENCY_ENABLED, LATENCY_WINDOW, LATENCY_PUBLISH_INTERVAL,
+    PROFILE_INTERVAL, PROFILE_DURATION, PROFILE_DIR,
+)
+
+SUB_BUCKET_BITS = 5  # 32 sub-buckets per power of two: values within ~3%
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def bucket_index(value):
+    """Log-linear bucket of a non-negative integer (HDR histogram layout)."""
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return ((shift + 1) << SUB_BUCKET_BITS) + (value >> shift) - SUB_BUCKETS
+
+
+def bucket_upper(index):
+    """Largest value that falls in bucket `index`."""
+    if index < SUB_BUCKETS:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = (index & (SUB_BUCKETS - 1)) + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram of nanosecond durations.
+
+    record() is one bucket increment, so memory does not grow with the
+    number of samples; percentiles are accurate to one bucket (~3%).
+    """
+    def __init__(self):
+        self.counts = [0] * (64 * SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentiles(self, quantiles):
+        """Values (upper bucket bounds, capped at max) at each quantile in 0..1."""
+        if not self.count:
+            return [0] * len(quantiles)
+        cumulative = np.cumsum(self.counts)
+        ranks = np.ceil(np.asarray(quantiles) * self.count).clip(1, None)
+        indices = np.searchsorted(cumulative, ranks)
+        return [min(bucket_upper(int(i)), self.max) for i in indices]
+
+
+class LatencyTracker:
+    """
+    Per-stage latency histograms over a rolling window.
+
+    Stages are timed with now()/since():
+
+        t = tracker.now()
+        ...                       # stage work
+        t = tracker.since("indicators", t)
+
+    since() records the time from `t` and returns the current time, so
+    consecutive stages chain. When disabled, now() returns 0 and since()
+    returns straight away without reading the clock.
+
+    Each stage keeps a current and a previous histogram, swapped every
+    `window` seconds, so the published percentiles cover the last one to
+    two windows.
+    """
+    def __init__(self, enabled=LATENCY_ENABLED, window=LATENCY_WINDOW, publish_interval=LATENCY_PUBLISH_INTERVAL):
+        self.enabled = enabled
+        self.window = window
+        self.publish_interval = publish_interval
+        self.current = {}
+        self.previous = {}
+        self.window_start = time.monotonic()
+        self.tick_start = 0  # set by the loop when it starts fetching a tick
+        self.cached = {}
+        self.cached_at = 0.0
+
+    def now(self):
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def since(self, stage, start):
+        """Records the time from `start` under `stage`; returns the current time."""
+        if not start:
+            return 0
+        now = time.perf_counter_ns()
+        histogram = self.current.get(stage)
+        if histogram is None:
+            histogram = self.current[stage] = LatencyHistogram()
+        histogram.record(now - start)
+        return now
+
+    def reset(self):
+        """Forgets every recorded time (e.g. between load-test runs)."""
+        self.current = {}
+        self.previous = {}
+        self.window_start = time.monotonic()
+        self.cached = {}
+        self.cached_at = 0.0
+
+    def _rotate(self):
+        if time.monotonic() - self.window_start >= self.window:
+            self.previous = self.current
+            self.current = {}
+            self.window_start = time.monotonic()
+
+    def snapshot(self, force=False):
+        """
+        {stage: {"count", "p50_ms", "p99_ms", "max_ms"}} over the rolling
+        window. Recomputed at most every `publish_interval` seconds unless
+        `force` is set.
+        """
+        if not self.enabled:
+            return {}
+        if not force and time.monotonic() - self.cached_at < self.publish_interval:
+            return self.cached
+        self._rotate()
+        snapshot = {}
+        for stage in list(self.previous) + [s for s in self.current if s not in self.previous]:
+            histogram = LatencyHistogram()
+            for window in (self.previous, self.current):
+                if stage in window:
+                    histogram.merge(window[stage])
+            p50, p99 = histogram.percentiles([0.5, 0.99])
+            snapshot[stage] = {
+                "count": histogram.count,
+                "p50_ms": round(p50 / 1e6, 3),
+                "p99_ms": round(p99 / 1e6, 3),
+                "max_ms": round(histogram.max / 1e6, 3),
+            }
+        self.cached = snapshot
+        self.cached_at = time.monotonic()
+        return snapshot
+
+
+# One tracker per process, shared by the loop, the engine and the logger
+tracker = LatencyTracker()
+
+# ========== Sampling Profiler ==========
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread every `interval` seconds for
+    `duration` seconds from a background thread, then writes the counts in
+    collapsed-stack format ("outer;...;inner count" per line), which
+    flamegraph.pl and speedscope read.
+    """
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL, duration=PROFILE_DURATION, folder=PROFILE_DIR):
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.interval = interval
+        self.duration = duration
+        self.folder = folder
+        self.stacks = Counter()
+        self.samples = 0
+        self.thread = None
+        self.path = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def _run(self):
+        end = time.monotonic() + self.duration
+        while time.monotonic() < end:
+            self._sample()
+            time.sleep(self.interval)
+        self.dump()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self.thread.start()
+        return self
+
+    def dump(self):
+        """Writes the collected stacks and returns the file path."""
+        os.makedirs(self.folder, exist_ok=True)
+        self.path = os.path.join(self.folder, f"profile_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return self.path
+
+
+_profiler = None
+
+def start_profile(duration=PROFILE_DURATION):
+    """Starts a profile of the main thread unless one is already running."""
+    global _profiler
+    if _profiler is not None and _profiler.thread.is_alive():
+        return _profiler
+    _profiler = SamplingProfiler(duration=duration).start()
+    return _profiler
+
+
+def install_profile_signal():
+    """
+    Starts a profile whenever the process gets SIGUSR1 (POSIX only; must be
+    called from the main thread). Returns False where unsupported.
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+    signal.signal(signal.SIGUSR1, lambda signum, frame: start_profile())
+    return True
+
+
+def process_start_time(pid="self"):
+    """Start time of a process in clock ticks since boot, from /proc (None where unavailable)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return int(f.read().rsplit(")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def request_profile(pid, started=None):
+    """
+    Asks the bot process `pid` to write a profile (see install_profile_signal).
+
+    SIGUSR1 terminates processes that don't handle it, so with `started`
+    (the bot's process_start_time, published next to its pid) the pid is
+    first checked to still be the bot and not a reused one.
+    """
+    if started is not None and process_start_time(pid) != started:
+        raise ProcessLookupError(f"Process {pid} is no longer the bot")
+    os.kill(pid, signal.SIGUSR1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ask a running bot for a sampling profile.")
+    parser.add_argument("pid", type=int, help="Process id of the bot (published as latency.pid in the state file)")
+    args = parser.parse_args()
+    request_profile(args.pid)
+    print(f"Profile requested; it will be written to {PROFILE_DIR} in about {PROFILE_DURATION}s")
@@ -0,0 +1,130 @@
+
+
+# functions/ledger.py
+
+import argparse
+import os
+import sqlite3
+
+import pandas as pd
+
+from constants import LEDGER_PATH, EXCEL_PATH
+from functions.trade_book import TRADE_COLUMNS
+
+EXIT_COLUMNS = ["Exit Date", "Exit Time", "Exit Price", "Trade Fee", "Profit", "Total Profit"]
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+class TradeLedger:
+    """
+    Append-only trade ledger in SQLite (WAL mode).
+
+    An entry is one INSERT and an exit is one UPDATE keyed by
+    (symbol, Trade No), so recording a trade costs the same with ten rows
+    or a million, and a crash can never leave a half-written file behind.
+    Recorded trades are never replaced: entering a trade number that is
+    already in the ledger raises sqlite3.IntegrityError.
+    Use to_dataframe() or export_excel() to get the trade_df view.
+    """
+    def __init__(self, path=LEDGER_PATH, symbol=""):
+        self.path = path
+        self.symbol = symbol
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{_quote(c)}" for c in TRADE_COLUMNS)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS trades (symbol TEXT NOT NULL, {columns}, "
+            f'PRIMARY KEY (symbol, "Trade No"))'
+        )
+        self.conn.commit()
+
+        self._insert_sql = (
+            f"INSERT INTO trades (symbol, {columns}) "
+            f"VALUES (?, {', '.join('?' for _ in TRADE_COLUMNS)})"
+        )
+        self._exit_sql = (
+            f"UPDATE trades SET {', '.join(f'{_quote(c)} = ?' for c in EXIT_COLUMNS)} "
+            f'WHERE symbol = ? AND "Trade No" = ?'
+        )
+
+    def record_entry(self, row):
+        """Inserts a new trade from a dict keyed by TRADE_COLUMNS."""
+        values = [_to_sql(row.get(column)) for column in TRADE_COLUMNS]
+        with self.conn:
+            self.conn.execute(self._insert_sql, [self.symbol] + values)
+
+    def record_exit(self, trade_no, row):
+        """Fills in the exit columns of trade `trade_no` from a dict."""
+        values = [_to_sql(row.get(column)) for column in EXIT_COLUMNS]
+        with self.conn:
+            self.conn.execute(self._exit_sql, values + [self.symbol, int(trade_no)])
+
+    def last_trade_no(self):
+        """Highest trade number recorded for this symbol (0 if none)."""
+        row = self.conn.execute(
+            'SELECT MAX("Trade No") FROM trades WHERE symbol = ?', (self.symbol,)
+        ).fetchone()
+        return row[0] or 0
+
+    def last_total_profit(self):
+        """Running "Total Profit" of the latest closed trade for this symbol (0 if none)."""
+        row = self.conn.execute(
+            'SELECT "Total Profit" FROM trades WHERE symbol = ? AND "Exit Price" IS NOT NULL '
+            'ORDER BY "Trade No" DESC LIMIT 1', (self.symbol,)
+        ).fetchone()
+        return (row[0] or 0) if row else 0
+
+    def closed_trade_count(self):
+        """Number of closed trades recorded for this symbol."""
+        row = self.conn.execute(
+            'SELECT COUNT(*) FROM trades WHERE symbol = ? AND "Exit Price" IS NOT NULL', (self.symbol,)
+        ).fetchone()
+        return row[0]
+
+    def to_dataframe(self, all_symbols=False):
+        """The ledger as a DataFrame with the trade_df columns."""
+        columns = ", ".join(_quote(c) for c in TRADE_COLUMNS)
+        if all_symbols:
+            query, params = f'SELECT symbol, {columns} FROM trades ORDER BY symbol, "Trade No"', ()
+        else:
+            query, params = f'SELECT {columns} FROM trades WHERE symbol = ? ORDER BY "Trade No"', (self.symbol,)
+        return pd.read_sql_query(query, self.conn, params=params)
+
+    def export_excel(self, path=EXCEL_PATH, all_symbols=False):
+        """Writes the ledger to Excel on demand, off the trading hot path."""
+        self.to_dataframe(all_symbols).to_excel(path, index=False)
+        return path
+
+    def close(self):
+        self.conn.close()
+
+
+def _to_sql(value):
+    """Turns NumPy scalars and NaN into values sqlite3 can store."""
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the trade ledger to Excel.")
+    parser.add_argument("--ledger", default=LEDGER_PATH)
+    parser.add_argument("--symbol", help="Only this symbol (default: every symbol)")
+    parser.add_argument("--excel", default=EXCEL_PATH)
+    args = parser.parse_args()
+
+    ledger = TradeLedger(args.ledger, args.symbol or "")
+    path = ledger.export_excel(args.excel, all_symbols=not args.symbol)
+    print(f"Exported ledger to {path}")
@@ -0,0 +1,297 @@
+
+
+# functions/loadtest.py
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import time
+import warnings
+from contextlib import contextmanager, redirect_stdout
+
+import numpy as np
+
+from constants import SYMBOL, LOADTEST_DIR, LOADTEST_SAMPLE_INTERVAL
+from functions.data import set_log_file
+from functions.data_utils import StateReader
+from functions.engine import TradingEngine
+from functions.latency import tracker as latency
+from functions.sources import LiveSource, SystemClock, run_loop
+from functions.stub_server import StubTickerServer
+
+SATURATION = 0.95  # achieved / offered rate below which a step counts as saturated
+
+
+# ========== Process Usage ==========
+
+def process_usage(pid="self"):
+    """(RSS in MB, open file descriptors) of a process; None for what /proc can't tell here."""
+    rss = fds = None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) / 1024
+                    break
+        fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        pass
+    return rss, fds
+
+
+class UsageSampler:
+    """Ticks processed, total RSS and open fds of some processes, sampled every `interval` seconds."""
+    def __init__(self, pids=("self",), interval=LOADTEST_SAMPLE_INTERVAL):
+        self.pids = pids
+        self.interval = interval
+        self.samples = []  # (elapsed seconds, ticks, rss MB, fds)
+        self.start = time.perf_counter()
+        self.next_at = self.start
+        self.sample(0)
+
+    def sample(self, ticks):
+        usages = [process_usage(pid) for pid in self.pids]
+        rss = sum(u[0] for u in usages) if all(u[0] is not None for u in usages) else None
+        fds = sum(u[1] for u in usages) if all(u[1] is not None for u in usages) else None
+        self.samples.append((time.perf_counter() - self.start, ticks, rss, fds))
+        self.next_at = time.perf_counter() + self.interval
+
+    def maybe_sample(self, ticks):
+        if time.perf_counter() >= self.next_at:
+            self.sample(ticks)
+
+    def report(self):
+        """Throughput per sample window (the first is warm-up), memory growth and fd usage."""
+        elapsed, ticks, rss, fds = (np.array(column, dtype=float) for column in zip(*self.samples))
+        rates = np.diff(ticks) / np.maximum(np.diff(elapsed), 1e-9)
+        steady = rates[1:] if len(rates) > 1 else rates
+        report = {
+            "ticks": int(ticks[-1]),
+            "elapsed": round(float(elapsed[-1]), 2),
+            "ticks_per_sec": round(float(ticks[-1] / elapsed[-1]), 1) if elapsed[-1] else 0.0,
+            "sustained_min": round(float(steady.min()), 1) if len(steady) else None,
+            "sustained_median": round(float(np.median(steady)), 1) if len(steady) else None,
+        }
+        if not np.isnan(rss).any():
+            # Slope after warm-up: steady growth, not the first allocations
+            fit = slice(1, None) if len(rss) > 3 else slice(None)
+            slope = np.polyfit(ticks[fit], rss[fit], 1)[0] if len(rss[fit]) > 2 and np.ptp(ticks[fit]) else 0.0
+            report["memory_mb"] = {
+                "start": round(float(rss[0]), 1), "end": round(float(rss[-1]), 1), "max": round(float(rss.max()), 1),
+                "growth": round(float(rss[-1] - rss[0]), 1),
+                "growth_per_10k_ticks": round(float(slope * 10_000), 3),
+            }
+        if not np.isnan(fds).any():
+            report["fds"] = {"start": int(fds[0]), "end": int(fds[-1]), "max": int(fds.max())}
+        return report
+
+
+def _stage_latency(stages):
+    return {stage: {"p50_ms": s["p50_ms"], "p99_ms": s["p99_ms"], "max_ms": s["max_ms"]} for stage, s in stages.items()}
+
+# ========== Stub Server Process ==========
+
+def _serve(urls, options):
+    stub = StubTickerServer(**options)
+    urls.put(stub.base_url)
+    stub.httpd.serve_forever()
+
+
+class StubProcess:
+    """
+    The synthetic stub server in its own process, so serving requests does
+    not compete with the bot for the GIL. Use as a context manager.
+    """
+    def __init__(self, rate=None, seed=0, latency=0.0):
+        self.options = {"synthetic": True, "rate": rate, "seed": seed, "latency": latency}
+        self.process = None
+        self.base_url = None
+
+    def __enter__(self):
+        urls = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_serve, args=(urls, self.options), daemon=True)
+        self.process.start()
+        self.base_url = urls.get(timeout=30)
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
+
+# ========== Loop Mode ==========
+
+class PacedClock(SystemClock):
+    """
+    Wall clock that ignores the engine's pauses and polls at a fixed
+    `rate` instead (back to back when rate is None). Counts polls that
+    started late because the previous tick took too long.
+    """
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_poll = None
+        self.late = 0
+
+    def sleep(self, seconds):
+        if not self.interval:
+            return
+        now = time.time()
+        self.next_poll = (self.next_poll or now) + self.interval
+        if self.next_poll > now:
+            time.sleep(self.next_poll - now)
+        else:
+            self.late += 1
+
+
+class TimedSource:
+    """Wraps a source: ends after `duration` seconds and samples usage as ticks come in."""
+    def __init__(self, source, duration, sampler):
+        self.source = source
+        self.deadline = time.perf_counter() + duration
+        self.sampler = sampler
+        self.ticks = 0
+
+    def next_tick(self):
+        if time.perf_counter() >= self.deadline:
+            return None
+        self.sampler.maybe_sample(self.ticks)
+        self.ticks += 1
+        return self.source.next_tick()
+
+
+@contextmanager
+def _console(quiet):
+    """Silences the bot's console output while `quiet` (the log file still gets everything)."""
+    if not quiet:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        yield
+
+
+def _run_dir(folder, name):
+    path = os.path.join(folder, name)
+    shutil.rmtree(path, ignore_errors=True)  # the harness's own output from a previous run
+    os.makedirs(path)
+    return path
+
+
+def run_loop_load(base_url, duration, rate=None, symbol=SYMBOL, folder=LOADTEST_DIR, quiet=True):
+    """
+    Drives the j1.py loop (TradingEngine with ledger, history, log and
+    state file) against `base_url` for `duration` seconds, polling at
+    `rate` per second or as fast as it can. Returns the report dict.
+    """
+    run_dir = _run_dir(folder, f"loop_{rate or 'max'}")
+    set_log_file(os.path.join(run_dir, "trade.log"))
+    engine = TradingEngine(
+        symbol, ledger_path=os.path.join(run_dir, "trades.db"), state_path=os.path.join(run_dir, "state.json"),
+        record=False, history_dir=os.path.join(run_dir, "history"), snapshots=False,
+    )
+    engine.scheduler = None  # the load test sets the pace
+    latency.reset()
+    clock = PacedClock(rate)
+    sampler = UsageSampler()
+    source = TimedSource(LiveSource(symbol, base_url), duration, sampler)
+    with _console(quiet):
+        ticks = run_loop(engine, source, clock)
+    sampler.sample(ticks)
+
+    report = sampler.report()
+    report.update({
+        "mode": "loop",
+        "offered_rate": rate,
+        "late_polls": clock.late,
+        "trades": engine.trade_book.closed_trades,
+        "latency": _stage_latency(latency.snapshot(force=True)),
+    })
+    engine.ledger.close()
+    return report
+
+# ========== Pipeline Mode ==========
+
+def run_pipeline_load(base_url, duration, symbol=SYMBOL, folder=LOADTEST_DIR, quiet=True):
+    """
+    Drives the multi-process Pipeline (ingest -> strategy -> persistence)
+    as fast as it goes for `duration` seconds. Throughput and latency come
+    from the state file it publishes; RSS and fds are summed over its
+    processes.
+    """
+    from functions.pipeline import Pipeline
+
+    run_dir = _run_dir(folder, "pipeline")
+    state_path = os.path.join(run_dir, "state.json")
+    with _console(quiet):
+        pipeline = Pipeline(
+            symbol, base_url, state_path=state_path, ledger_path=os.path.join(run_dir, "trades.db"),
+            history_dir=os.path.join(run_dir, "history"), log_path=os.path.join(run_dir, "trade.log"),
+            snapshots=False, record=False, time_scale=0,
+        ).start()
+        reader = StateReader(state_path)
+        sampler = UsageSampler([p.pid for p in pipeline.processes])
+        deadline = time.perf_counter() + duration
+        processed = 0
+        while time.perf_counter() < deadline:
+            time.sleep(sampler.interval)
+            state, _ = reader.read()
+            processed = state.get("pipeline", {}).get("strategy", {}).get("processed", 0)
+            sampler.sample(processed)
+        pipeline.stop()
+
+    state, _ = reader.read()
+    report = sampler.report()
+    report.update({
+        "mode": "pipeline",
+        "offered_rate": None,
+        "trades": state.get("analytics", {}).get("trades", 0),
+        "latency": _stage_latency(state.get("latency", {}).get("stages", {})),
+        "stages": state.get("pipeline", {}),
+    })
+    return report
+
+# ========== Reporting ==========
+
+def print_report(report):
+    offered = report["offered_rate"]
+    print(f"\n=== {report['mode']} | offered {offered or 'max'} ticks/s | {report['elapsed']}s ===")
+    print(f"ticks {report['ticks']} | {report['ticks_per_sec']} ticks/s | sustained min {report['sustained_min']} "
+          f"median {report['sustained_median']} | trades {report['trades']}")
+    if offered:
+        saturated = report["ticks_per_sec"] < SATURATION * offered
+        print(f"late polls {report['late_polls']} | {'SATURATED' if saturated else 'keeping up'}")
+    memory, fds = report.get("memory_mb"), report.get("fds")
+    if memory:
+        print(f"RSS {memory['start']} -> {memory['end']} MB (max {memory['max']}) | "
+              f"{memory['growth_per_10k_ticks']:+} MB per 10k ticks")
+    if fds:
+        print(f"fds {fds['start']} -> {fds['end']} (max {fds['max']})")
+    for name, stage in report.get("stages", {}).items():
+        if isinstance(stage, dict) and "lag_ms" in stage:
+            print(f"{name}: queue depth {stage['queue_depth']} | lag avg {stage['lag_avg_ms']} ms, "
+                  f"max {stage['lag_max_ms']} ms")
+    for stage, s in report["latency"].items():
+        print(f"  {stage:<18} p50 {s['p50_ms']:>8.3f} ms  p99 {s['p99_ms']:>8.3f} ms  max {s['max_ms']:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the bot against a synthetic local ticker feed.")
+    parser.add_argument("--mode", choices=["loop", "pipeline"], default="loop")
+    parser.add_argument("--rates", type=float, nargs="*", default=None,
+                        help="Poll rates to step through (ticks/s); default: one run as fast as possible")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per run")
+    parser.add_argument("--feed-rate", type=float, default=None,
+                        help="Ticks/s the synthetic feed produces (default: a new tick per request)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--symbol", default=SYMBOL)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stub adds to every response")
+    parser.add_argument("--verbose", action="store_true", help="Show the bot's console output")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    for rate in args.rates or [None]:
+        with StubProcess(args.feed_rate, args.seed, args.latency) as stub:
+            if args.mode == "pipeline":
+                report = run_pipeline_load(stub.base_url, args.duration, args.symbol, quiet=not args.verbose)
+            else:
+                report = run_loop_load(stub.base_url, args.duration, rate, args.symbol, quiet=not args.verbose)
+        print_report(report)
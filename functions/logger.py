@@ -0,0 +1,169 @@
+
+
+# functions/logger.py
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from constants import (
+    LOG_QUEUE_SIZE, LOG_RING_SIZE, LOG_FLUSH_INTERVAL, LOG_BLOCK_TIMEOUT, LOG_ROTATE_BYTES, LOG_ROTATE_SECONDS,
+)
+from functions.logstore import archive_dir_for, archive_pending, line_ts, rotate_log
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+
+class BufferedLogger:
+    """
+    Structured JSONL logger that never touches the disk on the caller's
+    thread.
+
+    log() only builds a small dict and puts it on a bounded queue; a
+    background thread keeps the file open, serializes records and flushes
+    every `flush_interval` seconds or when the queue runs dry. When the
+    queue is full, DEBUG records are dropped straight away while INFO and
+    above wait up to `block_timeout` seconds (backpressure) before being
+    dropped. Every drop is counted.
+
+    The last `ring_size` INFO-and-above lines are also kept in memory for
+    the dashboard (see recent()).
+
+    Once the file reaches `rotate_bytes` or its first record is
+    `rotate_seconds` old, the writer moves it to `archive_dir` and starts a
+    new one; a helper thread compresses and indexes the old segment (see
+    functions/logstore.py, which also queries across segments).
+    """
+    def __init__(self, path, queue_size=LOG_QUEUE_SIZE, ring_size=LOG_RING_SIZE,
+                 flush_interval=LOG_FLUSH_INTERVAL, block_timeout=LOG_BLOCK_TIMEOUT,
+                 rotate_bytes=LOG_ROTATE_BYTES, rotate_seconds=LOG_ROTATE_SECONDS, archive_dir=None):
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.archive_dir = archive_dir or (archive_dir_for(path) if path else None)
+        self.archiver = None
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.records = queue.Queue(maxsize=queue_size)
+        self.ring = deque(maxlen=ring_size)
+        self.stats = {"logged": 0, "written": 0, "dropped": 0, "rotations": 0}
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is None:
+                folder = os.path.dirname(self.path)
+                if folder and not os.path.exists(folder):
+                    os.makedirs(folder)
+                self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def log(self, level, message, **fields):
+        """Queues one record. Extra keyword arguments become JSON fields."""
+        record = {"ts": time.time(), "level": level, "msg": message}
+        if fields:
+            record.update(fields)
+        if LEVELS.get(level, 0) >= LEVELS["INFO"]:
+            self.ring.append(record)
+
+        self._ensure_started()
+        self.stats["logged"] += 1
+        try:
+            if level == "DEBUG":
+                self.records.put_nowait(record)
+            else:
+                self.records.put(record, timeout=self.block_timeout)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def recent(self, limit=None):
+        """Latest `limit` INFO-and-above lines (all of them for None), oldest first, formatted for display."""
+        records = list(self.ring)
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return [
+            f"{datetime.fromtimestamp(r['ts']).strftime('%H:%M:%S')} {r['msg'].strip()}"
+            for r in records
+        ]
+
+    def _first_ts(self):
+        """Timestamp of the first record already in the file, if any."""
+        try:
+            with open(self.path, encoding="utf-8", errors="replace") as f:
+                return line_ts(f.readline())
+        except OSError:
+            return None
+
+    def _rotation_due(self, f, first_ts):
+        if self.rotate_bytes and f.tell() >= self.rotate_bytes:
+            return True
+        return bool(self.rotate_seconds) and first_ts is not None and time.time() - first_ts >= self.rotate_seconds
+
+    def _archive(self):
+        """Compresses rotated segments on a helper thread, so writing carries on meanwhile."""
+        base = os.path.splitext(os.path.basename(self.path))[0]
+        self.archiver = threading.Thread(
+            target=archive_pending, args=(self.archive_dir, base), name="log-archiver", daemon=True
+        )
+        self.archiver.start()
+
+    def _rotate(self, f):
+        f.close()
+        rotate_log(self.path, self.archive_dir)
+        self.stats["rotations"] += 1
+        self._archive()
+        return open(self.path, "a", encoding="utf-8")
+
+    def _run(self):
+        self._archive()  # segments a previous run rotated but did not get to compress
+        first_ts = self._first_ts()
+        f = open(self.path, "a", encoding="utf-8")
+        try:
+            running = True
+            while running:
+                try:
+                    batch = [self.records.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    f.flush()
+                    if self._rotation_due(f, first_ts):
+                        f, first_ts = self._rotate(f), None
+                    continue
+
+                # Drain whatever else is queued so it is written and flushed together
+                while len(batch) < 1000:
+                    try:
+                        batch.append(self.records.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:  # close() sentinel
+                    running = False
+                    batch = [r for r in batch if r is not None]
+
+                f.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch))
+                self.stats["written"] += len(batch)
+                if first_ts is None and batch:
+                    first_ts = batch[0]["ts"]
+                if not running or self.records.empty():
+                    f.flush()
+                if running and self._rotation_due(f, first_ts):
+                    f, first_ts = self._rotate(f), None
+        finally:
+            f.close()
+
+    def close(self):
+        """Flushes everything queued so far and stops the writer thread."""
+        if self.thread is None or not self.thread.is_alive():
+            return
+        self.records.put(None)
+        self.thread.join(timeout=5)
+        if self.archiver is not None:
+            self.archiver.join(timeout=30)
@@ -0,0 +1,305 @@
+
+
+# functions/logstore.py
+
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from datetime import datetime
+
+from constants import LOG_ARCHIVE_DIR, LOG_BLOCK_BYTES
+
+TRADES_INDEX = "trades.idx"  # JSONL: trade number -> segment and blocks holding its lines
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Only one thread per process compresses segments at a time
+archive_lock = threading.Lock()
+
+
+# ========== Log Lines ==========
+
+def line_ts(line):
+    """Epoch seconds of a log line (None if it has none). The logger always writes "ts" first."""
+    if line.startswith('{"ts": '):
+        try:
+            return float(line[7:line.index(",", 7)])
+        except ValueError:
+            pass
+    try:
+        return float(json.loads(line)["ts"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def line_trade(line):
+    """Trade number a log line is tagged with, or None."""
+    if '"trade": ' not in line:
+        return None
+    try:
+        return json.loads(line).get("trade")
+    except ValueError:
+        return None
+
+
+def _read_lines(path):
+    """Complete lines of a plain log file (a line still being written is left out)."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            yield line[:-1]
+
+
+def _first_last_ts(path):
+    with open(path, "rb") as f:
+        first = line_ts(f.readline().decode("utf-8", "replace"))
+        f.seek(max(0, os.path.getsize(path) - 65536))
+        lines = f.read().decode("utf-8", "replace").splitlines()
+    last = next((ts for ts in map(line_ts, reversed(lines)) if ts is not None), None)
+    mtime = os.path.getmtime(path)
+    return (mtime if first is None else first), (mtime if last is None else last)
+
+# ========== Segments ==========
+
+def archive_dir_for(path):
+    return os.path.join(os.path.dirname(path), LOG_ARCHIVE_DIR)
+
+
+def _base(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _segment_pattern(base):
+    return re.compile(rf"^{re.escape(base)}-(\d+)-(\d+)(?:-(\d+))?\.log(\.gz)?$")
+
+
+def segments(archive_dir, base):
+    """
+    Archived segments of a log, oldest first, as (start, end, path,
+    compressed). start/end are whole epoch seconds from the file name and
+    bracket every timestamp inside.
+    """
+    if not os.path.isdir(archive_dir):
+        return []
+    pattern = _segment_pattern(base)
+    names = set(os.listdir(archive_dir))
+    found = []
+    for name in names:
+        match = pattern.match(name)
+        # While a segment is being compressed both files exist; the plain one is complete
+        if match and not (match[4] and name[:-3] in names):
+            order = (int(match[1]), int(match[2]), int(match[3] or 0))
+            found.append((order, os.path.join(archive_dir, name), bool(match[4])))
+    return [(order[0], order[1], path, compressed) for order, path, compressed in sorted(found)]
+
+
+def rotate_log(path, archive_dir=None):
+    """
+    Moves the log file into the archive folder as a plain segment named
+    after its first and last timestamps (archive_pending() compresses it).
+    Returns the new path, or None when there was nothing to rotate.
+    """
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return None
+    archive_dir = archive_dir or archive_dir_for(path)
+    os.makedirs(archive_dir, exist_ok=True)
+    first, last = _first_last_ts(path)
+    stem = os.path.join(archive_dir, f"{_base(path)}-{math.floor(first)}-{math.ceil(last)}")
+    target, n = stem + ".log", 0
+    while os.path.exists(target) or os.path.exists(target + ".gz"):
+        n += 1
+        target = f"{stem}-{n}.log"
+    os.replace(path, target)
+    return target
+
+
+def _blocks(f, block_bytes):
+    """Raw lines of a file in runs of about `block_bytes`, split on line ends."""
+    block, size = [], 0
+    for raw in f:
+        block.append(raw)
+        size += len(raw)
+        if size >= block_bytes:
+            yield block
+            block, size = [], 0
+    if block:
+        yield block
+
+
+def archive_segment(plain_path, block_bytes=LOG_BLOCK_BYTES):
+    """
+    Compresses a plain segment into `<segment>.log.gz` and writes its
+    sidecar index `<segment>.log.gz.idx`.
+
+    The .gz is a run of independent gzip members of about `block_bytes`
+    uncompressed each (still one valid gzip file for zcat). The sidecar
+    records every block's [min ts, max ts, offset, length] and which blocks
+    hold each trade's lines, so a query decompresses only the blocks it
+    needs. Each trade is also appended to the archive's trades.idx.
+    """
+    gz_path = plain_path + ".gz"
+    index = {"start": None, "end": None, "lines": 0, "blocks": [], "trades": {}}
+    trade_blocks = {}
+    with open(plain_path, "rb") as src, open(gz_path + ".tmp", "wb") as out:
+        for block in _blocks(src, block_bytes):
+            lo = hi = None
+            for raw in block:
+                line = raw.decode("utf-8", "replace")
+                ts = line_ts(line)
+                if ts is not None:
+                    lo = ts if lo is None or ts < lo else lo
+                    hi = ts if hi is None or ts > hi else hi
+                trade = line_trade(line)
+                if trade is not None:
+                    blocks = index["trades"].setdefault(str(trade), [])
+                    if not blocks or blocks[-1] != len(index["blocks"]):
+                        blocks.append(len(index["blocks"]))
+            data = gzip.compress(b"".join(block), mtime=0)
+            entry = [lo, hi, out.tell(), len(data)]
+            out.write(data)
+            index["blocks"].append(entry)
+            index["lines"] += len(block)
+            if lo is not None:
+                index["start"] = lo if index["start"] is None else min(index["start"], lo)
+                index["end"] = hi if index["end"] is None else max(index["end"], hi)
+
+    for trade, blocks in index["trades"].items():
+        trade_blocks[trade] = [index["blocks"][i] for i in blocks]
+    os.replace(gz_path + ".tmp", gz_path)
+    with open(gz_path + ".idx.tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(gz_path + ".idx.tmp", gz_path + ".idx")
+    if trade_blocks:
+        name = os.path.basename(gz_path)
+        with open(os.path.join(os.path.dirname(gz_path), TRADES_INDEX), "a", encoding="utf-8") as f:
+            f.write("".join(
+                json.dumps({"trade": int(trade), "segment": name, "blocks": blocks}) + "\n"
+                for trade, blocks in trade_blocks.items()
+            ))
+    os.remove(plain_path)
+    return gz_path
+
+
+def archive_pending(archive_dir, base, block_bytes=LOG_BLOCK_BYTES):
+    """Compresses every plain segment left in the archive folder. Returns how many."""
+    with archive_lock:
+        pending = [path for _, _, path, compressed in segments(archive_dir, base) if not compressed]
+        for path in pending:
+            archive_segment(path, block_bytes)
+    return len(pending)
+
+# ========== Queries ==========
+
+def _load_index(gz_path):
+    with open(gz_path + ".idx", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _trade_blocks(archive_dir, trade):
+    """segment name -> blocks holding lines of `trade`, from trades.idx."""
+    found = {}
+    path = os.path.join(archive_dir, TRADES_INDEX)
+    if not os.path.exists(path):
+        return found
+    needle = f'"trade": {int(trade)},'
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if needle in line:
+                entry = json.loads(line)
+                found[entry["segment"]] = entry["blocks"]  # a re-archived segment overwrites itself
+    return found
+
+
+def _read_blocks(gz_path, blocks):
+    """Lines of the given [min ts, max ts, offset, length] blocks, decompressing nothing else."""
+    with open(gz_path, "rb") as f:
+        for _, _, offset, length in blocks:
+            f.seek(offset)
+            data = zlib.decompress(f.read(length), wbits=31)  # 31: one gzip member
+            yield from data.decode("utf-8", "replace").splitlines()
+
+
+def _overlaps(lo, hi, start, end):
+    return lo is None or (hi >= start and lo <= end)
+
+
+def query_log(path, start=None, end=None, trade=None, archive_dir=None):
+    """
+    Streams the lines of a log (archived segments, oldest first, then the
+    live file) whose timestamp is within [start, end] epoch seconds and,
+    if `trade` is given, that are tagged with that trade number.
+
+    Segments outside the window are skipped by name. Inside a segment only
+    the blocks whose time range overlaps the window - or, for a trade, the
+    blocks trades.idx lists for it - are read and decompressed. Plain
+    segments not yet compressed and the live file are scanned.
+    """
+    archive_dir = archive_dir or archive_dir_for(path)
+    start = -math.inf if start is None else start
+    end = math.inf if end is None else end
+    by_trade = _trade_blocks(archive_dir, trade) if trade is not None else None
+
+    def wanted(line):
+        ts = line_ts(line)
+        if ts is not None and not start <= ts <= end:
+            return False
+        return trade is None or line_trade(line) == trade
+
+    for seg_start, seg_end, seg_path, compressed in segments(archive_dir, _base(path)):
+        if seg_end < start or seg_start > end:
+            continue
+        if not compressed:
+            try:
+                yield from filter(wanted, _read_lines(seg_path))
+                continue
+            except FileNotFoundError:  # compressed since it was listed
+                seg_path += ".gz"
+        if by_trade is not None:
+            blocks = by_trade.get(os.path.basename(seg_path), [])
+        else:
+            blocks = _load_index(seg_path)["blocks"]
+        blocks = [b for b in blocks if _overlaps(b[0], b[1], start, end)]
+        yield from filter(wanted, _read_blocks(seg_path, blocks))
+
+    if os.path.exists(path):
+        yield from filter(wanted, _read_lines(path))
+
+
+def parse_time(value):
+    """Epoch seconds from a number or a local "YYYY-mm-dd HH:MM:SS" string."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.strptime(value, TIME_FORMAT).timestamp()
+
+
+if __name__ == "__main__":
+    from functions.data import LOG_FILE
+
+    parser = argparse.ArgumentParser(description="Query, rotate or compress the trade log.")
+    parser.add_argument("command", choices=["query", "rotate", "archive"])
+    parser.add_argument("--log", default=LOG_FILE)
+    parser.add_argument("--start", type=parse_time, default=None, help='Epoch seconds or "YYYY-mm-dd HH:MM:SS"')
+    parser.add_argument("--end", type=parse_time, default=None)
+    parser.add_argument("--trade", type=int, default=None)
+    parser.add_argument("--raw", action="store_true", help="Print the JSON lines as stored")
+    args = parser.parse_args()
+
+    archive_dir = archive_dir_for(args.log)
+    if args.command == "rotate":
+        rotated = rotate_log(args.log, archive_dir)
+        print(f"Rotated to {rotated}" if rotated else "Nothing to rotate")
+    if args.command in ("rotate", "archive"):
+        print(f"Compressed {archive_pending(archive_dir, _base(args.log))} segment(s)")
+    else:
+        for line in query_log(args.log, args.start, args.end, args.trade, archive_dir):
+            ts = line_ts(line)
+            if args.raw or ts is None:
+                print(line)
+                continue
+            print(f"{datetime.fromtimestamp(ts).strftime(TIME_FORMAT)} {json.loads(line).get('msg', '').strip()}")
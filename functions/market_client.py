@@ -0,0 +1,210 @@
+
+
+# functions/market_client.py
+
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from constants import (
+    CONNECT_TIMEOUT, READ_TIMEOUT, MAX_RETRIES, BACKOFF_BASE, BACKOFF_MAX,
+    FETCH_LATENCY_BUDGET, CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN,
+    HTTP_POOL_SIZE, BATCH_CONTRACT_TYPES,
+)
+
+BASE_URL = "https://cdn.india.deltaex.org/v2/tickers"
+
+# Status codes worth retrying; anything else non-200 fails immediately
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Circuit breaker states
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class MarketDataError(Exception):
+    """A ticker request failed after all retries."""
+
+
+class CircuitOpenError(MarketDataError):
+    """The circuit breaker is open, so no request was sent."""
+
+
+class MarketDataClient:
+    """
+    Ticker client on a persistent, pooled requests.Session.
+
+    Every request has connect/read timeouts. Transient failures are retried
+    with jittered exponential backoff as long as the whole call stays
+    within `latency_budget` seconds. After `breaker_threshold` consecutive
+    failed calls the circuit opens and calls fail fast for
+    `breaker_cooldown` seconds. Then it is half-open: a single trial call
+    is let through while the others keep failing fast. The circuit closes
+    if the trial succeeds and re-opens straight away if it fails.
+
+    Failures raise MarketDataError; a successful response without data
+    returns {} and is counted separately as empty.
+    """
+    def __init__(self, base_url=BASE_URL, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX,
+                 latency_budget=FETCH_LATENCY_BUDGET, breaker_threshold=CIRCUIT_BREAKER_THRESHOLD,
+                 breaker_cooldown=CIRCUIT_BREAKER_COOLDOWN, pool_size=HTTP_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.latency_budget = latency_budget
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.breaker = CLOSED
+        self.open_until = 0  # OPEN: end of the cooldown; HALF_OPEN: when to give up on the trial call
+        self.latencies = deque(maxlen=1000)  # seconds per HTTP request
+        self.stats = {
+            "calls": 0, "requests": 0, "ok": 0, "empty": 0, "failures": 0,
+            "retries": 0, "short_circuited": 0, "breaker_trips": 0, "bad_payload": 0,
+        }
+        self.last_error = None
+
+    # ---- Circuit Breaker ----
+    def _allow_request(self):
+        with self.lock:
+            if self.breaker == CLOSED:
+                return True
+            now = time.monotonic()
+            if now < self.open_until:
+                self.stats["short_circuited"] += 1
+                return False
+            # Cooldown over (or the last trial never reported back): this call is the trial
+            self.breaker = HALF_OPEN
+            self.open_until = now + self.breaker_cooldown
+            return True
+
+    def _record_result(self, ok):
+        with self.lock:
+            if ok:
+                self.consecutive_failures = 0
+                self.breaker = CLOSED
+                return
+            self.stats["failures"] += 1
+            self.consecutive_failures += 1
+            if self.breaker == HALF_OPEN or self.consecutive_failures >= self.breaker_threshold:
+                self.breaker = OPEN
+                self.open_until = time.monotonic() + self.breaker_cooldown
+                self.consecutive_failures = 0
+                self.stats["breaker_trips"] += 1
+
+    # ---- Requests ----
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _get(self, url, params=None):
+        """GET with retries inside the latency budget. Returns the decoded JSON."""
+        with self.lock:
+            self.stats["calls"] += 1
+        if not self._allow_request():
+            raise CircuitOpenError(f"circuit open for {self.base_url}")
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            sent = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                error = None if response.status_code == 200 else f"HTTP {response.status_code}"
+                retryable = response.status_code in RETRY_STATUS
+            except requests.RequestException as e:
+                retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+                response, error = None, f"{type(e).__name__}: {e}"
+            with self.lock:
+                self.stats["requests"] += 1
+                self.latencies.append(time.perf_counter() - sent)
+
+            if error is None:
+                try:
+                    payload = response.json()
+                except ValueError as e:
+                    error, retryable = f"Bad JSON: {e}", False
+                else:
+                    self._record_result(True)
+                    return payload
+
+            delay = self._backoff(attempt)
+            out_of_budget = time.monotonic() - started + delay > self.latency_budget
+            if not retryable or attempt >= self.max_retries or out_of_budget:
+                self.last_error = error
+                self._record_result(False)
+                raise MarketDataError(error)
+            with self.lock:
+                self.stats["retries"] += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _result(self, payload, kind):
+        """The "result" of a decoded response, checked to be a `kind` (dict or list)."""
+        if isinstance(payload, dict):
+            result = payload.get("result")
+            if result is None:
+                return kind()
+            if isinstance(result, kind):
+                return result
+        self._count("bad_payload")
+        self.last_error = f"Unexpected payload: {str(payload)[:200]}"
+        raise MarketDataError(self.last_error)
+
+    def get_ticker(self, symbol):
+        """Returns the ticker for `symbol`, or {} if the API returned nothing."""
+        result = self._result(self._get(f"{self.base_url}/{symbol}"), dict)
+        self._count("ok" if result else "empty")
+        return result
+
+    def get_tickers(self, symbols=None, contract_types=BATCH_CONTRACT_TYPES):
+        """
+        Fetches many tickers with a single request to the list endpoint.
+
+        Returns:
+            dict of symbol -> ticker, limited to `symbols` if given
+        """
+        params = {"contract_types": contract_types} if contract_types else None
+        results = self._result(self._get(self.base_url, params=params), list)
+        if not all(isinstance(t, dict) and "symbol" in t for t in results):
+            self._count("bad_payload")
+            self.last_error = "Unexpected payload: ticker without a symbol"
+            raise MarketDataError(self.last_error)
+        wanted = set(symbols) if symbols else None
+        tickers = {t["symbol"]: t for t in results if wanted is None or t.get("symbol") in wanted}
+        self._count("ok" if tickers else "empty")
+        return tickers
+
+    # ---- Stats ----
+    def latency_stats(self):
+        """p50/p99/max request latency in milliseconds over the recent window."""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return {"count": 0, "p50_ms": None, "p99_ms": None, "max_ms": None}
+        return {
+            "count": len(samples),
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2),
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,223 @@
+
+
+# functions/optimizer.py
+
+import argparse
+import itertools
+import os
+import random
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from functions.backtest import load_ticks, entry_signals, simulate_trades, trade_profits
+from functions.indicators import ema_series, macd_series, rsi_series, vwap_series
+from functions.params import default_params
+
+# Default search space; RSI levels are swept as (high, low) pairs
+DEFAULT_GRID = {
+    "take_profit": [0.005, 0.01, 0.02, 0.03],
+    "stop_loss": [0.0025, 0.005, 0.01],
+    "trailing_trigger": [0.001, 0.002, 0.004],
+    "trailing_margin": [0.0025, 0.005, 0.01],
+    "rsi_levels": [(0.6, 0.4), (55, 45), (60, 40), (70, 30)],
+    "ema_period": [10, 20],
+    "rsi_period": [7, 14],
+    "use_ema": [True, False],
+    "use_macd": [True, False],
+    "use_rsi": [True, False],
+    "use_vwap": [True, False],
+}
+
+SIGNAL_KEYS = ["use_ema", "use_macd", "use_rsi", "use_vwap", "rsi_high", "rsi_low",
+               "ema_period", "rsi_period", "vwap_period"]
+PERIOD_KEYS = {"ema": "ema_period", "rsi": "rsi_period", "vwap": "vwap_period"}
+
+# Settings that only matter while their indicator is on
+DEPENDENT_KEYS = {
+    "use_ema": ["ema_period"],
+    "use_rsi": ["rsi_high", "rsi_low", "rsi_period"],
+    "use_vwap": ["vwap_period"],
+}
+
+# ========== Search Spaces ==========
+
+def _expand(config):
+    """
+    Splits the rsi_levels pair into rsi_high / rsi_low, fills in periods
+    the grid doesn't sweep, and blanks out (None) the settings of
+    indicators that are off.
+    """
+    config = dict(config)
+    if "rsi_levels" in config:
+        config["rsi_high"], config["rsi_low"] = config.pop("rsi_levels")
+    defaults = default_params()
+    for key in PERIOD_KEYS.values():
+        config.setdefault(key, defaults[key])
+    for flag, keys in DEPENDENT_KEYS.items():
+        if flag in config and not config[flag]:
+            for key in keys:
+                config[key] = None
+    return config
+
+
+def grid_configs(grid=DEFAULT_GRID):
+    """
+    Every distinct combination of the grid values. Combinations that only
+    differ in the settings of a disabled indicator are the same strategy
+    and are kept once.
+    """
+    names = list(grid)
+    configs = {}
+    for values in itertools.product(*(grid[n] for n in names)):
+        config = _expand(zip(names, values))
+        configs.setdefault(tuple(config.items()), config)
+    return list(configs.values())
+
+
+def random_configs(samples, grid=DEFAULT_GRID, seed=0):
+    """`samples` distinct random picks from grid_configs(grid)."""
+    configs = grid_configs(grid)
+    return random.Random(seed).sample(configs, min(samples, len(configs)))
+
+
+def _series_rows(configs):
+    """
+    Rows of the shared array: prices, MACD and its signal line, then one
+    row per distinct (indicator, period) the configs use.
+    """
+    rows = [("price", None), ("macd", None), ("signal", None)]
+    defaults = default_params()
+    for name, key in PERIOD_KEYS.items():
+        periods = {c[key] for c in configs if c.get(key) is not None} | {defaults[key]}
+        rows += [(name, period) for period in sorted(periods)]
+    return rows
+
+
+def _compute_rows(rows, prices, volumes):
+    """The series of each row, in order."""
+    macd, signal = macd_series(prices)
+    series = {"price": lambda n: prices, "macd": lambda n: macd, "signal": lambda n: signal,
+              "ema": lambda n: ema_series(prices, n), "rsi": lambda n: rsi_series(prices, n),
+              "vwap": lambda n: vwap_series(prices, volumes, n)}
+    for name, period in rows:
+        yield series[name](period)
+
+# ========== Workers ==========
+
+_worker = {}
+
+def _init_worker(shm_name, shape, rows):
+    """Maps the shared price/indicator block; nothing is copied into the worker."""
+    shm = SharedMemory(name=shm_name)
+    data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker["shm"] = shm
+    _worker["prices"] = data[0]
+    _worker["series"] = {row: data[i] for i, row in enumerate(rows)}
+    _worker["signals"] = {}
+
+
+def _indicators(config):
+    """The shared series a config reads (the default period for indicators it has turned off)."""
+    series = _worker["series"]
+    defaults = default_params()
+    indicators = {"macd": series[("macd", None)], "signal": series[("signal", None)]}
+    for name, key in PERIOD_KEYS.items():
+        indicators[name] = series[(name, config.get(key) or defaults[key])]
+    return indicators
+
+
+def score(prices, trades):
+    """Net P&L after fees, max drawdown, trade count and win rate of a simulation."""
+    _, net_profit, total_profit = trade_profits(prices, trades)
+    equity = np.concatenate([[0.0], total_profit])
+    drawdown = np.maximum.accumulate(equity) - equity
+    return {
+        "net_profit": float(total_profit[-1]) if len(total_profit) else 0.0,
+        "max_drawdown": float(drawdown.max()),
+        "trades": int(len(net_profit)),
+        "win_rate": float((net_profit > 0).mean()) if len(net_profit) else 0.0,
+    }
+
+
+def _evaluate(configs):
+    """Runs a batch of configs; entry signals are cached per signal settings."""
+    prices = _worker["prices"]
+    cache = _worker["signals"]
+    results = []
+    for config in configs:
+        key = tuple(config.get(k) for k in SIGNAL_KEYS)
+        if key not in cache:
+            if len(cache) >= 8:
+                cache.pop(next(iter(cache)))
+            cache[key] = entry_signals(
+                prices, _indicators(config), config["use_ema"], config["use_macd"], config["use_rsi"],
+                config["use_vwap"], config["rsi_high"], config["rsi_low"],
+            )
+        trades = simulate_trades(
+            prices, cache[key], config["take_profit"], config["stop_loss"],
+            config["trailing_trigger"], config["trailing_margin"],
+        )
+        results.append({**config, **score(prices, trades)})
+    return results
+
+# ========== Sweep ==========
+
+def sweep(prices, volumes, configs, workers=None, batch_size=32):
+    """
+    Evaluates every config across a process pool.
+
+    Prices and every indicator series the configs need (one per distinct
+    period) are computed once and placed in one shared-memory block that
+    every worker maps. Configs are ordered by their signal settings and
+    sent in batches, so each worker builds a signal array once and reuses
+    it for all the TP/SL/trailing values that share it.
+
+    Returns:
+        DataFrame ranked by net profit, then drawdown, then trade count
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    configs = [_expand(c) for c in configs]
+    rows = _series_rows(configs)
+    shape = (len(rows), len(prices))
+    shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for i, values in enumerate(_compute_rows(rows, prices, volumes)):
+            data[i] = values
+        del data
+
+        ordered = sorted(configs, key=lambda c: tuple(str(c.get(k)) for k in SIGNAL_KEYS))
+        batches = [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+        with Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(shm.name, shape, rows)) as pool:
+            results = [row for batch in pool.imap_unordered(_evaluate, batches) for row in batch]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    ranked = pd.DataFrame(results)
+    if ranked.empty:
+        return ranked
+    return ranked.sort_values(
+        ["net_profit", "max_drawdown", "trades"], ascending=[False, True, False]
+    ).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep strategy parameters over recorded ticks.")
+    parser.add_argument("path", help="CSV or .npy file (see backtest.load_ticks)")
+    parser.add_argument("--random", type=int, metavar="N", help="Random search with N samples instead of the full grid")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="Optional CSV path for the full ranking")
+    args = parser.parse_args()
+
+    _, prices, volumes = load_ticks(args.path)
+    configs = random_configs(args.random) if args.random else grid_configs()
+    ranked = sweep(prices, volumes, configs, args.workers)
+    print(f"Evaluated {len(ranked)} configs on {len(prices)} ticks")
+    print(ranked.head(args.top).to_string())
+    if args.out:
+        ranked.to_csv(args.out, index=False)
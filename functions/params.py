@@ -0,0 +1,35 @@
+
+
+# functions/params.py
+
+from constants import (
+    TAKE_PROFIT_PERCENT, STOP_LOSS_PERCENT, TRAILING_TRIGGER_PERCENT, TRAILING_MARGIN_PERCENT,
+    USE_EMA, USE_MACD, USE_RSI, USE_VWAP, RSI_HIGH_LEVEL, RSI_LOW_LEVEL,
+    EMA_PERIOD, RSI_PERIOD, VWAP_PERIOD,
+)
+
+TICK = "tick"  # timeframe of indicators updated on every tick
+
+
+def default_params():
+    """Strategy parameters from constants.py, keyed like the optimizer's configs."""
+    return {
+        "take_profit": TAKE_PROFIT_PERCENT,
+        "stop_loss": STOP_LOSS_PERCENT,
+        "trailing_trigger": TRAILING_TRIGGER_PERCENT,
+        "trailing_margin": TRAILING_MARGIN_PERCENT,
+        "use_ema": USE_EMA,
+        "use_macd": USE_MACD,
+        "use_rsi": USE_RSI,
+        "use_vwap": USE_VWAP,
+        "rsi_high": RSI_HIGH_LEVEL,
+        "rsi_low": RSI_LOW_LEVEL,
+        "ema_period": EMA_PERIOD,
+        "rsi_period": RSI_PERIOD,
+        "vwap_period": VWAP_PERIOD,
+        "timeframe": TICK,  # or a CANDLE_INTERVALS name: indicators then move on bar closes
+    }
+
+
+# Parameters that only feed the default entry rules (ignored with RULES_PATH)
+RULE_PARAMS = ("use_ema", "use_macd", "use_rsi", "use_vwap", "rsi_high", "rsi_low")
@@ -0,0 +1,381 @@
+
+
+# functions/pipeline.py
+
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from multiprocessing.connection import wait
+
+from constants import (
+    SYMBOL, LEDGER_PATH, HISTORY_DIR, USE_RECORDER, USE_SNAPSHOTS, SNAPSHOT_DIR, PAUSE_AFTER_ENTRY,
+    PIPELINE_TICK_QUEUE, PIPELINE_OUTBOX_SIZE, USE_SCHEDULER, USE_STREAM,
+)
+from functions import data
+from functions.data import BASE_URL, LOG_FILE, fetch_data, log_and_print, set_logger, set_log_file
+from functions.data_utils import write_state_file
+from functions.engine import TradingEngine
+from functions.history import HistoryStore
+from functions.latency import install_profile_signal
+from functions.ledger import TradeLedger
+from functions.logger import BufferedLogger
+from functions.recorder import TickRecorder
+from functions.snapshot import save_snapshot
+
+STOP = None  # end-of-stream marker passed down the queues
+
+
+# ========== Stage Metrics ==========
+
+class StageStats:
+    """Items handled, queue depth and lag (seconds from enqueue to dequeue) of one stage."""
+    def __init__(self):
+        self.processed = 0
+        self.depth = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+
+    def observe(self, sent_at, source):
+        lag = max(time.time() - sent_at, 0.0)
+        self.processed += 1
+        self.depth = queue_depth(source)
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_total += lag
+
+    def to_dict(self):
+        return {
+            "processed": self.processed,
+            "queue_depth": self.depth,
+            "lag_ms": round(self.lag_last * 1000, 3),
+            "lag_avg_ms": round(self.lag_total / self.processed * 1000, 3) if self.processed else 0.0,
+            "lag_max_ms": round(self.lag_max * 1000, 3),
+        }
+
+
+def queue_depth(q):
+    """Approximate number of items waiting in `q` (-1 where the platform can't tell)."""
+    try:
+        return q.qsize()
+    except NotImplementedError:
+        return -1
+
+
+# ========== Strategy-side Proxies ==========
+
+class _Outbox:
+    """Queue-like handle that tags every record with its kind and send time."""
+    def __init__(self, outbox, kind):
+        self.outbox = outbox
+        self.kind = kind
+
+    def put(self, item, timeout=None):
+        self.outbox.put((self.kind, time.time(), item), timeout=timeout)
+
+    def put_nowait(self, item):
+        self.outbox.put_nowait((self.kind, time.time(), item))
+
+
+class QueueLogger(BufferedLogger):
+    """
+    BufferedLogger that hands records to the persistence stage instead of
+    a writer thread. Drop/backpressure rules and the in-memory ring are
+    the same as BufferedLogger's.
+    """
+    def __init__(self, outbox):
+        super().__init__(path=None)
+        self.records = _Outbox(outbox, "log")
+
+    def _ensure_started(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class QueueLedger:
+    """Stands in for TradeLedger: rows go to the persistence stage."""
+    def __init__(self, outbox, last_trade_no=0):
+        self.outbox = outbox
+        self.last_no = last_trade_no
+
+    def record_entry(self, row):
+        self.outbox.put(("entry", time.time(), row))
+
+    def record_exit(self, trade_no, row):
+        self.outbox.put(("exit", time.time(), (trade_no, row)))
+        self.last_no = max(self.last_no, trade_no)
+
+    def last_trade_no(self):
+        return self.last_no
+
+    def close(self):
+        pass
+
+
+class QueueHistory:
+    """Stands in for HistoryStore on the write side: appends go to the persistence stage."""
+    def __init__(self, outbox, store):
+        self.outbox = outbox
+        self.store = store  # read-only use (warm-start backfill)
+
+    def append(self, *args):
+        self.outbox.put(("history", time.time(), args))
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+class StrategyEngine(TradingEngine):
+    """
+    TradingEngine that never touches the disk after start-up: ledger rows,
+    history points, state snapshots and warm-start snapshots are handed to
+    the persistence stage through `outbox`.
+
+    Ledger rows, history and snapshots wait for room on a full outbox; state
+    snapshots are dropped instead since the next tick supersedes them.
+    """
+    def __init__(self, symbol, outbox, **kwargs):
+        self.outbox = outbox
+        self.stage_stats = {}
+        self.state_dropped = 0
+        super().__init__(symbol, record=False, **kwargs)
+        self.ledger.close()
+        self.ledger = QueueLedger(outbox, self.trade_no - 1)
+        self.history = QueueHistory(outbox, self.history)
+
+    def write_snapshot(self, snapshot):
+        self.outbox.put(("snapshot", time.time(), snapshot))
+
+    def publish_state(self, state):
+        state["pipeline"] = dict(self.stage_stats, state_dropped=self.state_dropped)
+        try:
+            self.outbox.put_nowait(("state", time.time(), state))
+        except queue.Full:
+            self.state_dropped += 1
+
+
+# ========== Stages ==========
+
+def _init_stage():
+    # Ctrl+C reaches the whole process group; stages only stop through stop_event / STOP
+    # so whatever is still queued gets written
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Every stage answers SIGUSR1 with a profile; the default action would kill it
+    install_profile_signal()
+
+
+def ingest_stage(symbol, base_url, ticks, outbox, delay, stop, max_ticks=None, record=USE_RECORDER,
+                 time_scale=1.0):
+    """
+    Polls the ticker and pushes (fetched_at, tick, stats) onto `ticks`.
+
+    The wait between polls comes from the strategy stage through `delay`
+    and is measured from the start of each fetch. When `ticks` is full the
+    oldest tick is dropped, so the strategy always catches up to the latest
+    price instead of working through a stale backlog.
+    """
+    _init_stage()
+    set_logger(QueueLogger(outbox))
+    recorder = TickRecorder(symbol) if record else None
+    stats = {"polls": 0, "empty": 0, "dropped": 0, "queue_depth": 0}
+    while not stop.is_set() and (max_ticks is None or stats["polls"] < max_ticks):
+        started = time.time()
+        tick = fetch_data(symbol, base_url)
+        stats["polls"] += 1
+        if not tick:
+            stats["empty"] += 1
+        else:
+            if recorder:
+                recorder.record(tick)
+            stats["queue_depth"] = queue_depth(ticks)
+            item = (time.time(), tick, dict(stats))
+            try:
+                ticks.put_nowait(item)
+            except queue.Full:
+                try:
+                    ticks.get_nowait()
+                    stats["dropped"] += 1
+                except queue.Empty:
+                    pass
+                ticks.put(item)
+
+        wait = (delay.value - (time.time() - started)) * time_scale
+        if wait > 0:
+            stop.wait(wait)
+
+    if recorder:
+        recorder.close()
+    ticks.put(STOP)
+
+
+def strategy_stage(symbol, ticks, outbox, delay, state_path, ledger_path, history_dir, snapshots):
+    """
+    Runs the engine on each tick from `ticks` and publishes the poll delay
+    it asks for through `delay`. All writes go to `outbox`.
+    """
+    _init_stage()
+    set_logger(QueueLogger(outbox))
+    engine = StrategyEngine(symbol, outbox, ledger_path=ledger_path, state_path=state_path,
+                            history_dir=history_dir, snapshots=snapshots)
+    delay.value = engine.idle_delay()
+    stats = StageStats()
+    while True:
+        item = ticks.get()
+        if item is STOP:
+            break
+        fetched_at, tick, ingest = item
+        stats.observe(fetched_at, ticks)
+        engine.stage_stats = {"ingest": ingest, "strategy": stats.to_dict()}
+        delay.value = engine.on_tick(tick)
+    outbox.put(STOP)
+
+
+def persistence_stage(symbol, outbox, state_path, ledger_path, history_dir, log_path, snapshot_path):
+    """
+    Owns every file the bot writes: ledger, history, log, state and
+    warm-start snapshot. Adds its own queue depth and lag to each state.
+    """
+    _init_stage()
+    set_log_file(log_path)
+    ledger = TradeLedger(ledger_path, symbol)
+    history = HistoryStore(symbol, history_dir)
+    stats = StageStats()
+    while True:
+        item = outbox.get()
+        if item is STOP:
+            break
+        kind, sent_at, payload = item
+        stats.observe(sent_at, outbox)
+        if kind == "log":
+            record = dict(payload)
+            data.logger.log(record.pop("level"), record.pop("msg"), **record)
+        elif kind == "history":
+            history.append(*payload)
+        elif kind == "entry":
+            ledger.record_entry(payload)
+        elif kind == "exit":
+            ledger.record_exit(*payload)
+        elif kind == "snapshot" and snapshot_path:
+            save_snapshot(payload, snapshot_path)
+        elif kind == "state" and state_path:
+            payload.setdefault("pipeline", {})["persistence"] = stats.to_dict()
+            write_state_file(payload, state_path)
+
+    ledger.close()
+    data.logger.close()
+
+
+# ========== Pipeline ==========
+
+def _context():
+    # fork keeps j1.py's top-level loop out of the children; spawn where fork is unavailable
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+
+
+class Pipeline:
+    """
+    The bot as three processes joined by bounded queues:
+
+        ingest -> [ticks] -> strategy -> [outbox] -> persistence
+
+    Ingest polls the exchange (and records ticks), strategy runs the
+    TradingEngine and never blocks on disk, persistence writes the ledger,
+    history, log, state and snapshots. Each stage's queue depth and lag is
+    published under "pipeline" in the state file.
+
+    With `max_ticks` the ingest stage stops after that many polls and the
+    end-of-stream marker drains the other two stages in order.
+
+    The poll delay always comes from the engine's fixed pauses: the
+    adaptive scheduler (USE_SCHEDULER) and the streaming feed (USE_STREAM)
+    are not used in this mode.
+    """
+    def __init__(self, symbol=SYMBOL, base_url=BASE_URL, state_path="state.json", ledger_path=LEDGER_PATH,
+                 history_dir=HISTORY_DIR, log_path=LOG_FILE, snapshots=USE_SNAPSHOTS, record=USE_RECORDER,
+                 tick_queue=PIPELINE_TICK_QUEUE, outbox_size=PIPELINE_OUTBOX_SIZE, max_ticks=None,
+                 time_scale=1.0):
+        if USE_SCHEDULER or USE_STREAM:
+            log_and_print("⚠️ USE_SCHEDULER / USE_STREAM are ignored in pipeline mode; polling on the fixed pauses")
+        ctx = _context()
+        self.ticks = ctx.Queue(tick_queue)
+        self.outbox = ctx.Queue(outbox_size)
+        self.delay = ctx.Value("d", PAUSE_AFTER_ENTRY, lock=False)
+        self.stop_event = ctx.Event()
+        snapshot_path = os.path.join(SNAPSHOT_DIR, f"{symbol}.json") if snapshots else None
+        self.processes = [
+            ctx.Process(target=ingest_stage, name=f"ingest-{symbol}", args=(
+                symbol, base_url, self.ticks, self.outbox, self.delay, self.stop_event, max_ticks, record,
+                time_scale)),
+            ctx.Process(target=strategy_stage, name=f"strategy-{symbol}", args=(
+                symbol, self.ticks, self.outbox, self.delay, state_path, ledger_path, history_dir, snapshots)),
+            ctx.Process(target=persistence_stage, name=f"persistence-{symbol}", args=(
+                symbol, self.outbox, state_path, ledger_path, history_dir, log_path, snapshot_path)),
+        ]
+
+    def start(self):
+        for process in self.processes:
+            process.start()
+        return self
+
+    def depths(self):
+        """Current depth of the tick queue and the outbox."""
+        return {"ticks": queue_depth(self.ticks), "outbox": queue_depth(self.outbox)}
+
+    def join(self, timeout=None):
+        for process in self.processes:
+            process.join(timeout)
+        return all(p.exitcode is not None for p in self.processes)
+
+    def failed(self):
+        """The first stage that exited with an error, or None."""
+        return next((p for p in self.processes if p.exitcode not in (None, 0)), None)
+
+    def stop(self, timeout=10):
+        """
+        Stops polling and lets the queued ticks and writes drain. A stage
+        that died can't pass the end-of-stream marker on, so it is sent on
+        its behalf.
+        """
+        self.stop_event.set()
+        for process, downstream in zip(self.processes, (self.ticks, self.outbox)):
+            if process.exitcode not in (None, 0):
+                try:
+                    downstream.put(STOP, timeout=1)
+                except queue.Full:
+                    pass
+        if not self.join(timeout):
+            for process in self.processes:
+                if process.is_alive():
+                    process.terminate()
+
+    def run(self):
+        """Starts the stages and blocks until they finish, one of them fails, or Ctrl+C."""
+        self.start()
+        log_and_print(f"🧵 Pipeline started: {', '.join(p.name for p in self.processes)}")
+        try:
+            while any(p.is_alive() for p in self.processes):
+                wait([p.sentinel for p in self.processes if p.is_alive()])
+                failed = self.failed()
+                if failed:
+                    log_and_print(f"❌ {failed.name} exited with code {failed.exitcode}; stopping the pipeline")
+                    self.stop()
+                    break
+        except KeyboardInterrupt:
+            self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the bot as ingest/strategy/persistence processes.")
+    parser.add_argument("--symbol", default=SYMBOL)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--max-ticks", type=int, default=None, help="Stop after this many polls")
+    args = parser.parse_args()
+
+    Pipeline(args.symbol, args.base_url, max_ticks=args.max_ticks).run()
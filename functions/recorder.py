@@ -0,0 +1,174 @@
+
+
+# functions/recorder.py
+
+import argparse
+import glob
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from constants import RECORD_DIR, RECORD_FLUSH_EVERY
+from functions.utils import to_epoch_seconds, to_epoch_seconds_array
+
+# One fixed-width record per ticker response. The raw exchange timestamp
+# (microseconds) is kept as is; missing numeric fields are stored as NaN.
+TICK_DTYPE = np.dtype([
+    ("timestamp", "i8"),
+    ("close", "f8"), ("open", "f8"), ("high", "f8"), ("low", "f8"),
+    ("mark_price", "f8"), ("spot_price", "f8"),
+    ("volume", "f8"), ("turnover", "f8"), ("turnover_usd", "f8"),
+    ("oi", "f8"), ("size", "f8"),
+    ("best_bid", "f8"), ("best_ask", "f8"), ("bid_size", "f8"), ("ask_size", "f8"),
+])
+
+# Fields read from data["quotes"] rather than the top level
+QUOTE_FIELDS = {"best_bid", "best_ask", "bid_size", "ask_size"}
+
+TICK_SUFFIX = ".ticks"
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def tick_to_record(data):
+    """Converts a ticker dict (as returned by fetch_data) to a TICK_DTYPE tuple."""
+    quotes = data.get("quotes") or {}
+    values = [int(data.get("timestamp", 0))]
+    for name in TICK_DTYPE.names[1:]:
+        values.append(_number(quotes.get(name) if name in QUOTE_FIELDS else data.get(name)))
+    return tuple(values)
+
+
+def tick_day(timestamp):
+    """UTC date ('YYYY-MM-DD') of an exchange timestamp; names the daily file."""
+    return datetime.fromtimestamp(to_epoch_seconds(timestamp), tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class TickRecorder:
+    """
+    Appends every ticker response for one symbol to a binary file per UTC
+    day (`{folder}/{symbol}/YYYY-MM-DD.ticks`).
+
+    Files are headerless arrays of TICK_DTYPE records, so they can be
+    memory-mapped as they are. Records are buffered and written every
+    `flush_every` ticks, on a day change and on close().
+    """
+    def __init__(self, symbol, folder=RECORD_DIR, flush_every=RECORD_FLUSH_EVERY):
+        self.folder = os.path.join(folder, symbol)
+        self.flush_every = max(1, flush_every)
+        self.buffer = np.empty(self.flush_every, dtype=TICK_DTYPE)
+        self.count = 0
+        self.day = None
+        self.file = None
+        self.recorded = 0
+        os.makedirs(self.folder, exist_ok=True)
+
+    def record(self, data):
+        """Buffers one ticker dict. Ticks without a timestamp are ignored."""
+        if not data or not data.get("timestamp"):
+            return
+        day = tick_day(data["timestamp"])
+        if day != self.day:
+            self._rotate(day)
+        self.buffer[self.count] = tick_to_record(data)
+        self.count += 1
+        self.recorded += 1
+        if self.count == self.flush_every:
+            self.flush()
+
+    def _rotate(self, day):
+        self.flush()
+        if self.file:
+            self.file.close()
+        path = os.path.join(self.folder, f"{day}{TICK_SUFFIX}")
+        self.file = open(path, "ab")
+        # Drop a partial record left by a crash so the file stays aligned
+        size = self.file.tell()
+        if size % TICK_DTYPE.itemsize:
+            self.file.truncate(size - size % TICK_DTYPE.itemsize)
+            self.file.seek(0, os.SEEK_END)
+        self.day = day
+
+    def flush(self):
+        """Writes the buffered records to the current day's file."""
+        if self.count and self.file:
+            self.file.write(self.buffer[:self.count].tobytes())
+            self.file.flush()
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        if self.file:
+            self.file.close()
+            self.file = None
+
+# ========== Reading ==========
+
+def open_tick_file(path):
+    """
+    Memory-maps one .ticks file as a read-only TICK_DTYPE array (no copy).
+    A partial record at the end (a write in progress) is left out.
+    """
+    count = os.path.getsize(path) // TICK_DTYPE.itemsize
+    if not count:
+        return np.empty(0, dtype=TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode="r", shape=(count,))
+
+
+def tick_files(symbol, folder=RECORD_DIR, start_day=None, end_day=None):
+    """Recorded .ticks files for `symbol`, oldest first, optionally limited to a day range."""
+    paths = sorted(glob.glob(os.path.join(folder, symbol, f"*{TICK_SUFFIX}")))
+    days = [os.path.basename(path)[:-len(TICK_SUFFIX)] for path in paths]
+    return [
+        path for path, day in zip(paths, days)
+        if (start_day is None or day >= start_day) and (end_day is None or day <= end_day)
+    ]
+
+
+def read_ticks(symbol, folder=RECORD_DIR, start_ts=None, end_ts=None):
+    """
+    Recorded ticks for `symbol` with start_ts <= timestamp <= end_ts (epoch
+    seconds or exchange microseconds), oldest first.
+
+    Returns a memmap view when the range falls in one day's file and a
+    concatenated copy when it spans several.
+    """
+    start_day = tick_day(start_ts) if start_ts is not None else None
+    end_day = tick_day(end_ts) if end_ts is not None else None
+    parts = []
+    for path in tick_files(symbol, folder, start_day, end_day):
+        ticks = open_tick_file(path)
+        seconds = to_epoch_seconds_array(ticks["timestamp"])
+        mask = np.ones(len(ticks), dtype=bool)
+        if start_ts is not None:
+            mask &= seconds >= to_epoch_seconds(start_ts)
+        if end_ts is not None:
+            mask &= seconds <= to_epoch_seconds(end_ts)
+        parts.append(ticks if mask.all() else ticks[mask])
+    if not parts:
+        return np.empty(0, dtype=TICK_DTYPE)
+    if len(parts) == 1:
+        return parts[0]
+    return np.concatenate(parts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or export recorded ticks.")
+    parser.add_argument("--symbol", default="BTCUSD")
+    parser.add_argument("--folder", default=RECORD_DIR)
+    parser.add_argument("--csv", help="Export the ticks to this CSV path")
+    args = parser.parse_args()
+
+    for path in tick_files(args.symbol, args.folder):
+        ticks = open_tick_file(path)
+        print(f"{os.path.basename(path)}: {len(ticks)} ticks")
+    if args.csv:
+        import pandas as pd
+        pd.DataFrame(np.asarray(read_ticks(args.symbol, args.folder))).to_csv(args.csv, index=False)
+        print(f"Exported to {args.csv}")
@@ -0,0 +1,97 @@
+
+
+# functions/replay.py
+
+import argparse
+import contextlib
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from constants import SYMBOL, REPLAY_DIR
+from functions.backtest import load_ticks
+from functions.data import set_log_file
+from functions.data_utils import write_state_file
+from functions.engine import TradingEngine
+from functions.recorder import TICK_SUFFIX, open_tick_file, read_ticks
+from functions.sources import ReplaySource, VirtualClock, run_loop
+
+
+def load_replay_ticks(path, symbol=SYMBOL):
+    """
+    Ticks to replay from a .ticks file, a recorder folder (every day
+    recorded for `symbol`) or any file backtest.load_ticks reads.
+    """
+    if os.path.isdir(path):
+        return read_ticks(symbol, path)
+    if path.endswith(TICK_SUFFIX):
+        return open_tick_file(path)
+    timestamps, prices, volumes = load_ticks(path)
+    ticks = np.empty(len(prices), dtype=[("timestamp", "i8"), ("close", "f8"), ("volume", "f8")])
+    ticks["timestamp"], ticks["close"], ticks["volume"] = timestamps, prices, volumes
+    return ticks
+
+
+def replay(ticks, symbol=SYMBOL, out_dir=None, paced=False, quiet=False):
+    """
+    Runs the live trading loop over recorded ticks on a virtual clock, so
+    no pause is actually slept.
+
+    The engine is the live TradingEngine; only its ledger, history and
+    log go to `out_dir` (a new folder under REPLAY_DIR by default) instead
+    of the live ones. The state file is written once, after the last tick.
+    `quiet` silences console output.
+
+    Returns:
+        (engine, summary dict)
+    """
+    out_dir = out_dir or os.path.join(REPLAY_DIR, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(out_dir, exist_ok=True)
+    set_log_file(os.path.join(out_dir, "trade.log"))
+
+    clock = VirtualClock()
+    engine = TradingEngine(
+        symbol,
+        ledger_path=os.path.join(out_dir, "trades.db"),
+        state_path=None,
+        history_dir=os.path.join(out_dir, "history"),
+        record=False,
+        snapshots=False,
+    )
+    source = ReplaySource(ticks, clock, paced)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext():
+            processed = run_loop(engine, source, clock)
+    elapsed = time.perf_counter() - start
+    if engine.last_values:
+        write_state_file(engine.build_state(*engine.last_values), os.path.join(out_dir, "state.json"))
+
+    summary = {
+        "ticks": processed,
+        "trades": engine.trade_book.closed_trades,
+        "total_profit": engine.trade_book.cumulative_profit,
+        "elapsed": elapsed,
+        "simulated_sleep": clock.slept,
+        "out_dir": out_dir,
+    }
+    return engine, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded ticks through the trading loop on a virtual clock.")
+    parser.add_argument("path", help=".ticks file, recorder folder, CSV or .npy")
+    parser.add_argument("--symbol", default=SYMBOL)
+    parser.add_argument("--out", help="Output folder (default: a new folder under REPLAY_DIR)")
+    parser.add_argument("--paced", action="store_true", help="Poll the recording on the loop's own delays")
+    parser.add_argument("--quiet", action="store_true", help="Do not print log lines")
+    args = parser.parse_args()
+
+    _, summary = replay(load_replay_ticks(args.path, args.symbol), args.symbol, args.out, args.paced, args.quiet)
+    print(f"Replayed {summary['ticks']} ticks in {summary['elapsed']:.2f}s "
+          f"({summary['simulated_sleep'] / 3600:.1f}h of pauses skipped)")
+    print(f"Trades: {summary['trades']} | Total Profit: ${summary['total_profit']:.2f}")
+    print(f"Ledger, state and log written to {summary['out_dir']}")
@@ -0,0 +1,107 @@
+
+
+# functions/replay_server.py
+
+import argparse
+import json
+import threading
+import time
+
+from websockets.sync.server import serve
+
+
+class ReplayServer:
+    """
+    Local stand-in for the Delta Exchange socket.
+
+    Accepts v2/ticker subscriptions and pushes the given ticks (dicts with
+    at least close, volume and timestamp) to each subscriber, `interval`
+    seconds apart. The replay position is shared, so a client that
+    reconnects carries on where it left off. `drop_after` closes every
+    connection after that many messages to exercise reconnects.
+    """
+    def __init__(self, ticks, host="127.0.0.1", port=0, interval=0.0, drop_after=None):
+        self.ticks = list(ticks)
+        self.interval = interval
+        self.drop_after = drop_after
+        self.position = 0
+        self.sent = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.server = serve(self._handle, host, port)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    @property
+    def finished(self):
+        return self.position >= len(self.ticks)
+
+    def _next(self):
+        with self.lock:
+            if self.position >= len(self.ticks):
+                return None
+            tick = self.ticks[self.position]
+            self.position += 1
+            self.sent += 1
+            return tick
+
+    def _handle(self, ws):
+        self.connections += 1
+        request = json.loads(ws.recv())
+        channels = request.get("payload", {}).get("channels", [])
+        symbols = [s for c in channels for s in c.get("symbols", [])]
+        symbol = symbols[0] if symbols else None
+
+        sent = 0
+        while self.drop_after is None or sent < self.drop_after:
+            tick = self._next()
+            if tick is None:
+                break
+            ws.send(json.dumps({"type": "v2/ticker", "symbol": symbol, **tick}))
+            sent += 1
+            if self.interval:
+                time.sleep(self.interval)
+        ws.close()
+
+    def start(self):
+        """Serves in a background thread and returns the ws:// URL."""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def ticks_from_file(path):
+    """Loads ticks for replay from a CSV or .npy file (see backtest.load_ticks)."""
+    from functions.backtest import load_ticks
+
+    timestamps, prices, volumes = load_ticks(path)
+    return [
+        {"close": float(p), "volume": float(v), "timestamp": int(t)}
+        for t, p, v in zip(timestamps, prices, volumes)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded ticks over a local WebSocket.")
+    parser.add_argument("path", help="CSV or .npy file with close/volume/timestamp")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between pushed ticks")
+    args = parser.parse_args()
+
+    replay = ReplayServer(ticks_from_file(args.path), port=args.port, interval=args.interval)
+    print(f"Replaying {len(replay.ticks)} ticks at {replay.url}")
+    replay.server.serve_forever()
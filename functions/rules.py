@@ -0,0 +1,205 @@
+
+
+# functions/rules.py
+
+import json
+import keyword
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from constants import USE_EMA, USE_MACD, USE_RSI, USE_VWAP, RSI_HIGH_LEVEL, RSI_LOW_LEVEL
+
+# Values every rule set can refer to, in the order decide() takes them
+FIELDS = ("price", "ema", "macd", "signal", "rsi", "vwap")
+OPS = (">", ">=", "<", "<=", "==", "!=")
+SIGNALS = ("BUY", "SELL")
+
+# A rule set maps "BUY" and "SELL" to a condition. A condition is
+#   {"all": [conditions]}, {"any": [conditions]} or a list (same as "all"),
+# or a leaf comparison
+#   {"name": "EMA", "left": "price", "op": ">", "right": "ema"}
+# whose operands are FIELDS names or finite numbers. A comparison involving a
+# missing (None / NaN) value is False. BUY is checked first.
+
+
+def default_rules(use_ema=USE_EMA, use_macd=USE_MACD, use_rsi=USE_RSI, use_vwap=USE_VWAP,
+                  rsi_high=RSI_HIGH_LEVEL, rsi_low=RSI_LOW_LEVEL):
+    """The rules of check_entry_criteria for the given toggles and RSI levels."""
+    buy, sell = [], []
+    if use_ema:
+        buy.append({"name": "EMA", "left": "price", "op": ">", "right": "ema"})
+        sell.append({"name": "EMA", "left": "price", "op": "<", "right": "ema"})
+    if use_macd:
+        buy.append({"name": "MACD", "left": "macd", "op": ">", "right": "signal"})
+        sell.append({"name": "MACD", "left": "macd", "op": "<", "right": "signal"})
+    if use_rsi:
+        buy.append({"name": "RSI", "left": "rsi", "op": ">", "right": rsi_high})
+        sell.append({"name": "RSI", "left": "rsi", "op": "<", "right": rsi_low})
+    if use_vwap:
+        buy.append({"name": "VWAP", "left": "price", "op": ">", "right": "vwap"})
+        sell.append({"name": "VWAP", "left": "price", "op": "<", "right": "vwap"})
+    return {"BUY": {"all": buy}, "SELL": {"all": sell}}
+
+
+def load_rules(path):
+    """Reads a rule set from a JSON file."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# ========== Compiler ==========
+
+class _Compiler:
+    """Turns one condition tree into scalar and NumPy expression strings."""
+    def __init__(self):
+        self.fields = list(FIELDS)
+
+    def operand(self, value, name):
+        if isinstance(value, str):
+            # decide() only ever gets FIELDS, so any other name could never be true
+            if value not in self.fields or keyword.iskeyword(value):
+                raise ValueError(f"Rule {name!r}: unknown field {value!r} (fields: {', '.join(self.fields)})")
+            return value, True
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if not math.isfinite(value):
+                raise ValueError(f"Rule {name!r}: constants must be finite, got {value!r}")
+            return repr(float(value)), False
+        raise ValueError(f"Rule {name!r}: operands must be field names or numbers, got {value!r}")
+
+    def leaf(self, rule):
+        op = rule.get("op")
+        name = rule.get("name") or f"{rule.get('left')} {op} {rule.get('right')}"
+        if op not in OPS:
+            raise ValueError(f"Rule {name!r}: unknown operator {op!r}")
+        left, left_field = self.operand(rule["left"], name)
+        right, right_field = self.operand(rule["right"], name)
+
+        checks = [f"{v} is not None" for v, is_field in ((left, left_field), (right, right_field)) if is_field]
+        scalar = "(" + " and ".join(checks + [f"{left} {op} {right}"]) + ")"
+
+        def column(v, is_field):
+            return f"_v[{v!r}]" if is_field else v
+        vector = f"({column(left, left_field)} {op} {column(right, right_field)})"
+        if op == "!=":
+            # NaN != x is True; a missing value must fail like in the scalar form
+            for v, is_field in ((left, left_field), (right, right_field)):
+                if is_field:
+                    vector = f"({vector} & ~_np.isnan(_v[{v!r}]))"
+        return name, scalar, vector
+
+    def node(self, rule, leaves):
+        """Returns (scalar, vector) expressions and appends (name, scalar, vector) per leaf."""
+        if isinstance(rule, list):
+            rule = {"all": rule}
+        if "all" in rule or "any" in rule:
+            join = "all" if "all" in rule else "any"
+            children = [self.node(child, leaves) for child in rule[join]]
+            if not children:
+                return ("True", "_true") if join == "all" else ("False", "_false")
+            scalar_op, vector_op = (" and ", " & ") if join == "all" else (" or ", " | ")
+            return (
+                "(" + scalar_op.join(c[0] for c in children) + ")",
+                "(" + vector_op.join(c[1] for c in children) + ")",
+            )
+        name, scalar, vector = self.leaf(rule)
+        leaves.append((name, scalar, vector))
+        return scalar, vector
+
+
+class RuleSet:
+    """
+    A BUY/SELL rule set compiled once into plain Python and NumPy code.
+
+    decide(price, ema, macd, signal, rsi, vwap) is the live hot path: one
+    generated function that short-circuits on the first failed condition
+    and builds no dicts. criteria() gives the per-condition breakdown for
+    logging, and evaluate() returns (signal, criteria) exactly like
+    check_entry_criteria. masks()/signals() evaluate the same rules over
+    whole arrays for backtests.
+    """
+    def __init__(self, rules):
+        self.rules = rules
+        compiler = _Compiler()
+        sides = {}
+        for side in SIGNALS:
+            leaves = []
+            scalar, vector = compiler.node(rules.get(side, {"any": []}), leaves)
+            sides[side] = (scalar, vector, leaves)
+        self.fields = tuple(compiler.fields)
+
+        args = ", ".join(f"{field}=None" for field in self.fields)
+        lines = [
+            f"def decide({args}):",
+            f"    if {sides['BUY'][0]}:",
+            "        return 'BUY'",
+            f"    if {sides['SELL'][0]}:",
+            "        return 'SELL'",
+            "    return 'HOLD'",
+            "",
+            "def masks(_v, _n):",
+            "    _true = _np.ones(_n, dtype=bool)",
+            "    _false = _np.zeros(_n, dtype=bool)",
+            f"    return _true & {sides['BUY'][1]}, _true & {sides['SELL'][1]}",
+        ]
+        for side in SIGNALS:
+            leaves = sides[side][2]
+            lines += [
+                "",
+                f"def criteria_{side}({args}):",
+                "    return {" + ", ".join(f"{name!r}: {scalar}" for name, scalar, _ in leaves) + "}",
+                "",
+                f"def criteria_masks_{side}(_v, _n):",
+                "    return {" + ", ".join(f"{name!r}: {vector}" for name, _, vector in leaves) + "}",
+            ]
+        self.source = "\n".join(lines) + "\n"
+
+        namespace = {"_np": np}
+        exec(compile(self.source, "<rules>", "exec"), namespace)
+        self.decide = namespace["decide"]
+        self._masks = namespace["masks"]
+        self._criteria = {side: namespace[f"criteria_{side}"] for side in SIGNALS}
+        self._criteria_masks = {side: namespace[f"criteria_masks_{side}"] for side in SIGNALS}
+
+    def criteria(self, signal, *values):
+        """{condition name: bool} for the BUY or SELL side."""
+        return self._criteria[signal](*values)
+
+    def evaluate(self, *values):
+        """Same (signal, criteria) as check_entry_criteria; HOLD reports the BUY side."""
+        signal = self.decide(*values)
+        return signal, self._criteria["SELL" if signal == "SELL" else "BUY"](*values)
+
+    # ---- Vectorized ----
+    def _columns(self, arrays):
+        n = len(arrays["price"])
+        columns = {}
+        for field in self.fields:
+            column = arrays.get(field)
+            columns[field] = np.full(n, np.nan) if column is None else np.asarray(column, dtype=np.float64)
+        return columns, n
+
+    def masks(self, arrays):
+        """(buy, sell) boolean arrays for a dict of equal-length arrays keyed by field."""
+        columns, n = self._columns(arrays)
+        return self._masks(columns, n)
+
+    def criteria_masks(self, signal, arrays):
+        """{condition name: bool array} for the BUY or SELL side."""
+        columns, n = self._columns(arrays)
+        return self._criteria_masks[signal](columns, n)
+
+    def signals(self, arrays):
+        """int8 array: 1 for BUY, -1 for SELL, 0 for HOLD (BUY wins like decide())."""
+        buy, sell = self.masks(arrays)
+        signals = np.zeros(len(buy), dtype=np.int8)
+        signals[sell] = -1
+        signals[buy] = 1
+        return signals
+
+
+@lru_cache(maxsize=64)
+def default_rule_set(use_ema=USE_EMA, use_macd=USE_MACD, use_rsi=USE_RSI, use_vwap=USE_VWAP,
+                     rsi_high=RSI_HIGH_LEVEL, rsi_low=RSI_LOW_LEVEL):
+    """Compiled default_rules, cached per combination of settings."""
+    return RuleSet(default_rules(use_ema, use_macd, use_rsi, use_vwap, rsi_high, rsi_low))
@@ -0,0 +1,93 @@
+
+
+# functions/runner.py
+
+import argparse
+import asyncio
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import SYMBOLS
+from functions.data import BASE_URL, fetch_data, fetch_many, log_and_print
+from functions.engine import TradingEngine
+from functions.latency import tracker as latency, install_profile_signal
+
+
+def create_engine(symbol):
+    """Builds an engine with its own state file for `symbol`; trades share the ledger."""
+    return TradingEngine(symbol, state_path=f"state_{symbol}.json")
+
+
+async def run_symbol(engine, base_url=BASE_URL, max_ticks=None, time_scale=1.0):
+    """
+    Polling loop for one symbol. The fetch runs in a worker thread so other
+    symbols keep trading while this one waits on the network.
+
+    `max_ticks` stops the loop after that many polls and `time_scale`
+    multiplies every pause (0 disables them); both are meant for tests
+    against the stub server.
+    """
+    polls = 0
+    while max_ticks is None or polls < max_ticks:
+        polls += 1
+        if engine.scheduler:
+            engine.scheduler.poll_started(time.time())
+        start = latency.now()
+        data = await asyncio.to_thread(fetch_data, engine.symbol, base_url)
+        latency.since("fetch", start)
+        if not data:
+            await asyncio.sleep(engine.idle_delay() * time_scale)
+            continue
+        pause = engine.on_tick(data)
+        if engine.scheduler:
+            pause = engine.scheduled_delay(time.time())
+        await asyncio.sleep(pause * time_scale)
+    return engine
+
+
+async def run(symbols, base_url=BASE_URL, max_ticks=None, time_scale=1.0):
+    """Trades every symbol concurrently. Returns the engines when all loops stop."""
+    # One fetch thread per symbol so polls never queue behind each other
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max(1, len(symbols))))
+    engines = [create_engine(symbol) for symbol in symbols]
+    log_and_print(f"🚀 Trading {len(engines)} symbols: {', '.join(symbols)}")
+    return await asyncio.gather(*(
+        run_symbol(engine, base_url, max_ticks, time_scale) for engine in engines
+    ))
+
+
+async def run_batched(symbols, base_url=BASE_URL, max_ticks=None, time_scale=1.0):
+    """
+    Like run(), but fetches every symbol with one batch request per poll.
+    Each engine still keeps its own pace: it only gets a tick once the
+    pause it asked for has passed.
+    """
+    engines = {symbol: create_engine(symbol) for symbol in symbols}
+    due = {symbol: 0 for symbol in symbols}
+    log_and_print(f"🚀 Trading {len(engines)} symbols (batched): {', '.join(symbols)}")
+    polls = 0
+    while max_ticks is None or polls < max_ticks:
+        polls += 1
+        tickers = await asyncio.to_thread(fetch_many, symbols, base_url)
+        now = time.monotonic()
+        for symbol, engine in engines.items():
+            if due[symbol] > now:
+                continue
+            data = tickers.get(symbol)
+            pause = engine.on_tick(data) if data else engine.idle_delay()
+            due[symbol] = now + pause * time_scale
+        await asyncio.sleep(max(0, min(due.values()) - time.monotonic()))
+    return list(engines.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trade several symbols in one process.")
+    parser.add_argument("--symbols", nargs="+", default=SYMBOLS)
+    parser.add_argument("--base-url", default=BASE_URL, help="Ticker endpoint (e.g. a local stub server)")
+    parser.add_argument("--batch", action="store_true", help="Fetch all symbols in one request per poll")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    install_profile_signal()
+    asyncio.run((run_batched if args.batch else run)(args.symbols, args.base_url))
@@ -0,0 +1,149 @@
+
+
+# functions/scheduler.py
+
+import math
+from collections import deque
+
+from constants import (
+    SCHEDULER_MIN_INTERVAL, SCHEDULER_POSITION_INTERVAL, SCHEDULER_IDLE_INTERVAL,
+    SCHEDULER_NEAR_BAND, SCHEDULER_VOL_Z, SCHEDULER_SPIKE_RATIO, SCHEDULER_MAX_RATE, SCHEDULER_BURST,
+)
+
+
+class PollScheduler:
+    """
+    Picks when to poll next, on fixed deadlines measured from the start of
+    the previous poll, so time spent fetching and processing is taken off
+    the wait instead of added to it.
+
+    The interval depends on the situation:
+      - in a position, it shrinks from `position_interval` towards
+        `min_interval` as price gets within `near_band` (relative distance)
+        of the take-profit, stop-loss or trailing level, and further if
+        recent volatility could cover that distance (a `vol_z`-sigma move)
+        before the next poll;
+      - when flat it stays at `idle_interval` unless short-term volatility
+        jumps to `spike_ratio` times its longer-run level.
+    A token bucket (`max_rate` polls per minute, bursts of `burst`) caps
+    the request rate whatever the interval says.
+    """
+    def __init__(self, min_interval=SCHEDULER_MIN_INTERVAL, position_interval=SCHEDULER_POSITION_INTERVAL,
+                 idle_interval=SCHEDULER_IDLE_INTERVAL, near_band=SCHEDULER_NEAR_BAND, vol_z=SCHEDULER_VOL_Z,
+                 spike_ratio=SCHEDULER_SPIKE_RATIO, max_rate=SCHEDULER_MAX_RATE, burst=SCHEDULER_BURST):
+        self.min_interval = min_interval
+        self.position_interval = position_interval
+        self.idle_interval = idle_interval
+        self.near_band = near_band
+        self.vol_z = vol_z
+        self.spike_ratio = spike_ratio
+        self.token_rate = max_rate / 60
+        self.burst = burst
+
+        self.tokens = burst
+        self.token_time = None
+        self.last_poll = None
+        self.deadline = None
+        self.poll_times = deque(maxlen=120)
+
+        # EWMA of squared log returns per second, fast and slow
+        self.last_price = None
+        self.last_price_time = None
+        self.var_fast = None
+        self.var_slow = None
+
+        self.target_interval = idle_interval
+        self.reason = "idle"
+        self.polls = 0
+        self.throttled = 0
+        self.overruns = 0
+        self.lateness = 0.0
+
+    # ---- Rate Budget ----
+    def _refill(self, now):
+        if self.token_time is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.token_time) * self.token_rate)
+        self.token_time = now
+
+    def poll_started(self, now):
+        """Call right before each fetch."""
+        if self.deadline is not None and now > self.deadline:
+            self.lateness += now - self.deadline
+        self._refill(now)
+        self.tokens -= 1
+        self.polls += 1
+        self.last_poll = now
+        self.poll_times.append(now)
+
+    # ---- Volatility ----
+    def observe(self, now, price):
+        """Updates the volatility estimate with a new price."""
+        if self.last_price and price > 0 and now > self.last_price_time:
+            rate = math.log(price / self.last_price) ** 2 / (now - self.last_price_time)
+            self.var_fast = rate if self.var_fast is None else 0.3 * rate + 0.7 * self.var_fast
+            self.var_slow = rate if self.var_slow is None else 0.02 * rate + 0.98 * self.var_slow
+        self.last_price = price
+        self.last_price_time = now
+
+    def choose_interval(self, price, levels):
+        """(interval, reason) for the current price and exit levels (empty when flat)."""
+        if not levels:
+            if self.var_fast and self.var_slow:
+                ratio = math.sqrt(self.var_fast / self.var_slow)
+                if ratio >= self.spike_ratio:
+                    return max(self.min_interval, self.idle_interval / ratio), "volatility"
+            return self.idle_interval, "idle"
+
+        distance = min(abs(price - level) for level in levels) / price
+        interval = self.min_interval + (self.position_interval - self.min_interval) * min(1.0, distance / self.near_band)
+        reason = "near level" if distance < self.near_band else "position"
+        if self.var_fast:
+            # Time for a vol_z-sigma move to reach the nearest level
+            reach = (distance / (self.vol_z * math.sqrt(self.var_fast))) ** 2
+            if reach < interval:
+                interval, reason = reach, "volatility"
+        return max(self.min_interval, min(interval, self.position_interval)), reason
+
+    def next_sleep(self, now, price, levels=(), minimum=0):
+        """
+        Seconds to wait before the next poll. `minimum` is a pause that must
+        be honoured in full (e.g. the cool-down after an exit).
+        """
+        self.observe(now, price)
+        self.target_interval, self.reason = self.choose_interval(price, levels)
+
+        base = self.last_poll if self.last_poll is not None else now
+        deadline = max(base + self.target_interval, now + minimum)
+
+        self._refill(now)
+        if self.tokens < 1:
+            ready = now + (1 - self.tokens) / self.token_rate
+            if ready > deadline:
+                deadline = ready
+                self.throttled += 1
+        if deadline < now:
+            # Processing took longer than the interval: poll now, don't try to catch up
+            self.overruns += 1
+            deadline = now
+        self.deadline = deadline
+        return deadline - now
+
+    # ---- Stats ----
+    def achieved_rate(self):
+        """Polls per minute over the recent polls."""
+        if len(self.poll_times) < 2 or self.poll_times[-1] == self.poll_times[0]:
+            return 0.0
+        return (len(self.poll_times) - 1) * 60 / (self.poll_times[-1] - self.poll_times[0])
+
+    def stats(self):
+        return {
+            "reason": self.reason,
+            "target_interval": round(self.target_interval, 3),
+            "target_rate": round(60 / self.target_interval, 2),
+            "achieved_rate": round(self.achieved_rate(), 2),
+            "budget_rate": round(self.token_rate * 60, 2),
+            "polls": self.polls,
+            "throttled": self.throttled,
+            "overruns": self.overruns,
+            "mean_lateness_ms": round(self.lateness / self.polls * 1000, 2) if self.polls else 0.0,
+        }
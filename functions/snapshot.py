@@ -0,0 +1,222 @@
+
+
+# functions/snapshot.py
+
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from constants import RECORD_DIR, BACKFILL_TICKS
+from functions.candles import Candle
+from functions.recorder import open_tick_file, tick_files
+from functions.trade_book import TradeRecord
+from functions.utils import to_epoch_seconds_array
+
+SNAPSHOT_VERSION = 1
+INDICATORS = ("ema_indicator", "macd_indicator", "rsi_indicator", "vwap_indicator")
+
+
+# ========== Indicator State ==========
+
+def dump_indicator(indicator):
+    """Plain-data copy of a streaming indicator's attributes (nested ones included)."""
+    state = {}
+    for name, value in vars(indicator).items():
+        if isinstance(value, deque):
+            state[name] = list(value)
+        elif hasattr(value, "__dict__"):
+            state[name] = dump_indicator(value)
+        else:
+            state[name] = value
+    return state
+
+
+def load_indicator(indicator, state):
+    """Restores what dump_indicator() saved into an indicator of the same kind."""
+    for name, value in state.items():
+        current = getattr(indicator, name, None)
+        if isinstance(current, deque):
+            current.clear()
+            current.extend(value)
+        elif hasattr(current, "__dict__"):
+            load_indicator(current, value)
+        else:
+            setattr(indicator, name, value)
+
+
+def _dump_candle(candle):
+    return {name: getattr(candle, name) for name in Candle.__slots__}
+
+
+def _load_candle(fields):
+    candle = Candle.__new__(Candle)
+    for name, value in fields.items():
+        setattr(candle, name, value)
+    return candle
+
+
+def dump_candles(aggregator):
+    """
+    Per-timeframe bar state and indicators of a CandleAggregator: the open
+    bars, the last closed bar (all that new ticks are checked against) and
+    the bar-close indicators.
+    """
+    state = {}
+    for name, series in aggregator.series.items():
+        state[name] = {
+            "latest_ts": series.latest_ts,
+            "late_ticks": series.late_ticks,
+            "bars": [_dump_candle(series.bars[-1])] if series.bars else [],
+            "open_bars": [_dump_candle(candle) for candle in series.open_bars.values()],
+            "indicators": dump_indicator(aggregator.indicators[name]),
+        }
+    return state
+
+
+def load_candles(aggregator, state):
+    """Restores what dump_candles() saved, for the timeframes both still have."""
+    for name, saved in state.items():
+        series = aggregator.series.get(name)
+        if series is None:
+            continue
+        series.latest_ts = saved["latest_ts"]
+        series.late_ticks = saved["late_ticks"]
+        series.bars.clear()
+        series.bars.extend(_load_candle(fields) for fields in saved["bars"])
+        series.open_bars = {fields["start"]: _load_candle(fields) for fields in saved["open_bars"]}
+        load_indicator(aggregator.indicators[name], saved["indicators"])
+
+# ========== Snapshots ==========
+
+def engine_snapshot(engine):
+    """Everything needed to carry on trading after a restart, as a JSON-ready dict."""
+    open_record = engine.trade_book.get(engine.trade_no) if engine.position else None
+    return {
+        "version": SNAPSHOT_VERSION,
+        "symbol": engine.symbol,
+        "saved_at": time.time(),
+        "last_tick": engine.last_tick,
+        "position": engine.position,
+        "entry_price": engine.entry_price,
+        "entry_time": engine.entry_time,
+        "extreme_price": engine.extreme_price,
+        "total_profit": engine.total_profit,
+        "trade_no": engine.trade_no,
+        "cumulative_profit": engine.trade_book.cumulative_profit,
+        "closed_trades": engine.trade_book.closed_trades,
+        "open_record": {name: getattr(open_record, name) for name in TradeRecord.__slots__} if open_record else None,
+        "indicators": {
+            name: dump_indicator(getattr(engine, name)) for name in INDICATORS if getattr(engine, name) is not None
+        },
+        "candles": dump_candles(engine.indicators.candles) if engine.indicators.candles else None,
+    }
+
+
+def save_snapshot(snapshot, path):
+    """Writes the snapshot atomically (temp file + rename)."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    """The saved snapshot, or None if there is none or it can't be read."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot if snapshot.get("version") == SNAPSHOT_VERSION else None
+
+
+def apply_snapshot(engine, snapshot, indicators=True):
+    """Puts the engine back in the saved state (indicators too unless indicators=False)."""
+    engine.position = snapshot["position"]
+    engine.entry_price = snapshot["entry_price"]
+    engine.entry_time = snapshot["entry_time"]
+    engine.extreme_price = snapshot["extreme_price"]
+    engine.total_profit = snapshot["total_profit"]
+    engine.trade_no = snapshot["trade_no"]
+    engine.last_tick = snapshot["last_tick"]
+    engine.trade_book.cumulative_profit = snapshot["cumulative_profit"]
+    engine.trade_book.closed_trades = snapshot["closed_trades"]
+
+    fields = snapshot.get("open_record")
+    if fields:
+        record = TradeRecord.__new__(TradeRecord)
+        for name, value in fields.items():
+            setattr(record, name, value)
+        engine.trade_book.open(record)
+
+    if not indicators:
+        return
+    for name, state in snapshot["indicators"].items():
+        if getattr(engine, name, None) is not None:
+            load_indicator(getattr(engine, name), state)
+    # Snapshots from before bars were saved have no "candles"
+    if engine.indicators.candles and snapshot.get("candles"):
+        load_candles(engine.indicators.candles, snapshot["candles"])
+    engine.indicators.reload_values()
+
+# ========== Backfill ==========
+
+def recorded_ticks(symbol, after=None, limit=BACKFILL_TICKS, folder=RECORD_DIR):
+    """
+    Up to the last `limit` recorded ticks for `symbol` (timestamp, close, volume, ...),
+    newer than the raw exchange timestamp `after` if given. Only the
+    newest daily files are opened. None if nothing was recorded.
+    """
+    parts = []
+    total = 0
+    for path in reversed(tick_files(symbol, folder)):
+        ticks = open_tick_file(path)
+        newer = ticks if after is None else ticks[ticks["timestamp"] > after]
+        if len(newer):
+            parts.append(newer[-(limit - total):])
+            total += len(parts[-1])
+        if total >= limit or len(newer) < len(ticks):
+            break
+    if not parts:
+        return None
+    return np.concatenate(parts[::-1])
+
+
+def history_ticks(history, after=None, limit=BACKFILL_TICKS):
+    """
+    The same from the engine's own price history (epoch seconds `after`).
+    History has no volume, so VWAP is not backfilled from it.
+    """
+    rows = history.range(None if after is None else after + 1e-6)[-limit:]
+    if not len(rows):
+        return None
+    ticks = np.zeros(len(rows), dtype=[("timestamp", "i8"), ("close", "f8"), ("volume", "f8")])
+    ticks["timestamp"] = rows["ts"]
+    ticks["close"] = rows["price"]
+    return ticks
+
+
+def backfill(engine, ticks):
+    """
+    Feeds prices (and volumes) into the engine's indicators; no trading
+    decisions, ledger writes or state files. Ticks with timestamps go
+    through the full update(), so candles and bar-timeframe indicators
+    are rebuilt too; without them only the tick-timeframe series move.
+    """
+    volumes = np.nan_to_num(ticks["volume"] if "volume" in ticks.dtype.names else np.zeros(len(ticks))).tolist()
+    prices = ticks["close"].tolist()
+    if "timestamp" in ticks.dtype.names:
+        update = engine.indicators.update
+        for ts, price, volume in zip(to_epoch_seconds_array(ticks["timestamp"]).tolist(), prices, volumes):
+            update(ts, price, volume)
+    else:
+        warm = engine.indicators.warm
+        for price, volume in zip(prices, volumes):
+            warm(price, volume)
+    return len(ticks)
@@ -0,0 +1,152 @@
+
+
+# functions/sources.py
+
+import time
+
+import numpy as np
+
+from functions.data import BASE_URL, fetch_data
+from functions.latency import tracker as latency
+from functions.utils import to_epoch_seconds, to_epoch_seconds_array
+
+
+# ========== Clocks ==========
+
+class SystemClock:
+    """Wall-clock time; sleep() really sleeps. Used by the live loop."""
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Simulated time for replays. sleep() returns immediately and only moves
+    now() forward; `slept` adds up the time the loop would have waited.
+    """
+    def __init__(self, start=0.0):
+        self.time = float(start)
+        self.slept = 0.0
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.time += seconds
+            self.slept += seconds
+
+    def advance_to(self, timestamp):
+        """Jumps forward to `timestamp` (never backwards)."""
+        self.time = max(self.time, timestamp)
+
+# ========== Data Sources ==========
+# next_tick() returns a ticker dict, {} when there is no data this time
+# (the loop waits and polls again) or None when the source is exhausted.
+
+class LiveSource:
+    """Polls the ticker API through fetch_data."""
+    def __init__(self, symbol, base_url=BASE_URL):
+        self.symbol = symbol
+        self.base_url = base_url
+
+    def next_tick(self):
+        return fetch_data(self.symbol, self.base_url)
+
+
+class ReplaySource:
+    """
+    Feeds recorded ticks: a TICK_DTYPE array from functions/recorder.py,
+    any structured array with timestamp/close/volume fields, or a list of
+    ticker dicts.
+
+    By default every tick is returned once, in order, and `clock` (if
+    given) is moved to each tick's time. With paced=True the source acts
+    like polling the live API on the clock instead: each call returns the
+    newest tick at or before clock.now(), so the loop's own delays decide
+    which ticks it sees.
+    """
+    def __init__(self, ticks, clock=None, paced=False):
+        self.ticks = ticks
+        self.clock = clock
+        self.paced = paced
+        self.index = 0
+        self.fields = None
+        if isinstance(ticks, np.ndarray):
+            self.fields = [name for name in ticks.dtype.names if name != "timestamp"]
+        self.times = None
+        if paced:
+            stamps = ticks["timestamp"] if self.fields else [t["timestamp"] for t in ticks]
+            self.times = to_epoch_seconds_array(stamps, exact=True)
+        if clock is not None and len(ticks):
+            first = self.ticks[0]["timestamp"]
+            clock.advance_to(to_epoch_seconds(int(first), exact=True))
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def _tick(self, i):
+        tick = self.ticks[i]
+        if self.fields is None:
+            return tick
+        data = {"timestamp": int(tick["timestamp"])}
+        for name in self.fields:
+            value = float(tick[name])
+            if value == value:  # skip NaN (field missing in the original response)
+                data[name] = value
+        return data
+
+    def next_tick(self):
+        if self.paced:
+            # Newest tick not after the clock; the end is reached once the
+            # clock passes the last tick
+            if self.index >= len(self.ticks) or self.clock.now() > self.times[-1]:
+                return None
+            self.index = max(self.index, int(np.searchsorted(self.times, self.clock.now(), side="right")))
+            return self._tick(self.index - 1)
+
+        if self.index >= len(self.ticks):
+            return None
+        data = self._tick(self.index)
+        self.index += 1
+        if self.clock is not None:
+            self.clock.advance_to(to_epoch_seconds(data["timestamp"], exact=True))
+        return data
+
+# ========== Loop ==========
+
+def run_loop(engine, source, clock, max_ticks=None):
+    """
+    The j1.py polling loop over any source and clock. Runs until the
+    source is exhausted (never, for the live API) or `max_ticks` ticks were
+    processed. Returns the number of ticks processed.
+
+    When the engine has a scheduler, it decides the pause after each tick
+    instead of the fixed delays.
+    """
+    ticks = 0
+    scheduler = engine.scheduler
+    while max_ticks is None or ticks < max_ticks:
+        if scheduler:
+            scheduler.poll_started(clock.now())
+        start = latency.now()
+        data = source.next_tick()
+        latency.since("fetch", start)
+        latency.tick_start = start
+        if data is None:
+            break
+        if not data:
+            clock.sleep(engine.idle_delay())
+            continue
+
+        # ---- Process Tick & Sleep Before Next Iteration ----
+        pause = engine.on_tick(data)
+        if scheduler:
+            pause = engine.scheduled_delay(clock.now())
+        clock.sleep(pause)
+        ticks += 1
+    return ticks
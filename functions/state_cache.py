@@ -0,0 +1,75 @@
+
+
+# functions/state_cache.py
+
+import os
+import threading
+import time
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from functions.data_utils import StateReader
+
+
+class SharedStateCache(FileSystemEventHandler):
+    """
+    One state reader shared by every dashboard session in the process.
+
+    A watchdog observer re-reads the state file only when the bot publishes
+    a new snapshot; sessions just take the cached copy with get(). If no
+    file event arrives for `fallback_interval` seconds, get() checks the
+    file itself (a single stat when unchanged) in case events are not
+    delivered, e.g. on network filesystems.
+    """
+    def __init__(self, path="state.json", fallback_interval=5.0):
+        self.path = os.path.abspath(path)
+        self.fallback_interval = fallback_interval
+        self.reader = StateReader(self.path)
+        self.lock = threading.Lock()
+        self.seq = None
+        self.published_at = None  # file mtime of the cached snapshot
+        self.last_check = 0
+        self.reads = 0
+        self._refresh()
+
+        self.observer = Observer()
+        self.observer.schedule(self, os.path.dirname(self.path) or ".", recursive=False)
+        self.observer.daemon = True
+        self.observer.start()
+
+    def _refresh(self):
+        with self.lock:
+            self.last_check = time.monotonic()
+            state, changed = self.reader.read()
+            if changed:
+                self.reads += 1
+                self.seq = state.get("seq", self.reads)
+                try:
+                    self.published_at = os.stat(self.path).st_mtime
+                except FileNotFoundError:
+                    pass
+
+    def on_any_event(self, event):
+        # Atomic publishes show up as a move of the temp file onto the path
+        paths = (getattr(event, "dest_path", None), event.src_path)
+        if any(p and os.path.abspath(p) == self.path for p in paths):
+            self._refresh()
+
+    def get(self):
+        """
+        Returns:
+            (state: dict, seq) for the latest published snapshot
+        """
+        if time.monotonic() - self.last_check > self.fallback_interval:
+            self._refresh()
+        return self.reader.state, self.seq
+
+    def staleness(self):
+        """Seconds since the cached snapshot was published (None if there is none)."""
+        if self.published_at is None:
+            return None
+        return max(0.0, time.time() - self.published_at)
+
+    def stop(self):
+        self.observer.stop()
@@ -0,0 +1,140 @@
+
+
+# functions/strategies.py
+
+import argparse
+import json
+import os
+import warnings
+
+from constants import SYMBOL, STRATEGIES_PATH, STRATEGY_DIR, SNAPSHOT_DIR, USE_RECORDER, USE_SNAPSHOTS
+from functions.data import BASE_URL, log_and_print
+from functions.engine import TradingEngine
+from functions.indicator_cache import IndicatorCache
+from functions.latency import tracker as latency
+from functions.params import default_params
+from functions.recorder import TickRecorder
+from functions.utils import to_epoch_seconds
+
+
+def load_strategies(path=STRATEGIES_PATH):
+    """
+    Reads a JSON list of strategy configs, e.g.
+    [{"name": "tight", "take_profit": 0.005, "stop_loss": 0.0025}, {"name": "rsi_off", "use_rsi": false}].
+    Keys other than "name" override default_params().
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class StrategyHost:
+    """
+    Several strategy variants trading one symbol off one feed.
+
+    Each variant is a TradingEngine with its own parameters, position,
+    ledger, state file and history under `folder/<name>`. They share one
+    IndicatorCache: every distinct (indicator, params, timeframe) series is
+    updated once per tick here, however many variants read it.
+
+    A variant in a position sees every tick, so exits are checked as soon
+    as the price moves (on every pushed tick under USE_STREAM). A flat
+    variant keeps its own pace: it only looks for entries once the pause it
+    asked for (e.g. PAUSE_AFTER_EACH_TRADE after an exit) has passed on the
+    tick clock. The host asks to be polled again when the first one is due,
+    so it can stand in for a single engine in run_loop() or j1.py.
+    """
+    def __init__(self, symbol, strategies, folder=STRATEGY_DIR, record=USE_RECORDER, snapshots=USE_SNAPSHOTS):
+        self.symbol = symbol
+        self.indicators = IndicatorCache()
+        self.recorder = TickRecorder(symbol) if record else None
+        self.scheduler = None
+        self.just_exited = False  # pauses after exits are handled per variant
+        self.engines = []
+        self.names = []
+
+        known = set(default_params())
+        for config in strategies:
+            params = dict(config)
+            name = params.pop("name")
+            unknown = set(params) - known
+            if unknown:
+                raise ValueError(f"Strategy {name}: unknown parameters {sorted(unknown)}")
+            if name in self.names:
+                raise ValueError(f"Duplicate strategy name: {name}")
+            path = os.path.join(folder, name)
+            os.makedirs(path, exist_ok=True)
+            self.engines.append(TradingEngine(
+                symbol, ledger_path=os.path.join(path, "trades.db"), state_path=os.path.join(path, "state.json"),
+                record=False, history_dir=os.path.join(path, "history"), snapshots=False,
+                name=f"{symbol}_{name}", params=params, indicators=self.indicators,
+            ))
+            self.names.append(name)
+
+        # Restore once every series is subscribed, so the shared cache is warmed up in one go
+        if snapshots:
+            for engine in self.engines:
+                engine.snapshot_path = os.path.join(SNAPSHOT_DIR, f"{engine.name}.json")
+                engine.restore()
+
+        self.due = [0] * len(self.engines)
+        log_and_print(
+            f"🧪 {len(self.engines)} strategies on {symbol} | "
+            f"{len(self.indicators.series)} indicator series for {sum(self.indicators.subscribers.values())} subscriptions"
+        )
+
+    def idle_delay(self):
+        return min(engine.idle_delay() for engine in self.engines)
+
+    def on_tick(self, data):
+        """
+        Updates the shared indicators once, then runs every variant that is
+        in a position or due.
+
+        Returns:
+            seconds until the next variant is due
+        """
+        if self.recorder:
+            self.recorder.record(data)
+        now = to_epoch_seconds(data["timestamp"])
+        start = latency.now()
+        self.indicators.update(now, float(data.get("close", 0)), float(data.get("volume", 0)))
+        latency.since("shared_indicators", start)
+
+        for i, engine in enumerate(self.engines):
+            if engine.position is not None or self.due[i] <= now:
+                self.due[i] = now + engine.on_tick(data)
+        return max(0, min(self.due) - now)
+
+    def summary(self):
+        """Per-variant position and closed-trade P&L, for the console and comparisons."""
+        return [
+            {
+                "name": name,
+                "position": engine.position,
+                "closed_trades": engine.trade_book.closed_trades,
+                "cumulative_profit": round(engine.trade_book.cumulative_profit, 2),
+            }
+            for name, engine in zip(self.names, self.engines)
+        ]
+
+
+if __name__ == "__main__":
+    from functions.sources import LiveSource, SystemClock, run_loop
+
+    parser = argparse.ArgumentParser(description="Run several strategy variants on one feed.")
+    parser.add_argument("strategies", nargs="?", default=STRATEGIES_PATH, help="JSON list of strategy configs")
+    parser.add_argument("--symbol", default=SYMBOL)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--max-ticks", type=int, default=None)
+    args = parser.parse_args()
+    if not args.strategies:
+        parser.error("no strategies file given (and STRATEGIES_PATH is not set)")
+
+    warnings.simplefilter("ignore")
+    host = StrategyHost(args.symbol, load_strategies(args.strategies))
+    try:
+        run_loop(host, LiveSource(args.symbol, args.base_url), SystemClock(), args.max_ticks)
+    except KeyboardInterrupt:
+        pass
+    for row in host.summary():
+        print(row)
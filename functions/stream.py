@@ -0,0 +1,170 @@
+
+
+# functions/stream.py
+
+import json
+import queue
+import random
+import threading
+
+from websockets.sync.client import connect
+
+from constants import STREAM_URL, STREAM_STALE_TIMEOUT, STREAM_RECONNECT_BASE, STREAM_RECONNECT_MAX
+from functions.data import BASE_URL, fetch_data, log_debug
+
+
+def subscribe_message(symbols):
+    """Delta Exchange subscription for the v2/ticker channel."""
+    return {
+        "type": "subscribe",
+        "payload": {"channels": [{"name": "v2/ticker", "symbols": list(symbols)}]},
+    }
+
+
+def parse_ticker(message):
+    """Returns the ticker dict from a pushed message, or None for anything else."""
+    try:
+        data = json.loads(message)
+    except ValueError:
+        return None
+    if data.get("type") != "v2/ticker" or "close" not in data or "timestamp" not in data:
+        return None
+    return data
+
+
+class TickerStream:
+    """
+    Keeps a WebSocket ticker subscription alive in a background thread and
+    queues every pushed ticker.
+
+    If the socket closes, errors or stays silent for `stale_timeout`
+    seconds it reconnects with jittered exponential backoff. `connected`
+    is set only while a subscription is live. When the queue is full the
+    oldest tick is dropped, since only fresh prices matter.
+    """
+    def __init__(self, symbols, url=STREAM_URL, stale_timeout=STREAM_STALE_TIMEOUT,
+                 reconnect_base=STREAM_RECONNECT_BASE, reconnect_max=STREAM_RECONNECT_MAX,
+                 queue_size=1000):
+        self.symbols = list(symbols)
+        self.url = url
+        self.stale_timeout = stale_timeout
+        self.reconnect_base = reconnect_base
+        self.reconnect_max = reconnect_max
+        self.ticks = queue.Queue(maxsize=queue_size)
+        self.connected = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.ws = None
+        self.last_error = None
+        self.stats = {"connects": 0, "disconnects": 0, "messages": 0, "dropped": 0}
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="ticker-stream", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        ws = self.ws
+        if ws is not None:
+            ws.close()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def get(self, timeout=None):
+        """Next pushed ticker, or None if nothing arrived within `timeout`."""
+        try:
+            return self.ticks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """Discards queued ticks, e.g. after a pause."""
+        while True:
+            try:
+                self.ticks.get_nowait()
+            except queue.Empty:
+                return
+
+    def _put(self, tick):
+        while True:
+            try:
+                self.ticks.put_nowait(tick)
+                return
+            except queue.Full:
+                try:
+                    self.ticks.get_nowait()
+                    self.stats["dropped"] += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        attempt = 0
+        while not self.stopped.is_set():
+            try:
+                with connect(self.url, open_timeout=self.stale_timeout) as ws:
+                    self.ws = ws
+                    ws.send(json.dumps(subscribe_message(self.symbols)))
+                    self.connected.set()
+                    self.stats["connects"] += 1
+                    attempt = 0
+                    while not self.stopped.is_set():
+                        tick = parse_ticker(ws.recv(timeout=self.stale_timeout))
+                        if tick:
+                            self.stats["messages"] += 1
+                            self._put(tick)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            finally:
+                self.connected.clear()
+                self.ws = None
+
+            if self.stopped.is_set():
+                return
+            self.stats["disconnects"] += 1
+            log_debug(f"Stream disconnected ({self.last_error}), reconnecting")
+            delay = random.uniform(0, min(self.reconnect_max, self.reconnect_base * 2 ** attempt))
+            attempt += 1
+            self.stopped.wait(delay)
+
+
+class StreamFeed:
+    """
+    Tick source for one symbol: pushed tickers while the stream is up,
+    fetch_data polling while it is down.
+    """
+    def __init__(self, symbol, url=STREAM_URL, base_url=BASE_URL, stale_timeout=STREAM_STALE_TIMEOUT):
+        self.symbol = symbol
+        self.base_url = base_url
+        self.stale_timeout = stale_timeout
+        self.stream = TickerStream([symbol], url, stale_timeout)
+        self.pushed = 0
+        self.polled = 0
+
+    def start(self):
+        self.stream.start()
+        return self
+
+    def stop(self):
+        self.stream.stop()
+
+    def drain(self):
+        self.stream.drain()
+
+    def next_tick(self, poll_delay):
+        """
+        Blocks until the next tick. With the stream down it polls after
+        `poll_delay` seconds, or switches back as soon as the stream
+        reconnects. A live stream that goes quiet for `stale_timeout`
+        seconds is bridged with a poll.
+        """
+        if not self.stream.connected.is_set() and not self.stream.connected.wait(poll_delay):
+            self.polled += 1
+            return fetch_data(self.symbol, self.base_url)
+
+        tick = self.stream.get(timeout=self.stale_timeout)
+        if tick:
+            self.pushed += 1
+            return tick
+        self.polled += 1
+        return fetch_data(self.symbol, self.base_url)
@@ -0,0 +1,155 @@
+
+
+# functions/stub_server.py
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from functions.synthetic import TickGenerator
+
+
+class StubTickerServer:
+    """
+    Local stand-in for the Delta Exchange ticker endpoint.
+
+    Serves GET /v2/tickers/<SYMBOL> with a seeded random walk per symbol,
+    in the same {"result": {...}} shape fetch_data expects, and the batch
+    GET /v2/tickers with a list of every known symbol. Point fetch_data
+    (or the runner) at `base_url` instead of the real API.
+
+    With synthetic=True prices come from a seeded TickGenerator per symbol
+    (GBM with jumps) instead. `rate` then sets how many ticks per second
+    the feed produces in real time: a poll gets the newest tick (with the
+    volume traded since the previous one), or the same tick again if none
+    is due yet. Without `rate` every request advances the feed one tick.
+    """
+    def __init__(self, host="127.0.0.1", port=0, seed=0, start_price=60000.0,
+                 volatility=0.001, latency=0.0, fail_rate=0.0, symbols=(), synthetic=False, rate=None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.start_price = start_price
+        self.volatility = volatility
+        self.latency = latency      # seconds added to every response
+        self.fail_rate = fail_rate  # share of requests answered with HTTP 503
+        self.prices = {symbol: start_price for symbol in symbols}
+        self.synthetic = synthetic
+        self.rate = rate
+        self.generators = {}
+        self.last = {}
+        self.started = time.time()
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v2/tickers"
+
+    def next_ticker(self, symbol):
+        """Advances the random walk for `symbol` and returns a ticker dict."""
+        if self.synthetic:
+            return self._synthetic_ticker(symbol)
+        with self.lock:
+            price = self.prices.get(symbol, self.start_price)
+            price *= 1 + self.random.gauss(0, self.volatility)
+            self.prices[symbol] = price
+            volume = self.random.uniform(0, 100)
+        return {
+            "symbol": symbol,
+            "close": price,
+            "volume": volume,
+            "timestamp": int(time.time() * 1_000_000),
+        }
+
+    def _synthetic_ticker(self, symbol):
+        with self.lock:
+            generator = self.generators.get(symbol)
+            if generator is None:
+                generator = self.generators[symbol] = TickGenerator(
+                    seed=self.seed + len(self.generators), start_price=self.start_price,
+                    rate=self.rate or 1.0, start_ts=self.started,
+                )
+            if not self.rate:
+                ticker = generator.advance(1, symbol)
+                ticker["timestamp"] = int(time.time() * 1_000_000)
+            else:
+                steps = int((time.time() - self.started) * self.rate) + 1 - generator.index
+                if steps <= 0:
+                    return self.last[symbol]
+                ticker = generator.advance(steps, symbol)
+            self.last[symbol] = ticker
+            self.prices[symbol] = ticker["close"]
+            return ticker
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                    fail = server.fail_rate and server.random.random() < server.fail_rate
+                parts = self.path.split("?")[0].rstrip("/").split("/")
+                if parts[-1] == "tickers":
+                    result = [server.next_ticker(symbol) for symbol in list(server.prices)]
+                elif len(parts) >= 4 and parts[-2] == "tickers":
+                    result = server.next_ticker(parts[-1])
+                else:
+                    self.send_error(404)
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                if fail:
+                    self.send_error(503)
+                    return
+                body = json.dumps({"success": True, "result": result}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Starts serving in a background thread and returns base_url."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fake Delta tickers locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests that return 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--synthetic", action="store_true", help="GBM-with-jumps prices instead of a random walk")
+    parser.add_argument("--rate", type=float, default=None, help="Synthetic ticks per second (default: one per request)")
+    args = parser.parse_args()
+
+    stub = StubTickerServer(port=args.port, seed=args.seed, latency=args.latency, fail_rate=args.fail_rate,
+                            synthetic=args.synthetic, rate=args.rate)
+    print(f"Serving tickers at {stub.base_url}")
+    stub.httpd.serve_forever()
@@ -0,0 +1,109 @@
+
+
+# functions/synthetic.py
+
+import argparse
+import time
+
+import numpy as np
+
+from constants import (
+    SYMBOL, SYNTH_START_PRICE, SYNTH_VOLATILITY, SYNTH_JUMP_RATE, SYNTH_JUMP_STD, SYNTH_VOLUME_MEAN,
+)
+from functions.recorder import TICK_DTYPE
+
+
+class TickGenerator:
+    """
+    Seeded synthetic ticks: geometric Brownian motion with Poisson jumps
+    (Merton jump-diffusion) and a volume per tick.
+
+    Each step is `1 / rate` seconds. The log return is
+    (drift - volatility^2 / 2) * dt + volatility * sqrt(dt) * Z plus the sum
+    of Poisson(jump_rate * dt) normal jumps. `volatility` and `drift` are
+    per second, `jump_rate` is jumps per second. Volume is lognormal around
+    `volume_mean` and grows with the size of the move.
+
+    The same seed, parameters and sequence of calls always give the same
+    ticks.
+    """
+    def __init__(self, seed=0, start_price=SYNTH_START_PRICE, volatility=SYNTH_VOLATILITY, drift=0.0,
+                 jump_rate=SYNTH_JUMP_RATE, jump_mean=0.0, jump_std=SYNTH_JUMP_STD,
+                 volume_mean=SYNTH_VOLUME_MEAN, rate=1.0, start_ts=None):
+        self.rng = np.random.default_rng(seed)
+        self.price = float(start_price)
+        self.volatility = volatility
+        self.drift = drift
+        self.jump_rate = jump_rate
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.volume_mean = volume_mean
+        self.dt = 1.0 / rate
+        self.start_us = int((time.time() if start_ts is None else start_ts) * 1_000_000)
+        self.index = 0  # steps generated so far
+
+    def _steps(self, n):
+        """(closes, volumes) of the next n steps."""
+        rng, dt = self.rng, self.dt
+        shocks = rng.standard_normal(n)
+        log_returns = (self.drift - 0.5 * self.volatility ** 2) * dt + self.volatility * np.sqrt(dt) * shocks
+        if self.jump_rate:
+            jumps = rng.poisson(self.jump_rate * dt, n)
+            hit = jumps > 0
+            log_returns[hit] += (jumps[hit] * self.jump_mean
+                                 + np.sqrt(jumps[hit]) * self.jump_std * rng.standard_normal(hit.sum()))
+        closes = self.price * np.exp(np.cumsum(log_returns))
+        self.price = float(closes[-1])
+
+        # Bigger moves trade more: scale by the move in units of one step's volatility
+        size = np.abs(log_returns) / (self.volatility * np.sqrt(dt))
+        volumes = self.volume_mean * rng.lognormal(-0.125, 0.5, n) * (0.5 + 0.5 * size)
+        return closes, volumes
+
+    def generate(self, n):
+        """The next n ticks as a TICK_DTYPE array (fields the generator doesn't model are NaN)."""
+        ticks = np.empty(n, dtype=TICK_DTYPE)
+        for name in TICK_DTYPE.names[1:]:
+            ticks[name] = np.nan
+        steps = np.arange(self.index + 1, self.index + n + 1)
+        ticks["timestamp"] = self.start_us + (steps * self.dt * 1_000_000).astype(np.int64)
+        ticks["close"], ticks["volume"] = self._steps(n)
+        ticks["mark_price"] = ticks["close"]
+        self.index += n
+        return ticks
+
+    def advance(self, n=1, symbol=SYMBOL):
+        """
+        Moves n steps ahead and returns the last one as a ticker dict, like
+        fetch_data returns, with the volume traded over all n steps (what a
+        poller sees of a feed faster than its polls).
+        """
+        ticks = self.generate(n)
+        last = ticks[-1]
+        return {
+            "symbol": symbol,
+            "close": float(last["close"]),
+            "mark_price": float(last["mark_price"]),
+            "volume": float(ticks["volume"].sum()),
+            "timestamp": int(last["timestamp"]),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write seeded synthetic ticks to a .ticks file (recorder format).")
+    parser.add_argument("out", help="Output path, e.g. logs/synthetic.ticks")
+    parser.add_argument("--ticks", type=int, default=100_000)
+    parser.add_argument("--rate", type=float, default=1.0, help="Ticks per second of simulated time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-price", type=float, default=SYNTH_START_PRICE)
+    parser.add_argument("--volatility", type=float, default=SYNTH_VOLATILITY, help="Per sqrt(second)")
+    parser.add_argument("--jump-rate", type=float, default=SYNTH_JUMP_RATE, help="Jumps per second")
+    parser.add_argument("--jump-std", type=float, default=SYNTH_JUMP_STD)
+    parser.add_argument("--start-ts", type=float, default=None, help="Epoch seconds of the first tick")
+    args = parser.parse_args()
+
+    generator = TickGenerator(args.seed, args.start_price, args.volatility, jump_rate=args.jump_rate,
+                              jump_std=args.jump_std, rate=args.rate, start_ts=args.start_ts)
+    ticks = generator.generate(args.ticks)
+    ticks.tofile(args.out)
+    print(f"Wrote {len(ticks)} ticks to {args.out} | last price {ticks['close'][-1]:.2f}")
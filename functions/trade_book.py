@@ -0,0 +1,114 @@
+
+
+# functions/trade_book.py
+
+import pandas as pd
+
+from constants import TRADE_BOOK_MAX_RECORDS
+from functions.utils import format_timestamp
+
+TRADE_COLUMNS = [
+    "Trade No", "Trade Type", "Entry Date", "Entry Time", "Entry Price",
+    "Exit Date", "Exit Time", "Exit Price", "Trade Fee", "Profit", "Total Profit",
+    "Take Profit Percentage", "Stop Loss Percentage", "Trailing Trigger Percentage",
+    "Trailing Margin Percentage", "Trade Cost Percentage"
+]
+
+
+class TradeRecord:
+    """One trade. Timestamps are epoch seconds; exit fields are None while open."""
+    __slots__ = (
+        "trade_no", "trade_type", "entry_ts", "entry_price",
+        "exit_ts", "exit_price", "trade_fee", "profit", "total_profit",
+        "take_profit", "stop_loss", "trailing_trigger", "trailing_margin", "trade_cost",
+    )
+
+    def __init__(self, trade_no, trade_type, entry_ts, entry_price,
+                 take_profit, stop_loss, trailing_trigger, trailing_margin, trade_cost):
+        self.trade_no = trade_no
+        self.trade_type = trade_type
+        self.entry_ts = entry_ts
+        self.entry_price = entry_price
+        self.exit_ts = None
+        self.exit_price = None
+        self.trade_fee = None
+        self.profit = None
+        self.total_profit = 0
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.trailing_trigger = trailing_trigger
+        self.trailing_margin = trailing_margin
+        self.trade_cost = trade_cost
+
+    def to_row(self):
+        """The record as a dict keyed by TRADE_COLUMNS."""
+        entry_date, entry_time = format_timestamp(self.entry_ts).split(" ")
+        exit_date, exit_time = (
+            format_timestamp(self.exit_ts).split(" ") if self.exit_ts is not None else (None, None)
+        )
+        return {
+            'Trade No': self.trade_no,
+            'Trade Type': self.trade_type,
+            'Entry Date': entry_date,
+            'Entry Time': entry_time,
+            'Entry Price': self.entry_price,
+            'Exit Date': exit_date,
+            'Exit Time': exit_time,
+            'Exit Price': self.exit_price,
+            'Trade Fee': self.trade_fee,
+            'Profit': self.profit,
+            'Total Profit': self.total_profit,
+            'Take Profit Percentage': self.take_profit,
+            'Stop Loss Percentage': self.stop_loss,
+            'Trailing Trigger Percentage': self.trailing_trigger,
+            'Trailing Margin Percentage': self.trailing_margin,
+            'Trade Cost Percentage': self.trade_cost
+        }
+
+
+class TradeBook:
+    """
+    In-memory trades indexed by trade number, with a running cumulative
+    P&L. Opening and closing a trade are O(1) dict operations.
+
+    Only the latest `max_records` trades are kept in memory (the ledger
+    holds the full history), so memory stays flat over long uptimes.
+    """
+    def __init__(self, max_records=TRADE_BOOK_MAX_RECORDS):
+        self.max_records = max_records
+        self.records = {}
+        self.cumulative_profit = 0
+        self.closed_trades = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, trade_no):
+        return trade_no in self.records
+
+    def get(self, trade_no):
+        return self.records.get(trade_no)
+
+    def open(self, record):
+        """Adds a newly entered trade."""
+        self.records[record.trade_no] = record
+        if len(self.records) > self.max_records:
+            # Dicts keep insertion order, so the first key is the oldest trade
+            del self.records[next(iter(self.records))]
+        return record
+
+    def close(self, trade_no, exit_ts, exit_price, trade_fee, profit):
+        """Fills in the exit of `trade_no` and adds its profit to the running total."""
+        record = self.records[trade_no]
+        record.exit_ts = exit_ts
+        record.exit_price = exit_price
+        record.trade_fee = trade_fee
+        record.profit = profit
+        self.cumulative_profit += profit
+        self.closed_trades += 1
+        record.total_profit = self.cumulative_profit
+        return record
+
+    def to_dataframe(self):
+        """Reporting view with the same columns as the ledger / trades.xlsx."""
+        return pd.DataFrame([record.to_row() for record in self.records.values()], columns=TRADE_COLUMNS)
@@ -3,52 +3,49 @@
 
 # functions/trade_logic.py
 
-import pandas as pd
 from functions.data import log_and_print, log_debug
+from functions.trade_book import TradeRecord
 from functions.utils import calculate_total_fees
 from constants import TRADE_COST_PERCENT, LOT_SIZE, LOTS_PER_CRYPTO, TRADE_SIZE
 
+# ========== Log Fields ==========
+
+def _log_fields(symbol, trade_no):
+    """Extra log fields tying a line to its symbol and trade (when known)."""
+    fields = {"symbol": symbol, "trade": trade_no}
+    return {key: value for key, value in fields.items() if value is not None}
+
 # ========== Entry Functions ==========
 
-def enter_trade(price, formatted_time, trade_no, direction, take_profit, stop_loss, trailing_trigger, trailing_margin):
+def enter_trade(price, formatted_time, trade_no, direction, take_profit, stop_loss, trailing_trigger, trailing_margin,
+                timestamp, symbol=None):
     """
     Entry logic for either long or short position.
+    `timestamp` is the entry time in epoch seconds, stored on the TradeRecord.
     """
     entry_price = price
     entry_time = formatted_time
     extreme_price = price  # highest for long, lowest for short
     stop = entry_price * (1 - stop_loss) if direction == "LONG" else entry_price * (1 + stop_loss)
 
-    log_and_print(f"\n🟢 ENTER {direction}: {formatted_time} | Entry Price=${entry_price:.2f} | Stop Loss=${stop:.2f}")
-
-    entry_df = pd.DataFrame([{
-        'Trade No': trade_no,
-        'Trade Type': direction.title(),
-        'Entry Date': entry_time.split(' ')[0],
-        'Entry Time': entry_time.split(' ')[1],
-        'Entry Price': entry_price,
-        'Exit Date': None,
-        'Exit Time': None,
-        'Exit Price': None,
-        'Trade Fee': None,
-        'Profit': None,
-        'Total Profit': 0,
-        'Take Profit Percentage': take_profit,
-        'Stop Loss Percentage': stop_loss,
-        'Trailing Trigger Percentage': trailing_trigger,
-        'Trailing Margin Percentage': trailing_margin,
-        'Trade Cost Percentage': TRADE_COST_PERCENT
-    }])
-
-    return direction, entry_price, entry_time, extreme_price, entry_df
+    log_and_print(f"\n🟢 ENTER {direction}: {formatted_time} | Entry Price=${entry_price:.2f} | Stop Loss=${stop:.2f}",
+                  **_log_fields(symbol, trade_no))
+
+    record = TradeRecord(
+        trade_no, direction.title(), timestamp, entry_price,
+        take_profit, stop_loss, trailing_trigger, trailing_margin, TRADE_COST_PERCENT
+    )
+
+    return direction, entry_price, entry_time, extreme_price, record
 
 # ========== Exit Logic ==========
 
 def exit_trade(price, entry_price, position, extreme_price, total_profit,
-               take_profit, stop_loss, trailing_trigger, trailing_margin):
+               take_profit, stop_loss, trailing_trigger, trailing_margin, symbol=None, trade_no=None):
     """
     Generalized exit logic for long and short positions.
-    
+    `symbol` and `trade_no` only tag the log lines.
+
     Returns:
         position, total_profit, updated_extreme_price, exit_message (or None if no exit)
     """
@@ -67,10 +64,12 @@ def exit_trade(price, entry_price, position, extreme_price, total_profit,
             old = extreme_price
             new_extreme = price
             trailing_level = new_extreme * (1 - trailing_margin)
-            log_and_print(f"🔄 LONG Trailing updated: {old:.2f} → {new_extreme:.2f} | Stop: {trailing_level:.2f}")
+            log_and_print(f"🔄 LONG Trailing updated: {old:.2f} → {new_extreme:.2f} | Stop: {trailing_level:.2f}",
+                          **_log_fields(symbol, trade_no))
             log_debug(
                 f"[TRAILING SL] LONG: Highest {old:.2f} → {new_extreme:.2f}, "
-                f"SL: {old * (1 - trailing_margin):.2f} → {trailing_level:.2f}"
+                f"SL: {old * (1 - trailing_margin):.2f} → {trailing_level:.2f}",
+                **_log_fields(symbol, trade_no)
             )
 
     elif not is_long and price < extreme_price:
@@ -80,10 +79,12 @@ def exit_trade(price, entry_price, position, extreme_price, total_profit,
             old = extreme_price
             new_extreme = price
             trailing_level = new_extreme * (1 + trailing_margin)
-            log_and_print(f"🔄 SHORT Trailing updated: {old:.2f} → {new_extreme:.2f} | Stop: {trailing_level:.2f}")
+            log_and_print(f"🔄 SHORT Trailing updated: {old:.2f} → {new_extreme:.2f} | Stop: {trailing_level:.2f}",
+                          **_log_fields(symbol, trade_no))
             log_debug(
                 f"[TRAILING SL] SHORT: Lowest {old:.2f} → {new_extreme:.2f}, "
-                f"SL: {old * (1 + trailing_margin):.2f} → {trailing_level:.2f}"
+                f"SL: {old * (1 + trailing_margin):.2f} → {trailing_level:.2f}",
+                **_log_fields(symbol, trade_no)
             )
 
 
@@ -115,23 +116,12 @@ def exit_trade(price, entry_price, position, extreme_price, total_profit,
 
 
 # ========== Finalize Exit ==========
-def finalize_exit(trade_df, trade_no, price, time_str, entry_price, total_profit):
+def finalize_exit(trade_book, trade_no, price, timestamp, entry_price, total_profit):
     """
-    Handles fee deduction and updates the trade DataFrame.
+    Handles fee deduction and closes the trade in the TradeBook.
+    `timestamp` is the exit time in epoch seconds.
     """
     trade_fee = calculate_total_fees(entry_price, price, LOT_SIZE, LOTS_PER_CRYPTO, TRADE_COST_PERCENT)
     net_profit = total_profit - trade_fee
 
-    trade_df.loc[trade_df["Trade No"] == trade_no, "Exit Date"] = time_str.split(" ")[0]
-    trade_df.loc[trade_df["Trade No"] == trade_no, "Exit Time"] = time_str.split(" ")[1]
-    trade_df.loc[trade_df["Trade No"] == trade_no, "Exit Price"] = price
-    trade_df.loc[trade_df["Trade No"] == trade_no, "Trade Fee"] = trade_fee
-    trade_df.loc[trade_df["Trade No"] == trade_no, "Profit"] = net_profit
-
-    previous_total = (
-        trade_df.loc[trade_df["Trade No"] == (trade_no - 1), "Total Profit"].values[0]
-        if trade_no > 1 else 0
-    )
-    trade_df.loc[trade_df["Trade No"] == trade_no, "Total Profit"] = previous_total + net_profit
-
-    return trade_df
+    return trade_book.close(trade_no, timestamp, price, trade_fee, net_profit)
@@ -3,14 +3,16 @@
 # functions/utils.py
 
 import time
+from datetime import datetime, timedelta
 from constants import GST_RATE
 
+def get_delay(position, pause_after_entry, pause_after_exit):
+    """Returns the delay in seconds depending on whether trade is open."""
+    return pause_after_entry if position is None else pause_after_exit
+
 def apply_delay(position, pause_after_entry, pause_after_exit):
     """Applies appropriate delay depending on whether trade is open."""
-    if position is None:
-        time.sleep(pause_after_entry)
-    else:
-        time.sleep(pause_after_exit)
+    time.sleep(get_delay(position, pause_after_entry, pause_after_exit))
 
 def calculate_total_fees(entry_price, exit_price, lot_size, lots_per_crypto, fee_rate=0.0005, gst_rate=GST_RATE):
     """
@@ -21,6 +23,48 @@ def calculate_total_fees(entry_price, exit_price, lot_size, lots_per_crypto, fee
     total_fees = gross_fee * (1 + gst_rate)
     return total_fees
 
+# Largest epoch value read as seconds, milliseconds and microseconds; anything bigger is nanoseconds
+EPOCH_LIMITS = ((10**11, 1), (10**14, 10**3), (10**17, 10**6))
+
+def _epoch_divisor(timestamp):
+    for limit, divisor in EPOCH_LIMITS:
+        if abs(int(timestamp)) < limit:
+            return divisor
+    return 10**9
+
+def to_epoch_seconds(timestamp, exact=False):
+    """
+    Converts an exchange timestamp (epoch seconds, milliseconds, microseconds
+    or nanoseconds, told apart by size) to whole epoch seconds, or to
+    fractional seconds with exact=True.
+    """
+    divisor = _epoch_divisor(timestamp)
+    if exact:
+        return float(timestamp) / divisor
+    return int(timestamp) // divisor
+
+def to_epoch_seconds_array(timestamps, exact=False):
+    """Vectorized to_epoch_seconds: an int64 array of whole seconds (float64 with exact=True)."""
+    import numpy as np
+
+    timestamps = np.asarray(timestamps)
+    size = np.abs(timestamps)
+    divisor = np.full(timestamps.shape, 10**9, dtype=np.int64)
+    for limit, value in reversed(EPOCH_LIMITS):
+        divisor[size < limit] = value
+    if exact:
+        return timestamps / divisor
+    return timestamps.astype(np.int64) // divisor
+
+def format_timestamp(timestamp):
+    """
+    Converts an exchange timestamp (see to_epoch_seconds) to the
+    IST 'YYYY-MM-DD HH:MM:SS' string used in logs and the trade ledger.
+    """
+    seconds = to_epoch_seconds(timestamp)
+    ist_time = datetime.utcfromtimestamp(seconds) + timedelta(hours=5, minutes=30)
+    return ist_time.strftime('%Y-%m-%d %H:%M:%S')
+
 # functions/utils.py
 
 def normalize_indicators(**kwargs):
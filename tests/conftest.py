@@ -0,0 +1,9 @@
+
+
+# tests/conftest.py
+
+import os
+import sys
+
+# The modules import `constants` and `functions.*` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,75 @@
+
+
+# tests/test_indicators.py
+
+import numpy as np
+import pytest
+
+from functions.indicators import (
+    EMA, MACD, RSI, VWAP, calculate_ema, ema_series, macd_series, rsi_series, vwap_series,
+)
+
+
+@pytest.fixture
+def market():
+    rng = np.random.default_rng(7)
+    prices = 100 + np.cumsum(rng.normal(0, 0.2, 3000))
+    volumes = rng.random(3000)
+    volumes[rng.random(3000) < 0.2] = 0.0  # ticks without trades
+    return prices, volumes
+
+
+def streamed(indicator, *columns):
+    values = [indicator.update(*args) for args in zip(*(c.tolist() for c in columns))]
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def test_ema_matches_the_recomputed_ema(market):
+    prices = market[0].tolist()
+    ema = EMA(20)
+    for i, price in enumerate(prices[:200]):
+        value = ema.update(price)
+        expected = calculate_ema(prices[:i + 1], 20)
+        if expected is None:
+            assert value is None
+        else:
+            assert value == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("period", [5, 20, 50])
+def test_ema_series(market, period):
+    prices = market[0]
+    np.testing.assert_allclose(ema_series(prices, period), streamed(EMA(period), prices), rtol=1e-9)
+
+
+def test_macd_series(market):
+    prices = market[0]
+    macd = MACD()
+    pairs = [macd.update(price) for price in prices.tolist()]
+    line, signal = macd_series(prices)
+    np.testing.assert_allclose(line, [np.nan if m is None else m for m, _ in pairs], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(signal, [np.nan if s is None else s for _, s in pairs], rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("period", [7, 14])
+def test_rsi_series(market, period):
+    prices = market[0]
+    np.testing.assert_allclose(rsi_series(prices, period), streamed(RSI(period), prices), rtol=1e-9)
+
+
+def test_rsi_of_a_rising_market_is_100():
+    prices = np.arange(1.0, 40.0)
+    assert streamed(RSI(14), prices)[-1] == 100.0
+    assert rsi_series(prices, 14)[-1] == 100.0
+
+
+def test_vwap_series(market):
+    prices, volumes = market
+    np.testing.assert_allclose(vwap_series(prices, volumes, 20), streamed(VWAP(20), prices, volumes), rtol=1e-9)
+
+
+def test_short_input_is_all_nan():
+    prices = np.arange(5.0)
+    assert np.isnan(ema_series(prices, 20)).all()
+    assert np.isnan(rsi_series(prices, 14)).all()
+    assert np.isnan(vwap_series(prices, np.zeros(5))).all()
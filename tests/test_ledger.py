@@ -0,0 +1,76 @@
+
+
+# tests/test_ledger.py
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from functions.ledger import TradeLedger
+from functions.trade_book import TradeRecord
+
+EXIT = {"Exit Date": "2025-01-03", "Exit Time": "05:00:00", "Exit Price": 101.0, "Trade Fee": 0.1}
+
+
+def entry(trade_no, price=100.0):
+    return TradeRecord(trade_no, "LONG", 1735862400, price, 0.02, 0.005, 0.002, 0.005, 0.0005).to_row()
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = TradeLedger(str(tmp_path / "trades.db"), "BTCUSD")
+    yield ledger
+    ledger.close()
+
+
+def test_entry_then_exit_fills_one_row(ledger):
+    ledger.record_entry(entry(1))
+    df = ledger.to_dataframe()
+    assert len(df) == 1 and df.loc[0, "Exit Price"] is None
+
+    ledger.record_exit(1, dict(EXIT, Profit=0.9, **{"Total Profit": 0.9}))
+    row = ledger.to_dataframe().iloc[0]
+    assert row["Entry Price"] == 100.0
+    assert row["Exit Price"] == 101.0
+    assert row["Total Profit"] == 0.9
+
+
+def test_recorded_trades_are_never_replaced(ledger):
+    ledger.record_entry(entry(1, price=100.0))
+    with pytest.raises(sqlite3.IntegrityError):
+        ledger.record_entry(entry(1, price=200.0))
+    assert ledger.to_dataframe()["Entry Price"].tolist() == [100.0]
+
+
+def test_symbols_are_kept_apart(tmp_path, ledger):
+    other = TradeLedger(ledger.path, "ETHUSD")
+    ledger.record_entry(entry(1))
+    other.record_entry(entry(1))
+    other.record_entry(entry(2))
+    assert ledger.last_trade_no() == 1
+    assert other.last_trade_no() == 2
+    assert len(ledger.to_dataframe(all_symbols=True)) == 3
+    other.close()
+
+
+def test_running_totals(ledger):
+    assert (ledger.last_trade_no(), ledger.last_total_profit(), ledger.closed_trade_count()) == (0, 0, 0)
+    ledger.record_entry(entry(1))
+    ledger.record_exit(1, dict(EXIT, Profit=5.0, **{"Total Profit": 5.0}))
+    ledger.record_entry(entry(2))
+    ledger.record_exit(2, dict(EXIT, Profit=-2.0, **{"Total Profit": 3.0}))
+    ledger.record_entry(entry(3))  # still open: its Total Profit is a placeholder
+    assert ledger.last_trade_no() == 3
+    assert ledger.last_total_profit() == 3.0
+    assert ledger.closed_trade_count() == 2
+
+
+def test_numpy_and_nan_values_are_stored(ledger):
+    row = entry(1)
+    row["Entry Price"] = np.float64(100.5)
+    row["Trade Fee"] = float("nan")
+    ledger.record_entry(row)
+    df = ledger.to_dataframe()
+    assert df.loc[0, "Entry Price"] == 100.5
+    assert df.loc[0, "Trade Fee"] is None
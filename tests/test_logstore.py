@@ -0,0 +1,83 @@
+
+
+# tests/test_logstore.py
+
+import gzip
+import json
+import os
+
+import pytest
+
+from functions.logstore import rotate_log, archive_pending, segments, query_log, line_ts, line_trade
+
+T0 = 1735862400
+
+
+def write_lines(path, start, count):
+    """One line per second; every 10 lines belong to one trade."""
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(start, start + count):
+            record = {"ts": T0 + i, "level": "INFO", "msg": f"line {i}", "trade": i // 10}
+            f.write(json.dumps(record) + "\n")
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = str(tmp_path / "trade.log")
+    # Two rotated segments plus the live file: lines 0-299, 300-599, 600-699
+    for start in (0, 300):
+        write_lines(path, start, 300)
+        rotate_log(path)
+    write_lines(path, 600, 100)
+    archive_pending(os.path.join(str(tmp_path), "archive"), "trade", block_bytes=2000)
+    return path
+
+
+def numbers(lines):
+    return [int(json.loads(line)["msg"].split()[1]) for line in lines]
+
+
+def test_rotated_segments_are_compressed_and_indexed(log, tmp_path):
+    found = segments(str(tmp_path / "archive"), "trade")
+    assert [(start, end) for start, end, _, _ in found] == [(T0, T0 + 299), (T0 + 300, T0 + 599)]
+    assert all(compressed for *_, compressed in found)
+    for _, _, path, _ in found:
+        with gzip.open(path, "rt", encoding="utf-8") as f:  # still one valid gzip file
+            assert len(f.read().splitlines()) == 300
+        with open(path + ".idx", encoding="utf-8") as f:
+            assert len(json.load(f)["blocks"]) > 1
+
+
+def test_query_everything_in_order(log):
+    assert numbers(query_log(log)) == list(range(700))
+
+
+def test_query_time_range_across_segments(log):
+    assert numbers(query_log(log, T0 + 250, T0 + 649)) == list(range(250, 650))
+    assert numbers(query_log(log, T0 + 1000)) == []
+
+
+def test_query_trade(log):
+    assert numbers(query_log(log, trade=42)) == list(range(420, 430))
+    assert numbers(query_log(log, trade=65)) == list(range(650, 660))  # still in the live file
+    assert numbers(query_log(log, T0 + 425, trade=42)) == list(range(425, 430))
+
+
+def test_plain_segment_is_queried_before_it_is_compressed(tmp_path):
+    path = str(tmp_path / "trade.log")
+    write_lines(path, 0, 50)
+    rotated = rotate_log(path)
+    assert rotated.endswith(".log") and not os.path.exists(path)
+    assert numbers(query_log(path, trade=3)) == list(range(30, 40))
+
+
+def test_rotate_leaves_an_empty_log_alone(tmp_path):
+    path = str(tmp_path / "trade.log")
+    open(path, "w").close()
+    assert rotate_log(path) is None
+
+
+def test_line_fields():
+    line = json.dumps({"ts": 12.5, "msg": "x", "trade": 7})
+    assert line_ts(line) == 12.5 and line_trade(line) == 7
+    assert line_ts("not json") is None and line_trade('{"msg": "x"}') is None
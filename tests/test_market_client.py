@@ -0,0 +1,136 @@
+
+
+# tests/test_market_client.py
+
+import pytest
+
+from functions import market_client
+from functions.market_client import MarketDataClient, MarketDataError, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Answers every GET with the next queued response."""
+    def __init__(self):
+        self.responses = []
+        self.requests = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.requests += 1
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(market_client.time, "monotonic", clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def client(clock):
+    client = MarketDataClient("http://exchange.test", max_retries=0, breaker_threshold=3, breaker_cooldown=30)
+    client.session = FakeSession()
+    return client
+
+
+def fail(client, times=1):
+    for _ in range(times):
+        client.session.responses.append(FakeResponse(400))
+        with pytest.raises(MarketDataError):
+            client.get_ticker("BTCUSD")
+
+
+def ok(client):
+    client.session.responses.append(FakeResponse(200, {"result": {"symbol": "BTCUSD", "close": 1.0}}))
+    return client.get_ticker("BTCUSD")
+
+
+def test_opens_after_threshold_and_fails_fast(client):
+    fail(client, 2)
+    assert client.breaker == CLOSED
+    fail(client)
+    assert client.breaker == OPEN
+    assert client.stats["breaker_trips"] == 1
+
+    with pytest.raises(CircuitOpenError):
+        client.get_ticker("BTCUSD")
+    assert client.session.requests == 3
+    assert client.stats["short_circuited"] == 1
+
+
+def test_half_open_lets_a_single_trial_through(client, clock):
+    fail(client, 3)
+    clock.now += 30
+    assert client._allow_request()
+    assert client.breaker == HALF_OPEN
+    # Other callers keep failing fast while the trial is out
+    assert not client._allow_request()
+    assert client.stats["short_circuited"] == 1
+
+
+def test_successful_trial_closes(client, clock):
+    fail(client, 3)
+    clock.now += 30
+    assert ok(client)["close"] == 1.0
+    assert client.breaker == CLOSED
+    assert client.consecutive_failures == 0
+
+
+def test_failed_trial_reopens_straight_away(client, clock):
+    fail(client, 3)
+    clock.now += 30
+    fail(client)
+    assert client.breaker == OPEN
+    assert client.open_until == clock.now + 30
+    assert client.stats["breaker_trips"] == 2
+
+
+def test_trial_that_never_reports_back_is_retried(client, clock):
+    fail(client, 3)
+    clock.now += 30
+    assert client._allow_request()
+    clock.now += 30
+    assert client._allow_request()
+    assert client.breaker == HALF_OPEN
+
+
+@pytest.mark.parametrize("payload", [[1], "x", {"result": [1]}, {"result": "x"}])
+def test_malformed_ticker_payload(client, payload):
+    client.session.responses.append(FakeResponse(200, payload))
+    with pytest.raises(MarketDataError):
+        client.get_ticker("BTCUSD")
+    assert client.stats["bad_payload"] == 1
+
+
+def test_batch_tickers_need_a_symbol(client):
+    client.session.responses.append(FakeResponse(200, {"result": [{"symbol": "BTCUSD"}, {"close": 1}]}))
+    with pytest.raises(MarketDataError):
+        client.get_tickers()
+    client.session.responses.append(FakeResponse(200, {"result": [{"symbol": "BTCUSD"}, {"symbol": "ETHUSD"}]}))
+    assert list(client.get_tickers(["ETHUSD"])) == ["ETHUSD"]
+
+
+def test_missing_result_is_empty(client):
+    client.session.responses.append(FakeResponse(200, {"success": True}))
+    assert client.get_ticker("BTCUSD") == {}
+    assert client.stats["empty"] == 1
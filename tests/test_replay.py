@@ -0,0 +1,33 @@
+
+
+# tests/test_replay.py
+
+import numpy as np
+import pytest
+
+from functions.backtest import run_backtest
+from functions.replay import replay
+from functions.synthetic import TickGenerator
+
+COLUMNS = ["Entry Price", "Exit Price", "Trade Fee", "Profit", "Total Profit"]
+
+
+@pytest.fixture
+def ticks():
+    return TickGenerator(seed=11, start_ts=1735862400).generate(20000)
+
+
+def test_replay_matches_the_backtest_trade_for_trade(ticks, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine, summary = replay(ticks, out_dir=str(tmp_path / "replay"), quiet=True)
+    live = engine.ledger.to_dataframe()
+    backtest = run_backtest(ticks["timestamp"], ticks["close"], ticks["volume"])
+
+    assert summary["ticks"] == len(ticks)
+    assert len(live) == len(backtest) > 10
+    assert live["Trade Type"].str.lower().tolist() == backtest["Trade Type"].str.lower().tolist()
+    assert (live["Entry Date"] + live["Entry Time"]).tolist() == (backtest["Entry Date"] + backtest["Entry Time"]).tolist()
+    closed = backtest["Exit Price"].notna()
+    np.testing.assert_allclose(live.loc[closed, COLUMNS].to_numpy(dtype=float),
+                               backtest.loc[closed, COLUMNS].to_numpy(dtype=float), rtol=1e-9)
+    assert summary["total_profit"] == pytest.approx(backtest.loc[closed, "Profit"].sum())
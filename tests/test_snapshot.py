@@ -0,0 +1,146 @@
+
+
+# tests/test_snapshot.py
+
+import json
+
+import numpy as np
+import pytest
+
+from functions import engine as engine_module
+from functions.engine import TradingEngine
+from functions.recorder import TickRecorder
+from functions.trade_book import TradeRecord
+
+T0 = 1735862400
+
+
+def make_ticks(n=6000, seed=3):
+    prices = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 0.03, n))
+    return [{"timestamp": (T0 + i * 2) * 1_000_000, "close": float(p), "volume": 1.0} for i, p in enumerate(prices)]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(engine_module, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(engine_module, "USE_CANDLES", True)
+    monkeypatch.setattr(engine_module, "CONFIRM_TIMEFRAME", "5m")
+    return tmp_path
+
+
+def make_engine(name, snapshots=True):
+    return TradingEngine("BTCUSD", ledger_path=f"{name}.db", state_path=None, record=False,
+                         history_dir=f"history_{name}", snapshots=snapshots, name=name)
+
+
+def run(engine, ticks):
+    for data in ticks:
+        engine.on_tick(data)
+    return engine
+
+
+def trades(engine):
+    return engine.ledger.to_dataframe()[["Trade No", "Trade Type", "Entry Price", "Exit Price", "Total Profit"]]
+
+
+def split_in_position(ticks):
+    """Index of a tick where an uninterrupted run is holding a position."""
+    probe = make_engine("probe", snapshots=False)
+    for i, data in enumerate(ticks):
+        probe.on_tick(data)
+        if probe.position and probe.trade_book.closed_trades:
+            return i + 1
+    pytest.fail("no position in the sample")
+
+
+def test_restart_matches_an_uninterrupted_run(workdir):
+    ticks = make_ticks()
+    split = split_in_position(ticks)
+    reference = run(make_engine("reference", snapshots=False), ticks)
+
+    first = run(make_engine("bot"), ticks[:split])
+    first.save_snapshot(0)
+    restarted = make_engine("bot")
+
+    assert restarted.position == first.position
+    assert restarted.entry_price == first.entry_price
+    assert restarted.extreme_price == first.extreme_price
+    assert restarted.trade_no == first.trade_no
+    assert restarted.trade_no in restarted.trade_book
+    # Candles and bar indicators come back too, so confirmations work on the first tick
+    assert restarted.candles.values("5m") == first.candles.values("5m")
+    assert restarted.indicators.values == first.indicators.values
+
+    run(restarted, ticks[split:])
+    assert trades(restarted).equals(trades(reference))
+    assert restarted.trade_book.cumulative_profit == pytest.approx(reference.trade_book.cumulative_profit)
+    assert restarted.candles.values("5m") == reference.candles.values("5m")
+
+
+def test_gap_after_snapshot_is_backfilled_from_recorded_ticks(workdir):
+    ticks = make_ticks()
+    reference = run(make_engine("reference", snapshots=False), ticks[:5000])
+
+    first = run(make_engine("bot"), ticks[:4000])
+    first.save_snapshot(0)
+    # The recorder keeps going after the last snapshot, then the bot dies
+    recorder = TickRecorder("BTCUSD")
+    for data in ticks[4000:4200]:
+        recorder.record(data)
+    recorder.close()
+
+    restarted = make_engine("bot")
+    assert restarted.indicators.ticks == 200
+    partial = run(make_engine("partial", snapshots=False), ticks[:4200])
+    assert restarted.candles.values("5m") == partial.candles.values("5m")
+    assert restarted.indicators.values == partial.indicators.values
+
+    run(restarted, ticks[4200:5000])
+    assert restarted.candles.values("5m") == reference.candles.values("5m")
+
+
+def test_totals_are_seeded_from_the_ledger_without_a_snapshot(workdir):
+    engine = make_engine("bot", snapshots=False)
+    for trade_no, profit, total in ((1, 5.0, 5.0), (2, -2.0, 3.0)):
+        engine.ledger.record_entry(TradeRecord(trade_no, "LONG", T0, 100.0, 0, 0, 0, 0, 0).to_row())
+        engine.ledger.record_exit(trade_no, {"Exit Date": "2025-01-03", "Exit Time": "05:00:00", "Exit Price": 101.0,
+                                             "Trade Fee": 0.0, "Profit": profit, "Total Profit": total})
+
+    restarted = make_engine("bot", snapshots=False)
+    assert restarted.trade_no == 3
+    assert restarted.trade_book.cumulative_profit == 3.0
+    assert restarted.trade_book.closed_trades == 2
+
+
+def test_ledger_ahead_of_the_snapshot_wins(workdir):
+    ticks = make_ticks()
+    first = run(make_engine("bot"), ticks)
+    closed = first.trade_book.closed_trades
+    assert closed >= 2 and first.position is None
+    snapshot_path = first.snapshot_path
+    with open(snapshot_path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    # A snapshot from before the last trades
+    snapshot.update(trade_no=1, closed_trades=0, cumulative_profit=0)
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+
+    restarted = make_engine("bot")
+    assert restarted.trade_no == first.trade_no
+    assert restarted.trade_book.closed_trades == closed
+    assert restarted.trade_book.cumulative_profit == pytest.approx(first.trade_book.cumulative_profit)
+
+
+def test_snapshot_without_candle_state_still_loads(workdir):
+    ticks = make_ticks(2000)
+    first = run(make_engine("bot"), ticks)
+    with open(first.snapshot_path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    del snapshot["candles"]
+    with open(first.snapshot_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+
+    restarted = make_engine("bot")
+    assert restarted.trade_no == first.trade_no
+    assert restarted.ema_indicator.value == first.ema_indicator.value
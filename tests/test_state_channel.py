@@ -0,0 +1,67 @@
+
+
+# tests/test_state_channel.py
+
+import threading
+
+import pytest
+
+from functions.data_utils import StatePublisher, StateReader
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "state.json")
+
+
+def test_publish_and_read(path):
+    publisher, reader = StatePublisher(path), StateReader(path)
+    assert reader.read() == ({}, False)  # nothing published yet
+
+    assert publisher.publish({"current_price": 100.0, "position": {}})
+    state, changed = reader.read()
+    assert changed and state == {"seq": 1, "current_price": 100.0, "position": {}}
+    assert reader.read() == (state, False)
+
+    assert not publisher.publish({"current_price": 100.0, "position": {}})  # nothing changed
+    assert publisher.publish({"current_price": 101.0, "position": {}})
+    state, changed = reader.read()
+    assert changed and state["seq"] == 2 and state["current_price"] == 101.0
+
+
+def test_torn_write_keeps_the_last_good_snapshot(path):
+    publisher, reader = StatePublisher(path), StateReader(path)
+    publisher.publish({"current_price": 100.0})
+    good, _ = reader.read()
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"seq": 2, "current_pr')
+    assert reader.read() == (good, False)
+    assert reader.torn_reads == 1
+
+    # The next complete snapshot is picked up
+    publisher.publish({"current_price": 102.0})
+    state, changed = reader.read()
+    assert changed and state["current_price"] == 102.0
+
+
+def test_reader_never_sees_a_partial_snapshot(path):
+    publisher, reader = StatePublisher(path), StateReader(path)
+    publisher.publish({"n": 0, "payload": "x" * 50000})
+    done = threading.Event()
+
+    def write():
+        for n in range(1, 300):
+            publisher.publish({"n": n, "payload": "x" * 50000})
+        done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    seen = []
+    while not done.is_set():
+        state, changed = reader.read()
+        if changed:
+            seen.append(state["seq"])
+    writer.join()
+    assert reader.torn_reads == 0
+    assert seen == sorted(seen)